@@ -17,7 +17,7 @@ import litellm
 litellm.suppress_debug_info = True
 
 from evaluator import Evaluator
-from natural_time_parser import NaturalTimeParser
+from libre_agent.natural_time_parser import NaturalTimeParser
 
 from libre_agent.memory_graph import memory_graph, MemoryGraph
 from libre_agent.logger import logger
@@ -84,56 +84,58 @@ def inspect_eval(wm):
 def populate_memory_graph(memories_data: list, working_memory):
     time_parser = NaturalTimeParser()
 
-    for msg in memories_data:
-        role = msg.get("role", "user")
-        content = msg.get("content", "")
-        timestamp = msg.get("timestamp")
-        internal = msg.get("internal", None)
-
-        if isinstance(timestamp, str):
-            try:
-                dt = time_parser.parse(timestamp)
-                timestamp = time.mktime(dt.timetuple())
-            except:
-                timestamp = time.mktime(datetime.strptime(timestamp, "%Y-%m-%dT%H:%M:%S").timetuple())
-        else:
-            timestamp = time.time()
-
-        recall = msg.get("recalled", False)
-        add_to_working_memory = msg.get("working_memory", False)
-
-        if role == "user":
-            unit_name = "User"
-            memory_type = 'external'
-        elif role == "assistant":
-            unit_name = "ReasoningUnit"
-            memory_type = 'external'
-        else:
-            unit_name = role
-            memory_type = 'internal'
-
-        metadata = {
-            "unit_name": unit_name,
-            "role": "message",
-            "recalled": None,
-            "temporal_scope": "short_term"
-        }
-
-        if internal is not None:
-            memory_type = 'internal' if internal else 'external'
-
-        memory = memory_graph.add_memory(
-            timestamp=timestamp,
-            memory_type=memory_type,
-            content=content,
-            metadata=metadata
-        )
-
-        if recall:
-            memory["metadata"]['recalled'] = True
-
-        if recall or add_to_working_memory:
-            working_memory.memories.append(memory)
+    # Seed the whole scenario with a single graph write
+    with memory_graph.transaction():
+        for msg in memories_data:
+            role = msg.get("role", "user")
+            content = msg.get("content", "")
+            timestamp = msg.get("timestamp")
+            internal = msg.get("internal", None)
+
+            if isinstance(timestamp, str):
+                try:
+                    dt = time_parser.parse(timestamp)
+                    timestamp = time.mktime(dt.timetuple())
+                except:
+                    timestamp = time.mktime(datetime.strptime(timestamp, "%Y-%m-%dT%H:%M:%S").timetuple())
+            else:
+                timestamp = time.time()
+
+            recall = msg.get("recalled", False)
+            add_to_working_memory = msg.get("working_memory", False)
+
+            if role == "user":
+                unit_name = "User"
+                memory_type = 'external'
+            elif role == "assistant":
+                unit_name = "ReasoningUnit"
+                memory_type = 'external'
+            else:
+                unit_name = role
+                memory_type = 'internal'
+
+            metadata = {
+                "unit_name": unit_name,
+                "role": "message",
+                "recalled": None,
+                "temporal_scope": "short_term"
+            }
+
+            if internal is not None:
+                memory_type = 'internal' if internal else 'external'
+
+            memory = memory_graph.add_memory(
+                timestamp=timestamp,
+                memory_type=memory_type,
+                content=content,
+                metadata=metadata
+            )
+
+            if recall:
+                memory["metadata"]['recalled'] = True
+
+            if recall or add_to_working_memory:
+                working_memory.extend_memories([memory])
 
     return True
 
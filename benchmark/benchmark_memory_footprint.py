@@ -0,0 +1,113 @@
+import os
+import sys
+import pickle
+import argparse
+import tracemalloc
+from time import perf_counter
+from tabulate import tabulate
+
+import networkx as nx
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from libre_agent.memory_store import MemoryStore
+from benchmark_memory_index import build_graph
+
+SIZES = [10_000, 100_000]
+
+def build_records(size):
+    # Chain consecutive memories like parent_memory_ids does in a conversation
+    nodes = list(build_graph(size).nodes(data=True))
+    edges = [(source[0], target[0]) for source, target in zip(nodes, nodes[1:])]
+    return nodes, edges
+
+def build_networkx(nodes, edges):
+    graph = nx.DiGraph()
+    for memory_id, data in nodes:
+        graph.add_node(memory_id, **{**data, 'metadata': dict(data['metadata'])})
+    for source_id, target_id in edges:
+        graph.add_edge(source_id, target_id, relation_type='memory_flow')
+    return graph
+
+def build_store(nodes, edges):
+    store = MemoryStore()
+    for memory_id, data in nodes:
+        store.add(memory_id, data)
+    for source_id, target_id in edges:
+        store.add_edge(source_id, target_id, 'memory_flow')
+    return store
+
+def measure_size(build):
+    tracemalloc.start()
+    start = tracemalloc.take_snapshot()
+    result = build()
+    allocated = tracemalloc.take_snapshot().compare_to(start, 'filename')
+    tracemalloc.stop()
+    return result, sum(stat.size_diff for stat in allocated)
+
+def time_call(func, repeats):
+    start = perf_counter()
+    for _ in range(repeats):
+        result = func()
+    return (perf_counter() - start) / repeats, result
+
+def scan_networkx(graph):
+    # Same work as get_memories(metadata={'role': 'message'}) without the index
+    return [
+        {'memory_id': node, **data, 'metadata': dict(data['metadata'])}
+        for node, data in graph.nodes(data=True)
+        if data['metadata'].get('role') == 'message'
+    ]
+
+def scan_store(store):
+    return [
+        store.memory_dict(memory.memory_id)
+        for memory in store.records()
+        if store.metadata_value(memory, 'role') == 'message'
+    ]
+
+def run(sizes, repeats):
+    rows = []
+
+    for size in sizes:
+        # Ids, contents and metadata values are shared by both representations,
+        # so build them first and only measure the structure around them
+        nodes, edges = build_records(size)
+
+        graph, graph_bytes = measure_size(lambda: build_networkx(nodes, edges))
+        store, store_bytes = measure_size(lambda: build_store(nodes, edges))
+
+        for name, structure, allocated, scan in (
+            ("networkx", graph, graph_bytes, scan_networkx),
+            ("MemoryStore", store, store_bytes, scan_store),
+        ):
+            dump_time, payload = time_call(lambda: pickle.dumps(structure), repeats)
+            load_time, _ = time_call(lambda: pickle.loads(payload), repeats)
+            scan_time, found = time_call(lambda: scan(structure), repeats)
+
+            rows.append([
+                size,
+                name,
+                f"{allocated / size:.0f}",
+                f"{allocated / 2**20:.1f}",
+                f"{len(payload) / 2**20:.1f}",
+                f"{dump_time * 1000:.1f}",
+                f"{load_time * 1000:.1f}",
+                f"{scan_time * 1000:.1f}",
+                len(found),
+            ])
+
+    print(tabulate(
+        rows,
+        headers=["Memories", "Structure", "Bytes/memory", "RAM (MiB)", "Pickle (MiB)",
+                 "Dump (ms)", "Load (ms)", "Scan (ms)", "Matches"],
+        tablefmt="grid",
+    ))
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Compare the footprint of networkx and MemoryStore memory graphs.")
+    parser.add_argument('--sizes', type=str, default=",".join(str(s) for s in SIZES), help='Comma separated graph sizes')
+    parser.add_argument('--repeats', type=int, default=3, help='Runs timed per operation')
+    args = parser.parse_args()
+
+    run([int(s) for s in args.sizes.split(',')], args.repeats)
@@ -0,0 +1,143 @@
+import os
+import sys
+import random
+import argparse
+from time import perf_counter
+from tabulate import tabulate
+
+import networkx as nx
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from libre_agent.memory_index import MemoryIndex, TimestampIndex
+
+SIZES = [200, 10_000, 100_000]
+
+# Filters issued by ReasoningUnit / RecallTool during a reasoning step
+FILTERS = [
+    ("personality", "internal", {'unit_name': 'ReasoningUnit', 'role': 'personality'}),
+    ("last user message", None, {'role': 'message', 'unit_name': 'User'}),
+    ("recalled", None, {'recalled': True}),
+    ("external", "external", None),
+]
+
+# Time ranges as (name, start, end) fractions of the graph's time span
+TIME_RANGES = [
+    ("newest 1%", 0.99, 1.0),
+    ("middle 10%", 0.45, 0.55),
+]
+
+def build_graph(size, seed=42):
+    rng = random.Random(seed)
+    graph = nx.DiGraph()
+
+    for i in range(size):
+        role = rng.choice(['message', 'message', 'reflection', 'episodic', 'semantic', 'procedural'])
+        unit_name = rng.choice(['User', 'ReasoningUnit']) if role == 'message' else 'ReasoningUnit'
+        graph.add_node(
+            f"mem-{i:08x}",
+            memory_type='external' if role == 'message' else 'internal',
+            content=f"memory {i}",
+            metadata={
+                'role': role,
+                'unit_name': unit_name,
+                'priority_level': rng.choice(['CORE', 'HIGH', 'MEDIUM', 'LOW', 'BACKGROUND']),
+                'temporal_scope': rng.choice(['short_term', 'long_term']),
+                'recalled': rng.random() < 0.01,
+            },
+            timestamp=1_700_000_000 + i,
+        )
+
+    # One stored personality, as loaded by ReasoningUnit.load_personality_traits
+    graph.add_node(
+        "mem-personal",
+        memory_type='internal',
+        content="Helpful, professional",
+        metadata={'role': 'personality', 'unit_name': 'ReasoningUnit', 'priority_level': 'CORE'},
+        timestamp=1_700_000_000,
+    )
+    return graph
+
+def linear_scan(graph, memory_type, metadata):
+    return [
+        node for node, data in graph.nodes(data=True)
+        if (memory_type is None or data.get('memory_type') == memory_type) and
+        (metadata is None or all(data.get('metadata', {}).get(k) == v for k, v in metadata.items()))
+    ]
+
+def range_scan(graph, since, until):
+    return sorted(node for node, data in graph.nodes(data=True) if since <= data['timestamp'] < until)
+
+def indexed_range(timeline, since, until):
+    return sorted(timeline.range(since, until))
+
+def indexed_lookup(index, memory_type, metadata):
+    return sorted(index.lookup(memory_type, metadata), key=index.position)
+
+def time_call(func, repeats):
+    start = perf_counter()
+    for _ in range(repeats):
+        result = func()
+    return (perf_counter() - start) / repeats, result
+
+def run(sizes, repeats):
+    rows = []
+
+    for size in sizes:
+        graph = build_graph(size)
+
+        start = perf_counter()
+        index = MemoryIndex.from_graph(graph)
+        build_time = perf_counter() - start
+
+        start = perf_counter()
+        timeline = TimestampIndex.from_graph(graph)
+        timeline_build_time = perf_counter() - start
+
+        for name, memory_type, metadata in FILTERS:
+            scan_time, expected = time_call(lambda: linear_scan(graph, memory_type, metadata), repeats)
+            index_time, found = time_call(lambda: indexed_lookup(index, memory_type, metadata), repeats)
+
+            assert found == expected, f"index mismatch for filter '{name}'"
+
+            rows.append([
+                size,
+                name,
+                len(found),
+                f"{scan_time * 1000:.3f}",
+                f"{index_time * 1000:.3f}",
+                f"{scan_time / index_time:.1f}x" if index_time > 0 else "-",
+                f"{build_time * 1000:.1f}",
+            ])
+
+        for name, start_fraction, end_fraction in TIME_RANGES:
+            since = 1_700_000_000 + size * start_fraction
+            until = 1_700_000_000 + size * end_fraction
+            scan_time, expected = time_call(lambda: range_scan(graph, since, until), repeats)
+            index_time, found = time_call(lambda: indexed_range(timeline, since, until), repeats)
+
+            assert found == expected, f"timestamp index mismatch for range '{name}'"
+
+            rows.append([
+                size,
+                f"time: {name}",
+                len(found),
+                f"{scan_time * 1000:.3f}",
+                f"{index_time * 1000:.3f}",
+                f"{scan_time / index_time:.1f}x" if index_time > 0 else "-",
+                f"{timeline_build_time * 1000:.1f}",
+            ])
+
+    print(tabulate(
+        rows,
+        headers=["Memories", "Filter", "Matches", "Scan (ms)", "Index (ms)", "Speedup", "Index build (ms)"],
+        tablefmt="grid",
+    ))
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Compare the metadata and timestamp indexes against a linear get_memories scan.")
+    parser.add_argument('--sizes', type=str, default=",".join(str(s) for s in SIZES), help='Comma separated graph sizes')
+    parser.add_argument('--repeats', type=int, default=5, help='Lookups timed per filter')
+    args = parser.parse_args()
+
+    run([int(s) for s in args.sizes.split(',')], args.repeats)
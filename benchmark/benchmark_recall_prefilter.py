@@ -0,0 +1,84 @@
+import os
+import sys
+import random
+import argparse
+import tempfile
+from time import perf_counter
+from tabulate import tabulate
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from libre_agent.memory_graph import MemoryGraph
+from libre_agent.memory_eviction import EvictionPolicy
+from libre_agent.recall_prefilter import RecallPrefilter
+from libre_agent.recall_recognizer import RecallRecognizer
+from benchmark_memory_index import build_graph
+from memory_corpus import QUERIES, random_content
+
+SIZES = [200, 10_000, 100_000]
+
+def populate(memory_graph, size, seed=42):
+    rng = random.Random(seed)
+    memories = []
+    for node, data in build_graph(size).nodes(data=True):
+        memories.append({
+            'memory_type': data['memory_type'],
+            'content': random_content(rng),
+            'metadata': dict(data['metadata']),
+            'timestamp': data['timestamp'],
+        })
+    memory_graph.add_memories(memories)
+
+def time_call(func, repeats):
+    start = perf_counter()
+    for _ in range(repeats):
+        result = func()
+    return (perf_counter() - start) / repeats, result
+
+def run(sizes, repeats, backend, candidates):
+    rows = []
+    prefilter = RecallPrefilter(candidates=candidates)
+    recognizer = RecallRecognizer(memories=[{'memory_id': 'mem-00000000', 'memory_type': 'internal', 'content': '', 'metadata': {}, 'timestamp': 0}])
+
+    MemoryGraph.set_storage_backend(backend)
+    for size in sizes:
+        MemoryGraph.set_eviction_policy(EvictionPolicy(capacity=size + 1))
+        with tempfile.TemporaryDirectory() as directory:
+            graph_file = os.path.join(directory, f"recall.{'db' if backend == 'sqlite' else 'pkl'}")
+            memory_graph = MemoryGraph.for_file(graph_file)
+            populate(memory_graph, size)
+
+            for query in QUERIES:
+                # Warm the graph and search caches like a running agent would
+                prefilter.select(query, memory_graph=memory_graph)
+
+                full_time, memories = time_call(lambda: memory_graph.get_memories(last=1000), repeats)
+                select_time, scored = time_call(lambda: prefilter.select(query, memory_graph=memory_graph), repeats)
+                shortlist = [candidate['memory'] for candidate in scored]
+
+                rows.append([
+                    size,
+                    query,
+                    f"{full_time * 1000:.2f}",
+                    len(recognizer.construct_prompt(query, memories)),
+                    f"{select_time * 1000:.2f}",
+                    len(recognizer.construct_prompt(query, shortlist)),
+                    "yes" if prefilter.decisive(scored) else "no",
+                ])
+
+    print(tabulate(
+        rows,
+        headers=["Memories", "Query", "Load last 1000 (ms)", "Prompt (chars)",
+                 "Prefilter (ms)", "Prefiltered prompt (chars)", "LLM skipped"],
+        tablefmt="grid",
+    ))
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Compare recall prompt size and latency with and without the local prefilter.")
+    parser.add_argument('--sizes', type=str, default=",".join(str(s) for s in SIZES), help='Comma separated graph sizes')
+    parser.add_argument('--repeats', type=int, default=5, help='Runs timed per query')
+    parser.add_argument('--storage-backend', type=str, default='pickle', choices=['pickle', 'sqlite'])
+    parser.add_argument('--candidates', type=int, default=30, help='Candidates passed to the LLM reranker')
+    args = parser.parse_args()
+
+    run([int(s) for s in args.sizes.split(',')], args.repeats, args.storage_backend, args.candidates)
@@ -0,0 +1,78 @@
+import os
+import sys
+import random
+import argparse
+import tempfile
+from time import perf_counter
+from tabulate import tabulate
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from libre_agent.vector_index import VectorIndex, HashingEmbedder
+from memory_corpus import QUERIES, random_content
+
+SIZES = [200, 10_000, 100_000]
+
+def build_memories(size, seed=42):
+    rng = random.Random(seed)
+    memories = []
+    for i in range(size):
+        memories.append({'memory_id': f"mem-{i:08x}", 'content': random_content(rng), 'metadata': {}})
+    return memories
+
+def time_call(func, repeats):
+    start = perf_counter()
+    for _ in range(repeats):
+        result = func()
+    return (perf_counter() - start) / repeats, result
+
+def run(sizes, repeats, dim, k, batch):
+    rows = []
+
+    for size in sizes:
+        memories = build_memories(size)
+
+        with tempfile.TemporaryDirectory() as directory:
+            index = VectorIndex(os.path.join(directory, "graph.pkl"), embedder=HashingEmbedder(dim))
+
+            start = perf_counter()
+            for chunk in range(0, size, 1000):
+                index.add(memories[chunk:chunk + 1000])
+            build_time = perf_counter() - start
+
+            append_time, _ = time_call(lambda: index.add([memories[0]]), repeats)
+            query_time, _ = time_call(lambda: index.search(QUERIES[0], k=k), repeats)
+            queries = [QUERIES[i % len(QUERIES)] for i in range(batch)]
+            batch_time, _ = time_call(lambda: index.search_batch(queries, k=k), repeats)
+
+            start = perf_counter()
+            index.compact()
+            VectorIndex(index.vector_file.with_name("graph.pkl"), embedder=HashingEmbedder(dim))
+            reload_time = perf_counter() - start
+
+        rows.append([
+            size,
+            f"{build_time * 1000:.0f}",
+            f"{append_time * 1000:.2f}",
+            f"{query_time * 1000:.2f}",
+            f"{batch_time * 1000 / batch:.2f}",
+            f"{reload_time * 1000:.0f}",
+        ])
+
+    print(tabulate(
+        rows,
+        headers=["Memories", "Build (ms)", "Append one (ms)", f"Top-{k} (ms)",
+                 f"Top-{k} batched x{batch} (ms/query)", "Save + load (ms)"],
+        tablefmt="grid",
+    ))
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Measure the local vector index used for semantic recall.")
+    parser.add_argument('--sizes', type=str, default=",".join(str(s) for s in SIZES), help='Comma separated index sizes')
+    parser.add_argument('--repeats', type=int, default=20, help='Runs timed per operation')
+    parser.add_argument('--dim', type=int, default=256, help='Hashing embedder dimensions')
+    parser.add_argument('--k', type=int, default=10, help='Results per query')
+    parser.add_argument('--batch', type=int, default=16, help='Queries per batched search')
+    args = parser.parse_args()
+
+    run([int(s) for s in args.sizes.split(',')], args.repeats, args.dim, args.k, args.batch)
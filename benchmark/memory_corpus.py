@@ -0,0 +1,41 @@
+import random
+import shutil
+import tempfile
+from pathlib import Path
+
+# Topic words a recall query can look for
+WORDS = (
+    "breakfast coffee meeting project deadline travel paris doctor appointment birthday "
+    "gift sister brother garden weather rain concert movie book recipe pasta budget "
+    "invoice running marathon training piano lesson dentist flight hotel museum"
+).split()
+
+QUERIES = ["what did I eat for breakfast", "when is the dentist appointment", "recipe for pasta"]
+
+# Filler vocabulary with Zipf-distributed word frequencies, like natural text
+FILLER = [f"w{rank}" for rank in range(1, 5001)]
+FILLER_WEIGHTS = [1 / rank for rank in range(1, 5001)]
+
+def random_content(rng: random.Random) -> str:
+    """One or two topic words mixed into 4-12 filler words."""
+    words = rng.sample(WORDS, rng.randint(1, 2)) + rng.choices(FILLER, FILLER_WEIGHTS, k=rng.randint(4, 12))
+    rng.shuffle(words)
+    return " ".join(words)
+
+def make_memory(memory_id, content=None, timestamp=0, memory_type='internal', **metadata):
+    """A stored memory dict; the content defaults to the id."""
+    return {
+        'memory_id': memory_id,
+        'memory_type': memory_type,
+        'content': memory_id if content is None else content,
+        'metadata': metadata,
+        'timestamp': timestamp,
+    }
+
+class TempGraphMixin:
+    """Gives each test a fresh directory with a graph file path in it, removed afterwards."""
+    def setUp(self):
+        super().setUp()
+        self.directory = Path(tempfile.mkdtemp())
+        self.addCleanup(shutil.rmtree, self.directory)
+        self.graph_file = self.directory / "graph.pickle"
@@ -0,0 +1,145 @@
+import unittest
+from unittest import mock
+
+from libre_agent.forget_recognizer import ForgetRecognizer
+from libre_agent.memory_access import AccessTracker
+from libre_agent.memory_graph import MemoryGraph
+from benchmark.memory_corpus import TempGraphMixin, make_memory
+
+NOW = 1_000_000_000
+DAY = 24 * 3600
+
+def aged(memory_id, days, content=None, **metadata):
+    metadata.setdefault('role', 'semantic')
+    return make_memory(memory_id, content, NOW - days * DAY, **metadata)
+
+class TestForgetPlan(unittest.TestCase):
+    def setUp(self):
+        self.recognizer = ForgetRecognizer(memory_graph=mock.Mock())
+
+    def score(self, memory):
+        return self.recognizer.score(memory, NOW)
+
+    def plan(self, *memories):
+        return {memory['memory_id']: action for action, memory, _ in self.recognizer.plan(list(memories), NOW)}
+
+    def test_score_weighs_recency_priority_scope_and_recalls(self):
+        # Fresh LOW memory: full recency, a quarter of the priority range, no recalls
+        self.assertAlmostEqual(self.score(aged('a', 0, priority_level='LOW')), 0.5 + 0.35 * 0.25)
+        # One half-life later the recency part has halved
+        self.assertAlmostEqual(self.score(aged('a', 1, priority_level='LOW')), 0.25 + 0.35 * 0.25)
+
+        self.assertGreater(self.score(aged('a', 3)), self.score(aged('b', 5)))
+        self.assertGreater(self.score(aged('a', 5, priority_level='HIGH')), self.score(aged('b', 5, priority_level='LOW')))
+        self.assertGreater(self.score(aged('a', 5, temporal_scope='long_term')), self.score(aged('b', 5, temporal_scope='working_memory')))
+        self.assertGreater(self.score(aged('a', 5, recall_count=5)), self.score(aged('b', 5, recall_count=1)))
+        # Recent recalls count as use even for an old memory
+        self.assertGreater(self.score(aged('a', 30, last_recalled=NOW)), self.score(aged('b', 1)))
+
+    def test_protected_memories_are_never_planned(self):
+        decisions = self.plan(
+            aged('core', 100, priority_level='CORE'),
+            aged('personality', 100, role='personality'),
+            make_memory('recent', timestamp=NOW - 60, priority_level='BACKGROUND'),
+            aged('old', 100, priority_level='BACKGROUND'),
+        )
+        self.assertEqual(decisions, {'old': 'delete'})
+
+    def test_bands(self):
+        decisions = self.plan(
+            aged('deleted', 30, priority_level='BACKGROUND'),
+            aged('downgraded', 30, priority_level='MEDIUM'),
+            aged('consolidated', 30, priority_level='MEDIUM', role='episodic'),
+            aged('already_flagged', 30, priority_level='MEDIUM', role='episodic', consolidate=True),
+            aged('kept', 30, priority_level='HIGH'),
+            # In the downgrade band, but there is no lower level left
+            aged('lowest', 30, priority_level='BACKGROUND', recall_count=10),
+        )
+        self.assertEqual(decisions, {'deleted': 'delete', 'downgraded': 'downgrade', 'consolidated': 'consolidate'})
+
+    def test_downgrades_wait_for_the_cooldown(self):
+        decisions = self.plan(
+            aged('recently', 30, priority_level='MEDIUM', downgraded_at=NOW - 3600),
+            aged('long_ago', 30, priority_level='MEDIUM', downgraded_at=NOW - 2 * DAY),
+        )
+        self.assertEqual(decisions, {'long_ago': 'downgrade'})
+
+    def test_decisions_come_lowest_score_first(self):
+        decisions = self.recognizer.plan([aged('medium', 30, priority_level='MEDIUM'), aged('background', 30, priority_level='BACKGROUND')], NOW)
+        self.assertEqual([memory['memory_id'] for _, memory, _ in decisions], ['background', 'medium'])
+
+    def test_duplicates_keep_the_best_scoring_copy(self):
+        decisions = self.plan(
+            aged('weaker', 30, "Lunch at noon.", priority_level='MEDIUM'),
+            aged('stronger', 30, "lunch at  NOON", priority_level='HIGH'),
+            aged('other_type', 30, "lunch at noon", memory_type='external', priority_level='HIGH'),
+        )
+        self.assertEqual(decisions, {'weaker': 'delete'})
+
+    def test_duplicate_ties_keep_the_newer_copy(self):
+        older = aged('older', 30, "lunch at noon", priority_level='HIGH')
+        newer = aged('newer', 30, "lunch at noon", priority_level='HIGH')
+        newer['timestamp'] += 1
+        # Equal scores need equal last use; pin it with last_updated
+        for memory in (older, newer):
+            memory['metadata']['last_updated'] = NOW - 30 * DAY + 1
+        self.assertEqual(self.plan(older, newer), {'older': 'delete'})
+
+class TestForget(TempGraphMixin, unittest.TestCase):
+    def setUp(self):
+        super().setUp()
+        self.memory_graph = MemoryGraph.for_file(self.graph_file)
+        self.ids = {}
+        for memory_id, priority_level, role in (
+            ('deleted', 'BACKGROUND', 'semantic'),
+            ('downgraded', 'MEDIUM', 'semantic'),
+            ('consolidated', 'MEDIUM', 'episodic'),
+            ('kept', 'HIGH', 'semantic'),
+        ):
+            memory = self.memory_graph.add_memory('internal', memory_id, {'priority_level': priority_level, 'role': role}, timestamp=NOW - 30 * DAY)
+            self.ids[memory_id] = memory['memory_id']
+
+    def tearDown(self):
+        AccessTracker.for_graph(self.memory_graph).flush()
+
+    def stored(self):
+        return {memory['content']: memory for memory in self.memory_graph.get_all_memories()}
+
+    def test_forget_applies_the_plan(self):
+        counts = ForgetRecognizer(self.memory_graph).forget(now=NOW)
+        self.assertEqual(counts, {'delete': 1, 'downgrade': 1, 'consolidate': 1})
+
+        stored = self.stored()
+        self.assertEqual(sorted(stored), ['consolidated', 'downgraded', 'kept'])
+        self.assertEqual(stored['downgraded']['metadata']['priority_level'], 'LOW')
+        self.assertEqual(stored['downgraded']['metadata']['downgraded_at'], NOW)
+        self.assertTrue(stored['consolidated']['metadata']['consolidate'])
+        self.assertNotIn('consolidate', stored['kept']['metadata'])
+
+    def test_dry_run_writes_nothing(self):
+        MemoryGraph.get_storage(self.graph_file).set_archive(True)
+        before = self.memory_graph.get_all_memories()
+
+        counts = ForgetRecognizer(self.memory_graph, dry_run=True).forget(now=NOW)
+        self.assertEqual(counts, {'delete': 1, 'downgrade': 1, 'consolidate': 1})
+        self.assertEqual(self.memory_graph.get_all_memories(), before)
+        self.assertEqual(self.memory_graph.get_archive_stats()['archived_memories'], 0)
+
+    def test_a_failed_round_rolls_back_every_change(self):
+        MemoryGraph.get_storage(self.graph_file).set_archive(True)
+        before = self.memory_graph.get_all_memories()
+
+        with mock.patch.object(self.memory_graph, 'update_memories', side_effect=ValueError("Memory with ID 'x' not found")):
+            self.assertIsNone(ForgetRecognizer(self.memory_graph).forget(now=NOW))
+
+        # The removal inside the transaction was undone, and the archive only holds a copy
+        self.assertEqual(self.memory_graph.get_all_memories(), before)
+        self.assertEqual([memory['content'] for memory in self.memory_graph.get_archived_memories([self.ids['deleted']])], ['deleted'])
+
+        # The next round starts over and completes
+        self.assertEqual(ForgetRecognizer(self.memory_graph).forget(now=NOW)['delete'], 1)
+        self.assertNotIn('deleted', self.stored())
+        self.assertEqual(self.memory_graph.get_archive_stats()['archived_memories'], 1)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,168 @@
+import subprocess
+import sys
+import threading
+import time
+import unittest
+from pathlib import Path
+
+from libre_agent.graph_lock import FileLock, GraphLock
+from libre_agent.memory_access import AccessTracker
+from libre_agent.memory_graph import MemoryGraph, memory_graph_file_ctx
+from benchmark.memory_corpus import TempGraphMixin
+
+REPO_ROOT = Path(__file__).resolve().parent.parent
+
+def run_threads(target, count):
+    threads = [threading.Thread(target=target) for _ in range(count)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+class TestGraphLock(unittest.TestCase):
+    def setUp(self):
+        self.lock = GraphLock()
+
+    def in_thread(self, target, timeout=1.0):
+        """Run `target` in another thread and return whether it finished within `timeout` seconds."""
+        thread = threading.Thread(target=target, daemon=True)
+        thread.start()
+        thread.join(timeout)
+        return not thread.is_alive()
+
+    def read_once(self):
+        with self.lock.read():
+            pass
+
+    def write_once(self):
+        with self.lock.write():
+            pass
+
+    def test_writers_run_alone(self):
+        counter = [0]
+
+        def increment():
+            for _ in range(200):
+                with self.lock.write():
+                    value = counter[0]
+                    time.sleep(0)
+                    counter[0] = value + 1
+
+        run_threads(increment, 8)
+        self.assertEqual(counter[0], 1600)
+
+    def test_readers_share_the_lock(self):
+        inside = threading.Barrier(2, timeout=1.0)
+
+        def read():
+            with self.lock.read():
+                inside.wait()
+
+        # Both readers have to be inside at once to pass the barrier
+        thread = threading.Thread(target=read)
+        thread.start()
+        read()
+        thread.join()
+
+    def test_reads_nest_in_writes(self):
+        with self.lock.write():
+            with self.lock.read():
+                with self.lock:
+                    pass
+        # Nothing is left held: another thread can write
+        self.assertTrue(self.in_thread(self.write_once))
+
+    def test_readers_reenter_while_a_writer_waits(self):
+        self.lock.acquire_read()
+        writer_done = threading.Event()
+
+        def write():
+            with self.lock.write():
+                writer_done.set()
+
+        writer = threading.Thread(target=write, daemon=True)
+        writer.start()
+        while not self.lock._waiting_writers:
+            time.sleep(0.001)
+
+        # New readers queue behind the writer, but a reader already inside gets back in
+        with self.lock.read():
+            self.assertFalse(writer_done.is_set())
+        self.assertFalse(self.in_thread(self.read_once, timeout=0.1))
+
+        self.lock.release_read()
+        writer.join(1.0)
+        self.assertTrue(writer_done.is_set())
+
+    def test_read_locks_cannot_be_upgraded(self):
+        with self.lock.read():
+            with self.assertRaises(RuntimeError):
+                self.lock.acquire_write()
+        # The failed upgrade left nothing behind
+        self.assertTrue(self.in_thread(self.write_once))
+
+class TestSharedHandles(TempGraphMixin, unittest.TestCase):
+    def setUp(self):
+        super().setUp()
+        self.memory_graph = MemoryGraph.for_file(self.graph_file)
+
+    def tearDown(self):
+        AccessTracker.for_graph(self.memory_graph).flush()
+
+    def test_equivalent_paths_share_one_handle(self):
+        self.assertIs(MemoryGraph.for_file(str(self.graph_file)), self.memory_graph)
+        self.assertIs(MemoryGraph.for_file(self.directory / "sub" / ".." / "graph.pickle"), self.memory_graph)
+        self.assertIsNot(MemoryGraph.for_file(self.directory / "other.pickle"), self.memory_graph)
+
+        # Context bound handles on the same file share its storage and lock
+        token = memory_graph_file_ctx.set(str(self.graph_file))
+        self.addCleanup(memory_graph_file_ctx.reset, token)
+        self.assertIs(MemoryGraph()._storage(), self.memory_graph._storage())
+
+    def test_concurrent_writers_lose_no_update(self):
+        counter = self.memory_graph.add_memory('internal', "counter", {'count': 0})
+
+        def work():
+            for _ in range(20):
+                self.memory_graph.add_memory('internal', "note")
+                with self.memory_graph.transaction():
+                    [current] = self.memory_graph.get_memories_by_id([counter['memory_id']])
+                    self.memory_graph.update_memory(counter['memory_id'], {'count': current['metadata']['count'] + 1})
+
+        run_threads(work, 6)
+        [current] = self.memory_graph.get_memories_by_id([counter['memory_id']])
+        self.assertEqual(current['metadata']['count'], 120)
+        self.assertEqual(len(self.memory_graph.get_memory_ids()), 121)
+
+CHILD = """
+import sys, time
+from libre_agent.graph_lock import FileLock
+lock = FileLock(sys.argv[1])
+lock.acquire(exclusive=True)
+print("locked", flush=True)
+time.sleep(0.3)
+open(sys.argv[2], "w").write("done")
+lock.release()
+"""
+
+@unittest.skipUnless(FileLock.available(), "flock is not available")
+class TestFileLock(TempGraphMixin, unittest.TestCase):
+    def test_holders_in_other_processes_are_serialized(self):
+        lock_file = self.directory / "graph.pickle.lock"
+        marker = self.directory / "child.done"
+        child = subprocess.Popen(
+            [sys.executable, "-c", CHILD, str(lock_file), str(marker)], cwd=REPO_ROOT, stdout=subprocess.PIPE, text=True
+        )
+        self.addCleanup(child.wait)
+        self.addCleanup(child.stdout.close)
+        self.assertEqual(child.stdout.readline().strip(), "locked")
+
+        lock = FileLock(lock_file)
+        self.addCleanup(lock.close)
+        lock.acquire(exclusive=True)
+        # Only granted once the child wrote its marker and let go
+        self.assertTrue(marker.exists())
+        lock.release()
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,364 @@
+import pickle
+import unittest
+
+from libre_agent.graph_storage import PickleStorage, SQLiteStorage, migrate_pickle_to_sqlite
+from libre_agent.memory_eviction import EvictionPolicy
+from benchmark.memory_corpus import TempGraphMixin, make_memory
+
+BACKENDS = (PickleStorage, SQLiteStorage)
+
+class StorageTestCase(TempGraphMixin, unittest.TestCase):
+    def setUp(self):
+        super().setUp()
+        self.storages = []
+
+    def tearDown(self):
+        for storage in self.storages:
+            storage.close()
+
+    def open(self, backend, name=None, **kwargs):
+        graph_file = self.directory / (name or f"graph.{backend.name}")
+        storage = backend(graph_file, **kwargs)
+        self.storages.append(storage)
+        return storage
+
+    def contents(self, memories):
+        return [memory['content'] for memory in memories]
+
+    def populate(self, storage):
+        storage.add_memory(make_memory('a', 'apple pie', 3, role='episodic', mood='happy'), [])
+        storage.add_memory(make_memory('b', 'banana bread', 1, memory_type='external', role='message'), ['a'])
+        storage.add_memory(make_memory('c', 'cherry tart', 2, role='episodic', mood='sad'), ['a'])
+
+class TestStorageBackends(StorageTestCase):
+    def test_queries_match_across_backends(self):
+        results = {}
+        for backend in BACKENDS:
+            storage = self.open(backend)
+            self.populate(storage)
+            results[backend.name] = (
+                self.contents(storage.get_memories()),
+                self.contents(storage.get_memories(sort='content', reverse=True)),
+                self.contents(storage.get_memories(first=2)),
+                self.contents(storage.get_memories(last=2)),
+                self.contents(storage.get_memories(memory_type='internal', metadata={'role': 'episodic'})),
+                self.contents(storage.get_memories(metadata={'mood': None})),
+                self.contents(storage.get_memories(metadata={'mood': 'sad'})),
+                self.contents(storage.get_memories(since=2, until=3)),
+                self.contents(storage.get_memories_by_id(['c', 'missing', 'a'])),
+                sorted(storage.get_memory_ids()),
+                {key: sorted(value) for key, value in storage.get_neighbors(['a']).items()},
+                storage.get_stats()['total_memories'],
+            )
+
+        self.assertEqual(results['pickle'], results['sqlite'])
+        self.assertEqual(results['pickle'][0], ['banana bread', 'cherry tart', 'apple pie'])
+        self.assertEqual(results['pickle'][5], ['banana bread'])
+
+    def test_update_and_remove(self):
+        for backend in BACKENDS:
+            with self.subTest(backend=backend.name):
+                storage = self.open(backend)
+                self.populate(storage)
+
+                self.assertTrue(storage.update_memory('a', {'mood': 'calm'}, {'content': 'apple crumble'}))
+                self.assertFalse(storage.update_memory('missing', {'mood': 'calm'}, {}))
+                [memory] = storage.get_memories_by_id(['a'])
+                self.assertEqual(memory['content'], 'apple crumble')
+                self.assertEqual(memory['metadata'], {'role': 'episodic', 'mood': 'calm'})
+
+                self.assertTrue(storage.remove_memory('a'))
+                self.assertFalse(storage.remove_memory('a'))
+                self.assertEqual(sorted(storage.get_memory_ids()), ['b', 'c'])
+                self.assertEqual(storage.get_stats()['total_connections'], 0)
+
+    def test_memories_persist_across_reopen(self):
+        for backend in BACKENDS:
+            with self.subTest(backend=backend.name):
+                storage = self.open(backend)
+                self.populate(storage)
+                storage.update_memory('b', {'recalled': True}, {})
+                storage.close()
+
+                reopened = self.open(backend)
+                self.assertEqual(self.contents(reopened.get_memories()), ['banana bread', 'cherry tart', 'apple pie'])
+                self.assertEqual(self.contents(reopened.get_memories(metadata={'recalled': True})), ['banana bread'])
+
+    def test_rejects_unknown_sort_fields(self):
+        for backend in BACKENDS:
+            with self.subTest(backend=backend.name):
+                storage = self.open(backend)
+                self.populate(storage)
+                with self.assertRaises(ValueError):
+                    storage.get_memories(sort='content; DROP TABLE memories')
+
+    def test_sqlite_rejects_metadata_keys_outside_json_paths(self):
+        storage = self.open(SQLiteStorage)
+        self.populate(storage)
+
+        for key in ('a"b', "mood') OR 1=1 --", 'a.b'):
+            with self.subTest(key=key):
+                with self.assertRaises(ValueError):
+                    storage.get_memories(metadata={key: 'x'})
+                with self.assertRaises(ValueError):
+                    storage.search('pie', metadata={key: 'x'})
+
+        self.assertEqual(len(storage.get_memory_ids()), 3)
+
+    def test_search_filters_on_unindexed_metadata(self):
+        for backend in BACKENDS:
+            with self.subTest(backend=backend.name):
+                storage = self.open(backend)
+                self.populate(storage)
+                self.assertEqual([memory_id for memory_id, _ in storage.search('tart', metadata={'mood': 'sad'})], ['c'])
+                self.assertEqual(storage.search('tart', metadata={'mood': 'happy'}), [])
+
+    def test_migrate_pickle_to_sqlite(self):
+        pickle_storage = self.open(PickleStorage)
+        self.populate(pickle_storage)
+        pickle_storage.close()
+
+        migrate_pickle_to_sqlite(self.directory / "graph.pickle", self.directory / "migrated.db")
+        migrated = self.open(SQLiteStorage, "migrated.db")
+        self.assertEqual(self.contents(migrated.get_memories()), ['banana bread', 'cherry tart', 'apple pie'])
+        self.assertEqual(sorted(migrated.get_neighbors(['a'])['a']), ['b', 'c'])
+
+class TestPickleJournal(StorageTestCase):
+    def test_mutations_append_to_the_journal(self):
+        storage = self.open(PickleStorage)
+        self.populate(storage)
+        storage.update_memory('a', {'mood': 'calm'}, {})
+        storage.remove_memory('c')
+
+        self.assertFalse(storage.graph_file.exists())
+        with open(storage.journal_file, "rb") as f:
+            ops = []
+            while True:
+                try:
+                    ops.append(pickle.load(f)[0])
+                except EOFError:
+                    break
+        # Memories added with parents are journaled together with their edges
+        self.assertEqual(ops, ['add', 'batch', 'batch', 'update', 'remove'])
+
+        reopened = self.open(PickleStorage)
+        self.assertEqual(self.contents(reopened.get_memories()), ['banana bread', 'apple pie'])
+        self.assertEqual(reopened.get_memories_by_id(['a'])[0]['metadata']['mood'], 'calm')
+
+    def test_corrupt_tail_is_truncated(self):
+        storage = self.open(PickleStorage)
+        self.populate(storage)
+        intact_size = storage.journal_file.stat().st_size
+        with open(storage.journal_file, "ab") as f:
+            f.write(pickle.dumps(('add', 'd', {}))[:-3])
+
+        reopened = self.open(PickleStorage)
+        self.assertEqual(sorted(reopened.get_memory_ids()), ['a', 'b', 'c'])
+        self.assertEqual(reopened.journal_file.stat().st_size, intact_size)
+
+        # Appends after the truncation stay readable
+        reopened.add_memory(make_memory('d', 'date loaf', 4), [])
+        self.assertEqual(sorted(self.open(PickleStorage).get_memory_ids()), ['a', 'b', 'c', 'd'])
+
+    def test_torn_batch_is_dropped_as_a_whole(self):
+        storage = self.open(PickleStorage)
+        storage.add_memory(make_memory('a', 'apple pie', 1), [])
+        intact_size = storage.journal_file.stat().st_size
+        storage.add_memory(make_memory('b', 'banana bread', 2), ['a'])
+        with open(storage.journal_file, "r+b") as f:
+            f.truncate(storage.journal_file.stat().st_size - 5)
+
+        reopened = self.open(PickleStorage)
+        self.assertEqual(reopened.get_memory_ids(), ['a'])
+        self.assertEqual(reopened.get_neighbors(['a']), {'a': []})
+        self.assertEqual(reopened.journal_file.stat().st_size, intact_size)
+
+    def test_compaction_folds_the_journal_into_a_snapshot(self):
+        storage = self.open(PickleStorage)
+        storage.compaction_threshold = 1
+        self.populate(storage)
+
+        self.assertTrue(storage.graph_file.exists())
+        self.assertFalse(storage.journal_file.exists())
+
+        storage.update_memory('b', {'mood': 'calm'}, {})
+        self.assertFalse(storage.journal_file.exists())
+
+        reopened = self.open(PickleStorage)
+        self.assertEqual(self.contents(reopened.get_memories()), ['banana bread', 'cherry tart', 'apple pie'])
+        self.assertEqual(reopened.get_memories_by_id(['b'])[0]['metadata']['mood'], 'calm')
+
+    def test_replaying_a_compacted_journal_is_harmless(self):
+        storage = self.open(PickleStorage)
+        self.populate(storage)
+        storage.remove_memory('c')
+        journal = storage.journal_file.read_bytes()
+
+        # A crash between the snapshot swap and the journal reset leaves both behind
+        storage.compact()
+        storage.journal_file.write_bytes(journal)
+
+        reopened = self.open(PickleStorage)
+        self.assertEqual(self.contents(reopened.get_memories()), ['banana bread', 'apple pie'])
+        self.assertEqual(reopened.get_stats()['total_connections'], 1)
+
+class TestResidentMode(StorageTestCase):
+    def test_writes_are_buffered_until_flush(self):
+        storage = self.open(PickleStorage, resident=True)
+        self.populate(storage)
+
+        self.assertEqual(storage.pending_writes, 3)
+        self.assertFalse(storage.journal_file.exists())
+        self.assertEqual(sorted(storage.get_memory_ids()), ['a', 'b', 'c'])
+
+        storage.flush()
+        self.assertEqual(storage.pending_writes, 0)
+        self.assertEqual(sorted(self.open(PickleStorage).get_memory_ids()), ['a', 'b', 'c'])
+
+    def test_rollback_keeps_buffered_writes(self):
+        storage = self.open(PickleStorage, resident=True)
+        self.populate(storage)
+
+        with self.assertRaises(RuntimeError):
+            with storage.transaction():
+                storage.remove_memory('a')
+                raise RuntimeError("abort")
+
+        self.assertEqual(sorted(storage.get_memory_ids()), ['a', 'b', 'c'])
+        storage.flush()
+        self.assertEqual(sorted(self.open(PickleStorage).get_memory_ids()), ['a', 'b', 'c'])
+
+class TestReadCache(StorageTestCase):
+    def test_hits_and_misses_are_counted(self):
+        for backend in BACKENDS:
+            with self.subTest(backend=backend.name):
+                storage = self.open(backend)
+                storage.add_memory(make_memory('a'), [])
+                storage.load_graph()
+                before = storage.cache_stats()
+
+                storage.load_graph()
+                stats = storage.cache_stats()
+                self.assertEqual((stats['hits'], stats['misses']), (before['hits'] + 1, before['misses']))
+
+                # A write through another handle on the file invalidates the cached graph
+                self.open(backend, name=f"graph.{backend.name}").add_memory(make_memory('b'), [])
+                self.assertEqual(sorted(storage.load_graph().nodes), ['a', 'b'])
+                stats = storage.cache_stats()
+                self.assertEqual((stats['hits'], stats['misses']), (before['hits'] + 1, before['misses'] + 1))
+                self.assertEqual(stats['hit_rate'], stats['hits'] / (stats['hits'] + stats['misses']))
+
+class TestEviction(StorageTestCase):
+    def test_lowest_scores_are_evicted_first(self):
+        for backend in BACKENDS:
+            with self.subTest(backend=backend.name):
+                evicted = []
+                policy = EvictionPolicy(capacity=2)
+                policy.register_hook(evicted.append)
+                storage = self.open(backend, eviction_policy=policy)
+
+                storage.add_memory(make_memory('core', 'core', 1, priority_level='CORE'), [])
+                storage.add_memory(make_memory('low', 'low', 2, priority_level='LOW'), [])
+                self.assertEqual(evicted, [])
+
+                storage.add_memory(make_memory('high', 'high', 3, priority_level='HIGH'), [])
+                self.assertEqual([[memory['memory_id'] for memory in batch] for batch in evicted], [['low']])
+                self.assertEqual(sorted(storage.get_memory_ids()), ['core', 'high'])
+
+                # A recall boost lifts a memory above higher priorities
+                storage.update_memory('high', {'recalled': True, 'recall_count': 5}, {})
+                storage.add_memory(make_memory('newer', 'newer', 4, priority_level='CORE'), [])
+                self.assertEqual(evicted[-1][0]['memory_id'], 'core')
+                self.assertEqual(sorted(storage.get_memory_ids()), ['high', 'newer'])
+
+    def test_evictions_are_persisted(self):
+        for backend in BACKENDS:
+            with self.subTest(backend=backend.name):
+                storage = self.open(backend, eviction_policy=EvictionPolicy(capacity=2))
+                self.populate(storage)
+                remaining = sorted(storage.get_memory_ids())
+                storage.close()
+
+                self.assertEqual(len(remaining), 2)
+                self.assertEqual(sorted(self.open(backend).get_memory_ids()), remaining)
+
+    def test_failing_hooks_do_not_block_eviction(self):
+        evicted = []
+        policy = EvictionPolicy(capacity=1)
+        policy.register_hook(lambda memories: 1 / 0)
+        policy.register_hook(evicted.extend)
+        storage = self.open(PickleStorage, eviction_policy=policy)
+
+        storage.add_memory(make_memory('a', 'apple pie', 1), [])
+        storage.add_memory(make_memory('b', 'banana bread', 2), [])
+        self.assertEqual([memory['memory_id'] for memory in evicted], ['a'])
+        self.assertEqual(storage.get_memory_ids(), ['b'])
+
+class TestTransactions(StorageTestCase):
+    def test_rollback_discards_every_mutation(self):
+        for backend in BACKENDS:
+            with self.subTest(backend=backend.name):
+                storage = self.open(backend)
+                self.populate(storage)
+                version = storage.version()
+
+                with self.assertRaises(RuntimeError):
+                    with storage.transaction():
+                        storage.add_memory(make_memory('d', 'date loaf', 4), ['a'])
+                        storage.update_memory('a', {'mood': 'calm'}, {})
+                        storage.remove_memory('b')
+                        raise RuntimeError("abort")
+
+                self.assertNotEqual(storage.version(), version)
+                self.assertEqual(sorted(storage.get_memory_ids()), ['a', 'b', 'c'])
+                self.assertEqual(storage.get_memories_by_id(['a'])[0]['metadata']['mood'], 'happy')
+                self.assertEqual(storage.get_stats()['total_connections'], 2)
+                storage.close()
+                self.assertEqual(sorted(self.open(backend).get_memory_ids()), ['a', 'b', 'c'])
+
+    def test_nested_transactions_join_the_outermost(self):
+        for backend in BACKENDS:
+            with self.subTest(backend=backend.name):
+                storage = self.open(backend)
+
+                with self.assertRaises(RuntimeError):
+                    with storage.transaction():
+                        storage.add_memory(make_memory('a', 'apple pie', 1), [])
+                        with storage.transaction():
+                            storage.add_memory(make_memory('b', 'banana bread', 2), [])
+                        raise RuntimeError("abort")
+
+                self.assertEqual(storage.get_memory_ids(), [])
+
+    def test_commit_writes_one_journal_record(self):
+        storage = self.open(PickleStorage)
+        with storage.transaction():
+            self.populate(storage)
+            storage.remove_memory('c')
+
+        with open(storage.journal_file, "rb") as f:
+            record = pickle.load(f)
+            with self.assertRaises(EOFError):
+                pickle.load(f)
+        self.assertEqual(record[0], 'batch')
+        self.assertEqual(sorted(self.open(PickleStorage).get_memory_ids()), ['a', 'b'])
+
+    def test_eviction_runs_once_on_commit(self):
+        for backend in BACKENDS:
+            with self.subTest(backend=backend.name):
+                evicted = []
+                policy = EvictionPolicy(capacity=2)
+                policy.register_hook(evicted.append)
+                storage = self.open(backend, eviction_policy=policy)
+
+                with storage.transaction():
+                    self.populate(storage)
+                    storage.add_memory(make_memory('d', 'date loaf', 4), [])
+                    self.assertEqual(evicted, [])
+
+                self.assertEqual(len(evicted), 1)
+                self.assertEqual(len(evicted[0]), 2)
+                self.assertEqual(len(storage.get_memory_ids()), 2)
+
+if __name__ == '__main__':
+    unittest.main()
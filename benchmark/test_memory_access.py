@@ -0,0 +1,107 @@
+import time
+import unittest
+from unittest import mock
+
+from libre_agent.memory_access import AccessTracker
+from libre_agent.memory_graph import MemoryGraph
+from libre_agent.recall_prefilter import RecallPrefilter
+from benchmark.memory_corpus import TempGraphMixin
+
+class TestAccessTracker(TempGraphMixin, unittest.TestCase):
+    def setUp(self):
+        super().setUp()
+        self.memory_graph = MemoryGraph.for_file(self.graph_file)
+        self.tracker = AccessTracker.for_graph(self.memory_graph)
+        # Per tracker, so other tests keep the class defaults
+        self.tracker.flush_threshold = 1000
+        self.tracker.flush_interval = 3600.0
+        self.a = self.memory_graph.add_memory('internal', "dentist appointment", {'recall_count': 3, 'last_recalled': 50})['memory_id']
+        self.b = self.memory_graph.add_memory('internal', "dentist bill")['memory_id']
+
+    def tearDown(self):
+        self.tracker.flush()
+
+    def stored(self, memory_id):
+        [memory] = self.memory_graph.get_memories_by_id([memory_id])
+        return {key: value for key, value in memory['metadata'].items() if key in ('recall_count', 'last_recalled', 'update_count', 'last_updated')}
+
+    def test_events_are_buffered_until_flushed(self):
+        self.tracker.record_recall([self.a, self.b], now=100)
+        self.tracker.record_recall([self.a], now=200)
+        self.tracker.record_update([self.b], now=150)
+
+        self.assertEqual(self.stored(self.a), {'recall_count': 3, 'last_recalled': 50})
+        self.assertEqual(self.stored(self.b), {})
+        # Pending events are added to the stored values
+        [memory] = self.memory_graph.get_memories_by_id([self.a])
+        self.assertEqual(self.tracker.stats(memory), {'recall_count': 5, 'last_recalled': 200, 'update_count': 0, 'last_updated': None})
+
+        self.assertEqual(self.tracker.flush(), 2)
+        self.assertEqual(self.stored(self.a), {'recall_count': 5, 'last_recalled': 200})
+        self.assertEqual(self.stored(self.b), {'recall_count': 1, 'last_recalled': 100, 'update_count': 1, 'last_updated': 150})
+        self.assertEqual(self.tracker.flush(), 0)
+
+    def test_flushes_once_enough_events_are_pending(self):
+        self.tracker.flush_threshold = 3
+        self.tracker.record_recall([self.a, self.b], now=100)
+        self.assertEqual(self.stored(self.b), {})
+
+        self.tracker.record_recall([self.b], now=101)
+        self.assertEqual(self.stored(self.b), {'recall_count': 2, 'last_recalled': 101})
+        self.assertEqual(self.tracker._pending, {})
+
+    def test_flushes_once_the_oldest_event_is_old_enough(self):
+        self.tracker.flush_interval = 60
+        self.tracker.record_recall([self.a], now=1000)
+        self.tracker.record_recall([self.b], now=1059)
+        self.assertEqual(self.stored(self.b), {})
+
+        self.tracker.record_recall([self.b], now=1060)
+        self.assertEqual(self.stored(self.a), {'recall_count': 4, 'last_recalled': 1000})
+        self.assertEqual(self.stored(self.b), {'recall_count': 2, 'last_recalled': 1060})
+
+    def test_flushes_write_absolute_values(self):
+        self.tracker.record_recall([self.a, self.a], now=100)
+        with mock.patch.object(self.memory_graph, 'update_memories', wraps=self.memory_graph.update_memories) as update_memories:
+            self.tracker.flush()
+        [(updates,), _] = update_memories.call_args
+
+        # Replaying the same write (e.g. from the journal) doesn't count the recalls twice
+        self.memory_graph.update_memories(updates)
+        self.assertEqual(self.stored(self.a), {'recall_count': 5, 'last_recalled': 100})
+
+    def test_failed_flushes_keep_the_events(self):
+        self.tracker.record_recall([self.a], now=100)
+        with mock.patch.object(self.memory_graph, 'update_memories', side_effect=ValueError("disk full")):
+            self.assertEqual(self.tracker.flush(), 0)
+        self.tracker.record_recall([self.a], now=200)
+
+        self.assertEqual(self.tracker.flush(), 1)
+        self.assertEqual(self.stored(self.a), {'recall_count': 5, 'last_recalled': 200})
+
+    def test_flush_skips_memories_that_are_gone(self):
+        MemoryGraph.get_storage(self.graph_file).set_archive(True)
+        c = self.memory_graph.add_memory('internal', "dentist reminder")['memory_id']
+        self.tracker.record_recall([self.a, self.b, c], now=100)
+
+        [archived] = self.memory_graph.get_memories_by_id([self.b])
+        self.memory_graph.archive_memories([archived])
+        self.memory_graph.remove_memories([self.a, self.b])
+
+        self.assertEqual(self.tracker.flush(), 1)
+        self.assertEqual(self.memory_graph.get_memory_ids(), [c])
+        self.assertEqual(self.stored(c), {'recall_count': 1, 'last_recalled': 100})
+        self.assertNotIn('recall_count', self.memory_graph.get_archived_memories([self.b])[0]['metadata'])
+
+    def test_prefilter_sees_pending_recalls(self):
+        now = time.time()
+        for _ in range(10):
+            self.tracker.record_recall([self.b], now=now)
+
+        usage = RecallPrefilter(lexical_weight=0, recency_weight=0, priority_weight=0)
+        [best, _] = usage.select("", memory_graph=self.memory_graph)
+        self.assertEqual(best['memory']['memory_id'], self.b)
+        self.assertEqual(self.stored(self.b), {})
+
+if __name__ == '__main__':
+    unittest.main()
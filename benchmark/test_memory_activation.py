@@ -0,0 +1,78 @@
+import unittest
+from unittest import mock
+
+from libre_agent.memory_activation import SpreadingActivation
+from libre_agent.memory_graph import MemoryGraph
+from benchmark.memory_corpus import TempGraphMixin
+
+# a links to b, c and d; b to e; e to f
+EDGES = {'b': ['a'], 'c': ['a'], 'd': ['a'], 'e': ['b'], 'f': ['e']}
+
+class TestSpreadingActivation(TempGraphMixin, unittest.TestCase):
+    def setUp(self):
+        super().setUp()
+        self.memory_graph = MemoryGraph.for_file(self.graph_file)
+        self.ids = {'a': self.memory_graph.add_memory('internal', 'a')['memory_id']}
+        for name, parents in EDGES.items():
+            stored = self.memory_graph.add_memory('internal', name, parent_memory_ids=[self.ids[parent] for parent in parents])
+            self.ids[name] = stored['memory_id']
+        self.names = {memory_id: name for name, memory_id in self.ids.items()}
+
+    def neighborhood(self, activation, name='a'):
+        return {self.names[memory_id]: value for memory_id, value in activation.neighborhood(self.ids[name], self.memory_graph).items()}
+
+    def assertActivation(self, found, expected):
+        self.assertEqual(sorted(found), sorted(expected))
+        for name, value in expected.items():
+            self.assertAlmostEqual(found[name], value, msg=name)
+
+    def test_decay_is_split_by_the_root_of_the_fan_out(self):
+        # a has three links, each gets 0.5 / sqrt(3); b passes half of that on, split between a and e
+        first_hop = 0.5 / 3 ** 0.5
+        self.assertActivation(self.neighborhood(SpreadingActivation()), {'b': first_hop, 'c': first_hop, 'd': first_hop, 'e': first_hop * 0.5 / 2 ** 0.5})
+
+    def test_hops_and_threshold_bound_the_spread(self):
+        first_hop = 0.5 / 3 ** 0.5
+        second_hop = first_hop * 0.5 / 2 ** 0.5
+        third_hop = second_hop * 0.5 / 2 ** 0.5
+        self.assertActivation(self.neighborhood(SpreadingActivation(max_hops=1)), {'b': first_hop, 'c': first_hop, 'd': first_hop})
+        # e spreads back to b as well as on to f
+        self.assertActivation(
+            self.neighborhood(SpreadingActivation(max_hops=3)),
+            {'b': first_hop + third_hop, 'c': first_hop, 'd': first_hop, 'e': second_hop, 'f': third_hop}
+        )
+        # e is reached, but too weakly to spread any further
+        self.assertNotIn('f', self.neighborhood(SpreadingActivation(max_hops=3, threshold=0.2)))
+
+    def test_spread_merges_seeds_and_drops_weak_results(self):
+        activation = SpreadingActivation(threshold=0.05)
+        results = dict(activation.spread([self.ids['a'], self.ids['f']], exclude_ids=[self.ids['c']], memory_graph=self.memory_graph))
+        found = {self.names[memory_id]: value for memory_id, value in results.items()}
+
+        # e is reached from both seeds; seeds and excluded memories are left out
+        self.assertEqual(sorted(found), ['b', 'd', 'e'])
+        self.assertAlmostEqual(found['e'], 0.5 / 3 ** 0.5 * 0.5 / 2 ** 0.5 + 0.5)
+        self.assertEqual(list(results), sorted(results, key=results.get, reverse=True))
+
+    def test_hub_cache_follows_the_topology(self):
+        activation = SpreadingActivation(hub_seeds=2)
+        with mock.patch.object(activation, '_spread', wraps=activation._spread) as spread:
+            for _ in range(3):
+                self.neighborhood(activation)
+            self.assertEqual(spread.call_count, 2)
+            self.assertEqual(activation.cache_stats()['hits'], 1)
+
+            # Metadata updates leave the edges alone
+            self.memory_graph.update_memory(self.ids['a'], {'priority_level': 'HIGH'})
+            self.neighborhood(activation)
+            self.assertEqual(spread.call_count, 2)
+
+            # A new edge invalidates the cached neighborhood
+            self.ids['g'] = self.memory_graph.add_memory('internal', 'g', parent_memory_ids=[self.ids['a']])['memory_id']
+            self.names[self.ids['g']] = 'g'
+            self.assertIn('g', self.neighborhood(activation))
+            self.assertEqual(spread.call_count, 3)
+            self.assertEqual(activation.cache_stats(), {'hits': 2, 'misses': 2, 'hit_rate': 0.5, 'hubs': 1})
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,91 @@
+import unittest
+
+from libre_agent.graph_storage import PickleStorage, SQLiteStorage
+from libre_agent.memory_archive import MemoryArchive
+from libre_agent.memory_eviction import EvictionPolicy
+from benchmark.memory_corpus import TempGraphMixin, make_memory
+
+class TestMemoryArchive(TempGraphMixin, unittest.TestCase):
+    def setUp(self):
+        super().setUp()
+        self.archive = MemoryArchive(self.graph_file)
+
+    def tearDown(self):
+        self.archive.close()
+
+    def reopen(self):
+        self.archive.close()
+        self.archive = MemoryArchive(self.graph_file)
+        return self.archive
+
+    def test_round_trip_across_blocks(self):
+        first = [make_memory('a', 'trip to the lighthouse', 10, role='episodic', priority_level='LOW'), make_memory('b', 'bread recipe with rye', 20)]
+        second = [make_memory('c', 'lighthouse keeper story', 30)]
+        self.assertEqual(self.archive.archive(first), 2)
+        self.assertEqual(self.archive.archive(second), 1)
+
+        archive = self.reopen()
+        self.assertEqual(len(archive), 3)
+        restored = archive.get_memories_by_id(['c', 'missing', 'a'])
+        self.assertEqual([memory['memory_id'] for memory in restored], ['c', 'a'])
+        self.assertEqual(restored[1]['content'], 'trip to the lighthouse')
+        self.assertEqual(restored[1]['metadata'], {'role': 'episodic', 'priority_level': 'LOW', 'archived': True})
+        self.assertEqual(restored[1]['timestamp'], 10)
+
+    def test_memories_are_archived_once(self):
+        self.archive.archive([make_memory('a', 'first copy', 10)])
+        size = self.archive.stats()['archive_bytes']
+
+        self.assertEqual(self.archive.archive([make_memory('a', 'second copy', 20)]), 0)
+        self.assertEqual(self.archive.stats(), {'archived_memories': 1, 'archive_bytes': size})
+        self.assertEqual(self.archive.get_memories_by_id(['a'])[0]['content'], 'first copy')
+
+    def test_returned_memories_are_copies(self):
+        self.archive.archive([make_memory('a', 'trip to the lighthouse', 10, role='episodic')])
+        self.archive.get_memories_by_id(['a'])[0]['metadata']['role'] = 'changed'
+        self.assertEqual(self.archive.get_memories_by_id(['a'])[0]['metadata']['role'], 'episodic')
+
+    def test_search_by_text_and_time(self):
+        self.archive.archive([
+            make_memory('a', 'trip to the lighthouse', 10),
+            make_memory('b', 'bread recipe with rye', 20),
+            make_memory('c', 'lighthouse keeper story', 30),
+        ])
+
+        self.assertEqual(sorted(memory_id for memory_id, _ in self.archive.search('lighthouse')), ['a', 'c'])
+        self.assertEqual([memory_id for memory_id, _ in self.archive.search('lighthouse', since=15)], ['c'])
+        self.assertEqual([memory_id for memory_id, _ in self.archive.search('', k=2)], ['c', 'b'])
+        self.assertEqual(self.archive.search('volcano'), [])
+
+    def test_fallback_search_without_fts(self):
+        self.archive.archive([make_memory('a', 'trip to the lighthouse', 10), make_memory('b', 'bread recipe', 20)])
+        self.archive.full_text_search = False
+
+        self.assertEqual([memory_id for memory_id, _ in self.archive.search('lighthouse')], ['a'])
+        self.assertEqual(self.archive.search('lighthouse', until=5), [])
+
+    def test_unreadable_blocks_are_skipped(self):
+        self.archive.archive([make_memory('a', 'trip to the lighthouse', 10)])
+        self.archive.archive([make_memory('b', 'bread recipe', 20)])
+        with open(self.archive.archive_file, "r+b") as f:
+            f.seek(8)
+            f.write(b"\x00" * 8)
+
+        archive = self.reopen()
+        self.assertEqual([memory['memory_id'] for memory in archive.get_memories_by_id(['a', 'b'])], ['b'])
+
+class TestArchivingStorage(TempGraphMixin, unittest.TestCase):
+    def test_evicted_memories_move_to_the_archive(self):
+        for backend in (PickleStorage, SQLiteStorage):
+            with self.subTest(backend=backend.name):
+                storage = backend(self.directory / f"graph.{backend.name}", eviction_policy=EvictionPolicy(capacity=1), archive=True)
+                storage.add_memory(make_memory('a', 'trip to the lighthouse', 10), [])
+                storage.add_memory(make_memory('b', 'bread recipe', 20, priority_level='HIGH'), [])
+
+                self.assertEqual(storage.get_memory_ids(), ['b'])
+                self.assertEqual(storage.archive.get_memories_by_id(['a'])[0]['content'], 'trip to the lighthouse')
+                self.assertEqual([memory_id for memory_id, _ in storage.archive.search('lighthouse')], ['a'])
+                storage.close()
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,113 @@
+import random
+import unittest
+
+import numpy as np
+
+from libre_agent.memory_access import AccessTracker
+from libre_agent.memory_dedup import MAX_HASH, MERSENNE_PRIME, DuplicateIndex, MinHasher, jaccard, merge_duplicate, mod_mersenne, mul_mod, shingles
+from libre_agent.memory_graph import MemoryGraph
+from benchmark.memory_corpus import FILLER, TempGraphMixin
+
+ORIGINAL = "The user prefers green tea in the morning, coffee after lunch, herbal tea before bed and sparkling water during long meetings at work"
+PARAPHRASE = "The user prefers green tea in the morning, coffee after lunch, herbal tea before bed and sparkling water during long meetings at the office"
+UNRELATED = "The deployment pipeline failed because the staging database ran out of disk"
+
+class TestMinHash(unittest.TestCase):
+    def test_shingles_are_word_bigrams(self):
+        self.assertEqual(shingles("green tea morning"), {"green tea", "tea morning"})
+        self.assertEqual(shingles("tea"), {"tea"})
+        self.assertEqual(shingles(""), set())
+        self.assertEqual(jaccard(set(), set()), 1.0)
+
+    def test_signatures_estimate_jaccard_similarity(self):
+        hasher = MinHasher(num_perm=256)
+        for text in (PARAPHRASE, "The user prefers green tea in the morning and coffee after lunch", UNRELATED):
+            with self.subTest(text=text):
+                first, second = shingles(ORIGINAL), shingles(text)
+                agreement = (hasher.signature(first) == hasher.signature(second)).mean()
+                self.assertAlmostEqual(agreement, jaccard(first, second), delta=0.15)
+
+    def test_permutations_are_computed_exactly(self):
+        hasher = MinHasher()
+        rng = random.Random(7)
+        prime = int(MERSENNE_PRIME)
+        for value in [0, 1, int(MAX_HASH)] + [rng.getrandbits(32) for _ in range(200)]:
+            with self.subTest(value=value):
+                found = mod_mersenne(mul_mod(hasher._a, np.uint64(value)) + hasher._b)
+                self.assertEqual(found.tolist(), [(int(a) * value + int(b)) % prime for a, b in zip(hasher._a, hasher._b)])
+
+    def test_estimates_are_unbiased_over_many_pairs(self):
+        hasher = MinHasher()
+        rng = random.Random(13)
+        errors = []
+        for _ in range(200):
+            words = rng.sample(FILLER[:500], 30)
+            # Rewrite a random share of the words to spread the similarities out
+            changed = [rng.choice(FILLER[:500]) if rng.random() < rng.random() else word for word in words]
+            first, second = shingles(" ".join(words)), shingles(" ".join(changed))
+            errors.append((hasher.signature(first) == hasher.signature(second)).mean() - jaccard(first, second))
+
+        self.assertLess(abs(np.mean(errors)), 0.02)
+        self.assertLess(np.mean(np.abs(errors)), 0.06)
+
+    def test_signatures_are_stable_across_hashers(self):
+        signature = MinHasher().signature(shingles(ORIGINAL))
+        self.assertTrue((MinHasher().signature(shingles(ORIGINAL)) == signature).all())
+
+class TestDuplicateIndex(TempGraphMixin, unittest.TestCase):
+    def setUp(self):
+        super().setUp()
+        self.memory_graph = MemoryGraph.for_file(self.graph_file)
+        self.index = DuplicateIndex()
+
+    def tearDown(self):
+        AccessTracker.for_graph(self.memory_graph).flush()
+
+    def test_finds_near_duplicates_only(self):
+        stored = self.memory_graph.add_memory('internal', ORIGINAL, {'role': 'semantic'})
+        self.memory_graph.add_memory('internal', UNRELATED, {'role': 'semantic'})
+
+        memory, similarity = self.index.find(PARAPHRASE, self.memory_graph)
+        self.assertEqual(memory['memory_id'], stored['memory_id'])
+        self.assertGreaterEqual(similarity, DuplicateIndex.threshold)
+        self.assertIsNone(self.index.find("Notes on an entirely different subject", self.memory_graph))
+
+    def test_filters_restrict_matches(self):
+        self.memory_graph.add_memory('internal', ORIGINAL, {'role': 'message'})
+
+        self.assertIsNone(self.index.find(PARAPHRASE, self.memory_graph, metadata={'role': 'semantic'}))
+        self.assertIsNone(self.index.find(PARAPHRASE, self.memory_graph, memory_type='external'))
+        self.assertIsNotNone(self.index.find(PARAPHRASE, self.memory_graph, memory_type='internal', metadata={'role': 'message'}))
+
+    def test_sync_follows_removals(self):
+        stored = self.memory_graph.add_memory('internal', ORIGINAL)
+        self.assertIsNotNone(self.index.find(PARAPHRASE, self.memory_graph))
+        self.assertEqual(len(self.index), 1)
+
+        self.memory_graph.remove_memory(stored['memory_id'])
+        self.assertIsNone(self.index.find(PARAPHRASE, self.memory_graph))
+        self.assertEqual(len(self.index), 0)
+
+    def test_merge_keeps_the_stronger_values(self):
+        stored = self.memory_graph.add_memory('internal', ORIGINAL, {'priority_level': 'LOW', 'temporal_scope': 'long_term'}, timestamp=1000)
+
+        merged = merge_duplicate(stored, f"{ORIGINAL} on weekdays", {'priority_level': 'HIGH', 'temporal_scope': 'short_term'}, self.memory_graph)
+        self.assertEqual(merged['content'], f"{ORIGINAL} on weekdays")
+        self.assertEqual(merged['metadata']['priority_level'], 'HIGH')
+        self.assertEqual(merged['metadata']['temporal_scope'], 'long_term')
+        self.assertEqual(merged['metadata']['merged_count'], 1)
+
+        merged = merge_duplicate(merged, ORIGINAL, {}, self.memory_graph)
+        self.assertEqual(merged['content'], f"{ORIGINAL} on weekdays")
+        self.assertEqual(merged['metadata']['merged_count'], 2)
+
+        # Merges count as updates of the stored memory
+        AccessTracker.for_graph(self.memory_graph).flush()
+        [stored] = self.memory_graph.get_memories_by_id([stored['memory_id']])
+        self.assertEqual(stored['metadata']['update_count'], 2)
+        # The creation time stays put; recency counts from the last update
+        self.assertEqual(stored['timestamp'], 1000)
+        self.assertGreater(stored['metadata']['last_updated'], 1000)
+
+if __name__ == '__main__':
+    unittest.main()
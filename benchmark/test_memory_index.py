@@ -0,0 +1,120 @@
+import unittest
+
+from libre_agent.graph_storage import PickleStorage
+from libre_agent.memory_index import MemoryIndex, TimestampIndex
+from benchmark.memory_corpus import TempGraphMixin, make_memory
+
+class TestMemoryIndex(unittest.TestCase):
+    def setUp(self):
+        self.index = MemoryIndex()
+        self.index.add('a', 'internal', {'role': 'episodic', 'recalled': True})
+        self.index.add('b', 'external', {'role': 'message'})
+        self.index.add('c', 'internal', {'role': 'episodic', 'recalled': None, 'tags': ['x']})
+
+    def test_lookup_intersects_filters(self):
+        self.assertIsNone(self.index.lookup())
+        self.assertEqual(self.index.lookup(memory_type='internal'), {'a', 'c'})
+        self.assertEqual(self.index.lookup(memory_type='internal', metadata={'role': 'episodic', 'recalled': True}), {'a'})
+        self.assertEqual(self.index.lookup(memory_type='external', metadata={'role': 'episodic'}), set())
+        self.assertEqual(self.index.lookup(metadata={'role': 'unknown'}), set())
+
+    def test_none_matches_missing_keys(self):
+        self.assertEqual(self.index.lookup(metadata={'recalled': None}), {'b', 'c'})
+
+    def test_unhashable_filters_are_left_to_the_caller(self):
+        self.assertIsNone(self.index.lookup(metadata={'tags': ['x']}))
+        self.assertEqual(self.index.lookup(memory_type='internal', metadata={'tags': ['x']}), {'a', 'c'})
+
+    def test_remove_drops_every_entry(self):
+        self.index.remove('a', 'internal', {'role': 'episodic', 'recalled': True})
+
+        self.assertEqual(len(self.index), 2)
+        self.assertEqual(self.index.lookup(metadata={'recalled': True}), set())
+        self.assertEqual(self.index.lookup(metadata={'recalled': None}), {'b', 'c'})
+        self.assertEqual(self.index.position('a'), -1)
+        # Emptied buckets are deleted rather than left behind
+        self.assertNotIn(('recalled', True), self.index._by_metadata)
+
+    def test_updates_keep_their_position(self):
+        position = self.index.position('a')
+        self.index.remove('a', 'internal', {'role': 'episodic', 'recalled': True}, keep_position=True)
+        self.index.add('a', 'internal', {'role': 'reflection'})
+
+        self.assertEqual(self.index.position('a'), position)
+        self.assertEqual(self.index.lookup(metadata={'role': 'reflection'}), {'a'})
+        self.assertEqual(self.index.lookup(metadata={'role': 'episodic'}), {'c'})
+
+class TestTimestampIndex(TempGraphMixin, unittest.TestCase):
+    def setUp(self):
+        super().setUp()
+        self.index = TimestampIndex()
+        for memory_id, timestamp in (('a', 10), ('b', 30), ('c', 20), ('d', 20), ('e', None)):
+            self.index.add(memory_id, timestamp)
+
+    def test_range_is_half_open_and_ordered(self):
+        self.assertEqual(self.index.range(), ['e', 'a', 'c', 'd', 'b'])
+        self.assertEqual(self.index.range(since=20), ['c', 'd', 'b'])
+        self.assertEqual(self.index.range(until=20), ['e', 'a'])
+        self.assertEqual(self.index.range(since=15, until=30), ['c', 'd'])
+        self.assertEqual(self.index.range(since=31), [])
+
+    def test_remove_needs_the_stored_timestamp(self):
+        self.index.remove('c', 30)
+        self.assertEqual(len(self.index), 5)
+
+        self.index.remove('c', 20)
+        self.index.remove('e', None)
+        self.assertEqual(self.index.range(), ['a', 'd', 'b'])
+
+    def test_storage_ranges_follow_timestamp_updates(self):
+        storage = PickleStorage(self.graph_file)
+        self.addCleanup(storage.close)
+
+        for memory_id, timestamp in (('a', 10), ('b', 20), ('c', 30)):
+            storage.add_memory(make_memory(memory_id, timestamp=timestamp), [])
+        self.assertEqual([memory['memory_id'] for memory in storage.get_memories(since=15)], ['b', 'c'])
+
+        storage.update_memory('a', {}, {'timestamp': 40})
+        storage.remove_memory('c')
+        self.assertEqual([memory['memory_id'] for memory in storage.get_memories(since=15)], ['b', 'a'])
+        self.assertEqual(storage.get_memories(until=15), [])
+
+class TestPickleIndexBookkeeping(TempGraphMixin, unittest.TestCase):
+    def setUp(self):
+        super().setUp()
+        self.storage = PickleStorage(self.graph_file)
+
+    def tearDown(self):
+        self.storage.close()
+
+    def scan(self, memory_type=None, metadata=None):
+        return [
+            memory['memory_id'] for memory in self.storage.get_memories()
+            if (memory_type is None or memory['memory_type'] == memory_type)
+            and all(memory['metadata'].get(key) == value for key, value in (metadata or {}).items())
+        ]
+
+    def test_indexed_queries_match_a_scan_after_mutations(self):
+        roles = ('episodic', 'message', 'reflection')
+        for i in range(30):
+            metadata = {'role': roles[i % 3]}
+            if i % 4 == 0:
+                metadata['recalled'] = True
+            self.storage.add_memory(make_memory(f"m{i}", f"memory {i}", i, 'internal' if i % 2 else 'external', **metadata), [])
+
+        # Warm the index, then mutate it incrementally
+        self.storage.get_memories(metadata={'role': 'episodic'})
+        for i in range(0, 30, 5):
+            self.storage.update_memory(f"m{i}", {'role': 'message', 'recalled': None}, {})
+        for i in range(1, 30, 7):
+            self.storage.remove_memory(f"m{i}")
+        self.storage.update_memory('m3', {}, {'memory_type': 'external'})
+
+        for memory_type in (None, 'internal', 'external'):
+            for metadata in (None, {'role': 'message'}, {'role': 'episodic', 'recalled': True}, {'recalled': None}):
+                with self.subTest(memory_type=memory_type, metadata=metadata):
+                    found = [memory['memory_id'] for memory in self.storage.get_memories(memory_type=memory_type, metadata=metadata)]
+                    self.assertEqual(found, self.scan(memory_type, metadata))
+
+if __name__ == '__main__':
+    unittest.main()
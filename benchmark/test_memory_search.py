@@ -0,0 +1,119 @@
+import math
+import random
+import unittest
+
+from libre_agent.graph_storage import PickleStorage, SQLiteStorage
+from libre_agent.memory_search import SearchIndex
+from benchmark.memory_corpus import WORDS, TempGraphMixin, make_memory, random_content
+
+def bm25(count, length, matching, total, average_length, k1=1.2, b=0.75):
+    """Reference BM25 term score."""
+    idf = math.log(1 + (total - matching + 0.5) / (matching + 0.5))
+    return idf * count * (k1 + 1) / (count + k1 * (1 - b + b * length / average_length))
+
+def build_index(documents):
+    index = SearchIndex()
+    for memory_id, content in documents.items():
+        index.add(memory_id, make_memory(memory_id, content))
+    return index
+
+def index_state(index):
+    return dict(index._postings), index._lengths, index._total_length
+
+def ranked_groups(results):
+    """Result ids grouped by score, so ties don't decide the comparison."""
+    groups = {}
+    for memory_id, score in results:
+        groups.setdefault(round(score, 9), set()).add(memory_id)
+    return [groups[score] for score in sorted(groups, reverse=True)]
+
+class TestSearchIndex(unittest.TestCase):
+    def test_scores_follow_bm25(self):
+        index = build_index({'a': "apple pie", 'b': "apple tart crust", 'c': "banana bread"})
+        average_length = 7 / 3
+
+        [(memory_id, score)] = index.search("pie")
+        self.assertEqual(memory_id, 'a')
+        self.assertAlmostEqual(score, bm25(1, 2, 1, 3, average_length))
+
+        scores = dict(index.search("apple pie"))
+        self.assertAlmostEqual(scores['a'], bm25(1, 2, 2, 3, average_length) + bm25(1, 2, 1, 3, average_length))
+        self.assertAlmostEqual(scores['b'], bm25(1, 3, 2, 3, average_length))
+
+    def test_ranking(self):
+        index = build_index({
+            'rare': "dentist visit",
+            'common': "coffee visit",
+            'repeated': "coffee coffee morning",
+            'long': "coffee morning walk park bench",
+            'other': "garden rain",
+            'more': "coffee garden",
+        })
+        # A rare term outweighs a common one
+        self.assertEqual(index.search("dentist coffee")[0][0], 'rare')
+        # More occurrences and shorter texts rank higher
+        self.assertEqual([memory_id for memory_id, _ in index.search("coffee", k=None)], ['repeated', 'common', 'more', 'long'])
+        # Stopwords and unknown terms don't match anything
+        self.assertEqual(index.search("the unknown"), [])
+
+    def test_candidates_and_k_restrict_the_results(self):
+        index = build_index({f"m{i}": f"coffee {'cup ' * i}" for i in range(5)})
+        self.assertEqual([memory_id for memory_id, _ in index.search("coffee", k=2)], ['m0', 'm1'])
+        self.assertEqual([memory_id for memory_id, _ in index.search("coffee", candidates={'m3', 'm1', 'x'})], ['m1', 'm3'])
+        self.assertEqual(len(index.search("coffee", k=None)), 5)
+
+    def test_metadata_values_are_searchable(self):
+        index = SearchIndex()
+        index.add('a', make_memory('a', "a plain note", role='User', priority_level='CORE'))
+        self.assertEqual([memory_id for memory_id, _ in index.search("core")], ['a'])
+        self.assertEqual([memory_id for memory_id, _ in index.search("user")], ['a'])
+
+    def test_incremental_updates_match_a_rebuilt_index(self):
+        rng = random.Random(5)
+        documents = {f"m{i}": random_content(rng) for i in range(40)}
+        index = build_index(documents)
+
+        for i in range(0, 40, 3):
+            memory_id = f"m{i}"
+            # Removal with and without the indexed text at hand
+            if i % 2:
+                index.remove(memory_id, make_memory(memory_id, documents.pop(memory_id)))
+            else:
+                index.remove(memory_id)
+                del documents[memory_id]
+        for i in range(1, 40, 4):
+            memory_id = f"m{i}"
+            documents[memory_id] = random_content(rng)
+            index.add(memory_id, make_memory(memory_id, documents[memory_id]))
+        index.remove('missing')
+
+        rebuilt = build_index(documents)
+        self.assertEqual(index_state(index), index_state(rebuilt))
+        self.assertEqual(len(index), len(documents))
+        for query in WORDS:
+            self.assertEqual(dict(index.search(query, k=None)), dict(rebuilt.search(query, k=None)))
+
+class TestBackendSearchOrder(TempGraphMixin, unittest.TestCase):
+    def test_pickle_search_ranks_like_sqlite_fts5(self):
+        rng = random.Random(11)
+        memories = [make_memory(f"m{i}", random_content(rng), i) for i in range(200)]
+
+        results = {}
+        for backend in (PickleStorage, SQLiteStorage):
+            storage = backend(self.directory / f"graph.{backend.name}")
+            self.addCleanup(storage.close)
+            for memory in memories:
+                storage.add_memory(memory, [])
+            if backend is SQLiteStorage and not storage.full_text_search:
+                self.skipTest("SQLite FTS5 is not available")
+            # Single terms: FTS5 clamps idf to log((N - n + 0.5) / (n + 0.5)) where SearchIndex
+            # uses log(1 + ...), so how several terms are weighed against each other differs
+            results[backend.name] = {query: ranked_groups(storage.search(query, k=len(memories))) for query in WORDS}
+
+        for query, groups in results['pickle'].items():
+            with self.subTest(query=query):
+                self.assertTrue(groups)
+                self.assertEqual(groups, results['sqlite'][query])
+
+if __name__ == '__main__':
+    unittest.main()
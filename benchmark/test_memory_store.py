@@ -0,0 +1,120 @@
+import pickle
+import random
+import unittest
+from unittest import mock
+
+import networkx as nx
+
+from libre_agent.graph_storage import PickleStorage
+from libre_agent.memory_store import COMPRESS_THRESHOLD, CompressedContent, MemoryStore
+from benchmark.memory_corpus import TempGraphMixin, make_memory
+
+LONG = "the quick brown fox jumps over the lazy dog " * 50
+
+def incompressible(length):
+    """Random CJK text: even compressed it takes more bytes than it has characters."""
+    rng = random.Random(3)
+    return "".join(chr(rng.randrange(0x4E00, 0xA000)) for _ in range(length))
+
+def node_data(memory):
+    return {key: value for key, value in memory.items() if key != 'memory_id'}
+
+def build_store():
+    store = MemoryStore()
+    memories = [
+        make_memory('a', "short note", 1, role='episodic', priority_level='HIGH', recalled=True, mood='calm'),
+        make_memory('b', LONG, 2, role='a brand new role', tags=['x', 'y']),
+        make_memory('c', incompressible(2000), 3, memory_type='external', role=['not', 'codable']),
+    ]
+    for memory in memories:
+        store.add(memory['memory_id'], node_data(memory))
+    store.add_edge('a', 'b')
+    store.add_edge('b', 'c', 'derived_from')
+    return store, memories
+
+class TestMemoryStore(unittest.TestCase):
+    def test_snapshot_round_trip(self):
+        store, memories = build_store()
+        restored = pickle.loads(pickle.dumps(store))
+
+        self.assertEqual([restored.memory_dict(memory['memory_id']) for memory in memories], memories)
+        self.assertEqual(sorted(restored.edges()), [('a', 'b', 'memory_flow'), ('b', 'c', 'derived_from')])
+        self.assertEqual(restored.number_of_edges(), 2)
+        self.assertEqual(list(restored.predecessors('c')), ['b'])
+        # Values added to a codebook keep their codes
+        self.assertEqual(restored.codebooks['role'].values, store.codebooks['role'].values)
+
+    def test_old_uncompressed_snapshots_are_compressed_on_load(self):
+        store, memories = build_store()
+        state = store.__getstate__()
+        state['memories'] = [row[:2] + (memory['content'],) + row[3:] for row, memory in zip(state['memories'], memories)]
+
+        restored = MemoryStore.__new__(MemoryStore)
+        restored.__setstate__(state)
+        self.assertIsInstance(restored.get('b').content, CompressedContent)
+        self.assertEqual(restored.memory_dict('b'), memories[1])
+
+    def test_networkx_snapshots_are_imported(self):
+        _, memories = build_store()
+        graph = nx.DiGraph()
+        for memory in memories:
+            graph.add_node(memory['memory_id'], **node_data(memory))
+        graph.add_edge('a', 'b', relation_type='memory_flow')
+        graph.add_edge('a', 'dangling')
+
+        store = MemoryStore.from_networkx(graph)
+        self.assertEqual([store.memory_dict(memory['memory_id']) for memory in memories], memories)
+        self.assertNotIn('dangling', store)
+        self.assertEqual(list(store.edges()), [('a', 'b', 'memory_flow')])
+
+    def test_long_content_is_compressed_when_it_pays_off(self):
+        self.assertIsInstance(CompressedContent.pack("ab" * (COMPRESS_THRESHOLD // 2)), CompressedContent)
+        self.assertIsInstance(CompressedContent.pack("a" * (COMPRESS_THRESHOLD - 1)), str)
+        self.assertIsInstance(CompressedContent.pack(incompressible(2000)), str)
+
+        store, _ = build_store()
+        self.assertIsInstance(store.get('b').content, CompressedContent)
+        self.assertEqual(store.get('a').content, "short note")
+
+        store.update('a', {}, {'content': LONG})
+        self.assertIsInstance(store.get('a').content, CompressedContent)
+        self.assertEqual(store.memory_dict('a')['content'], LONG)
+
+    def test_content_cache_is_bounded_and_follows_updates(self):
+        store = MemoryStore()
+        store.content_cache_size = 3
+        for i in range(5):
+            store.add(f"m{i}", node_data(make_memory(f"m{i}", f"{i} {LONG}")))
+            store.memory_dict(f"m{i}")
+
+        self.assertEqual(list(store._contents), ['m2', 'm3', 'm4'])
+        store.memory_dict('m2')
+        self.assertEqual(list(store._contents), ['m3', 'm4', 'm2'])
+
+        # A rewritten content isn't served from the stale cache entry
+        store.update('m2', {}, {'content': f"new {LONG}"})
+        self.assertEqual(store.memory_dict('m2')['content'], f"new {LONG}")
+        store.remove('m3')
+        self.assertNotIn('m3', store._contents)
+
+class TestContentlessIndexing(TempGraphMixin, unittest.TestCase):
+    def test_indexes_and_stats_never_decompress(self):
+        storage = PickleStorage(self.graph_file)
+        for i in range(5):
+            storage.add_memory(make_memory(f"m{i}", f"{i} {LONG}", i, role='episodic'), [])
+        storage.close()
+
+        storage = PickleStorage(self.graph_file)
+        self.addCleanup(storage.close)
+        with mock.patch('libre_agent.memory_store.zlib.decompress', side_effect=AssertionError("content was decompressed")):
+            self.assertEqual(storage.get_stats()['total_memories'], 5)
+            self.assertEqual(storage.get_memory_ids(), [f"m{i}" for i in range(5)])
+            storage.add_memory(make_memory('new', LONG, 5), ['m0'])
+            storage.update_memory('m1', {'role': 'semantic'}, {})
+            storage.remove_memory('m2')
+            self.assertEqual(storage.get_stats()['role_distribution'], {'episodic': 3, 'semantic': 1, 'unknown': 1})
+
+        self.assertEqual(storage.get_memories_by_id(['m1'])[0]['content'], f"1 {LONG}")
+
+if __name__ == '__main__':
+    unittest.main()
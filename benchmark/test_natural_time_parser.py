@@ -1,6 +1,6 @@
 import unittest
 from datetime import datetime, timedelta
-from natural_time_parser import NaturalTimeParser
+from libre_agent.natural_time_parser import NaturalTimeParser
 
 class TestNaturalTimeParser(unittest.TestCase):
     def setUp(self):
@@ -64,5 +64,40 @@ class TestNaturalTimeParser(unittest.TestCase):
                 with self.assertRaises(ValueError):
                     self.parser.parse(input_str)
 
+    def test_ranges(self):
+        today = datetime(2025, 1, 24)
+        test_cases = [
+            ("yesterday", (today - timedelta(days=1), today)),
+            ("today", (today, today + timedelta(days=1))),
+            ("this week", (datetime(2025, 1, 20), datetime(2025, 1, 27))),
+            ("last week", (datetime(2025, 1, 13), datetime(2025, 1, 20))),
+            ("last month", (datetime(2024, 12, 1), datetime(2025, 1, 1))),
+            ("past 3 hours", (self.fixed_now - timedelta(hours=3), self.fixed_now)),
+            ("the last 2 days", (self.fixed_now - timedelta(days=2), self.fixed_now)),
+            ("3 days ago", (datetime(2025, 1, 21), datetime(2025, 1, 22))),
+            ("last Tuesday", (datetime(2025, 1, 21), datetime(2025, 1, 22))),
+            ("wednesday", (datetime(2025, 1, 22), datetime(2025, 1, 23))),
+            ("last night", (datetime(2025, 1, 23, 18), datetime(2025, 1, 24, 6))),
+            ("since monday", (datetime(2025, 1, 20), None)),
+            ("before yesterday", (None, today - timedelta(days=1))),
+            ("between monday and wednesday", (datetime(2025, 1, 20), datetime(2025, 1, 23))),
+            ("2025-01-01", (datetime(2025, 1, 1), datetime(2025, 1, 2))),
+        ]
+
+        for input_str, expected in test_cases:
+            with self.subTest(input=input_str):
+                self.assertEqual(self.parser.parse_range(input_str), expected)
+
+    def test_find_range(self):
+        self.assertEqual(
+            self.parser.find_range("What did I do yesterday"),
+            (datetime(2025, 1, 23), datetime(2025, 1, 24), "What did I do")
+        )
+        self.assertEqual(
+            self.parser.find_range("pancakes between monday and wednesday"),
+            (datetime(2025, 1, 20), datetime(2025, 1, 23), "pancakes")
+        )
+        self.assertIsNone(self.parser.find_range("the last thing we talked about"))
+
 if __name__ == '__main__':
     unittest.main()
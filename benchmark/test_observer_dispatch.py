@@ -0,0 +1,171 @@
+import asyncio
+import threading
+import time
+import unittest
+
+from libre_agent.observer_dispatch import ObserverChannel
+from libre_agent.working_memory import WorkingMemoryAsync
+from benchmark.memory_corpus import make_memory
+
+class TestObserverChannel(unittest.IsolatedAsyncioTestCase):
+    async def asyncSetUp(self):
+        self.loop = asyncio.get_running_loop()
+        self.received = []
+        self.release = asyncio.Event()
+        self.channels = []
+
+    async def asyncTearDown(self):
+        for channel in self.channels:
+            channel.close()
+
+    def open(self, observer=None, **options):
+        channel = ObserverChannel(observer or self.observer, self.loop, **options)
+        self.channels.append(channel)
+        return channel
+
+    async def observer(self, memory):
+        await self.release.wait()
+        self.received.append(memory['content'])
+
+    async def drain(self, channel, count):
+        self.release.set()
+        for _ in range(100):
+            if channel.stats()['delivered'] >= count:
+                return
+            await asyncio.sleep(0.01)
+
+    async def test_drop_oldest(self):
+        channel = self.open(capacity=2, overflow='drop_oldest')
+        channel.put(make_memory('a'))
+        # Let the worker take 'a' and block on it
+        await asyncio.sleep(0.01)
+        for memory_id in ('b', 'c', 'd'):
+            channel.put(make_memory(memory_id))
+
+        await self.drain(channel, 3)
+        self.assertEqual(self.received, ['a', 'c', 'd'])
+        self.assertEqual(channel.stats()['dropped'], 1)
+        self.assertEqual(channel.stats()['delivered'], 3)
+
+    async def test_coalesce_keeps_the_latest_version_in_place(self):
+        channel = self.open(capacity=2, overflow='coalesce')
+        channel.put(make_memory('a'))
+        await asyncio.sleep(0.01)
+        channel.put(make_memory('b', 'b1'))
+        channel.put(make_memory('c'))
+        channel.put(make_memory('b', 'b2'))
+        channel.put(make_memory('d'))
+
+        await self.drain(channel, 3)
+        # 'b' was folded into its pending entry, 'd' still had to drop the oldest
+        self.assertEqual(self.received, ['a', 'c', 'd'])
+        self.assertEqual(channel.stats()['coalesced'], 1)
+        self.assertEqual(channel.stats()['dropped'], 1)
+
+    async def test_coalesce_delivers_the_latest_content(self):
+        channel = self.open(capacity=5, overflow='coalesce')
+        channel.put(make_memory('a'))
+        await asyncio.sleep(0.01)
+        channel.put(make_memory('b', 'b1'))
+        channel.put(make_memory('b', 'b2'))
+
+        await self.drain(channel, 2)
+        self.assertEqual(self.received, ['a', 'b2'])
+
+    async def test_block_waits_for_room_off_the_loop(self):
+        self.release.set()
+        delivered = []
+
+        def slow_observer(memory):
+            time.sleep(0.02)
+            delivered.append(memory['memory_id'])
+
+        channel = self.open(slow_observer, capacity=1, overflow='block')
+        producer = threading.Thread(target=lambda: [channel.put(make_memory(f"m{i}")) for i in range(5)])
+        producer.start()
+        while producer.is_alive():
+            await asyncio.sleep(0.01)
+        producer.join()
+        await self.drain(channel, 5)
+
+        self.assertEqual(delivered, [f"m{i}" for i in range(5)])
+        self.assertEqual(channel.stats()['dropped'], 0)
+
+    async def test_block_never_blocks_the_event_loop(self):
+        channel = self.open(capacity=1, overflow='block')
+        channel.put(make_memory('a'))
+        await asyncio.sleep(0.01)
+        channel.put(make_memory('b'))
+
+        started = time.monotonic()
+        channel.put(make_memory('c'))
+        self.assertLess(time.monotonic() - started, ObserverChannel.block_timeout)
+        self.assertEqual(channel.stats()['dropped'], 1)
+
+    async def test_batches_and_failures(self):
+        batches = []
+
+        def batch_observer(memories):
+            batches.append([memory['memory_id'] for memory in memories])
+            if len(batches) == 1:
+                raise RuntimeError("observer failure")
+
+        channel = self.open(batch_observer, batch=True)
+        for i in range(3):
+            channel.put(make_memory(f"m{i}"))
+        await asyncio.sleep(ObserverChannel.batch_window + 0.05)
+        channel.put(make_memory('m3'))
+        await asyncio.sleep(ObserverChannel.batch_window + 0.05)
+
+        self.assertEqual(batches, [['m0', 'm1', 'm2'], ['m3']])
+        self.assertEqual(channel.stats()['errors'], 1)
+        self.assertEqual(channel.stats()['delivered'], 1)
+
+    async def test_slow_coroutines_time_out(self):
+        channel = self.open(timeout=0.01)
+        channel.put(make_memory('a'))
+        await asyncio.sleep(0.05)
+
+        self.assertEqual(channel.stats()['timeouts'], 1)
+        self.assertEqual(self.received, [])
+
+    async def test_zero_timeout_waits_indefinitely(self):
+        channel = self.open(timeout=0)
+        channel.put(make_memory('a'))
+        await asyncio.sleep(0.02)
+
+        await self.drain(channel, 1)
+        self.assertEqual(channel.stats()['timeouts'], 0)
+        self.assertEqual(self.received, ['a'])
+
+    async def test_unknown_policy(self):
+        with self.assertRaises(ValueError):
+            ObserverChannel(self.observer, self.loop, overflow='spill')
+
+class TestWorkingMemoryAsyncObservers(unittest.IsolatedAsyncioTestCase):
+    async def test_a_slow_observer_does_not_hold_up_the_others(self):
+        working_memory = WorkingMemoryAsync()
+        fast, slow = [], []
+        release = asyncio.Event()
+
+        async def slow_observer(memory):
+            await release.wait()
+            slow.append(memory['memory_id'])
+
+        working_memory.register_observer(slow_observer)
+        working_memory.register_observer(lambda memories: fast.extend(memory['memory_id'] for memory in memories), batch=True)
+
+        first = working_memory.add_memory('internal', "first")
+        second = working_memory.add_memory('internal', "second")
+        await asyncio.sleep(ObserverChannel.batch_window + 0.05)
+        self.assertEqual(fast, [first['memory_id'], second['memory_id']])
+        self.assertEqual(slow, [])
+
+        release.set()
+        await asyncio.sleep(0.02)
+        self.assertEqual(slow, [first['memory_id'], second['memory_id']])
+        self.assertEqual([stats['delivered'] for stats in working_memory.observer_stats()], [2, 2])
+        working_memory.clear_observers()
+
+if __name__ == '__main__':
+    unittest.main()
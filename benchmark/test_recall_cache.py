@@ -0,0 +1,69 @@
+import time
+import unittest
+
+from libre_agent.recall_cache import RecallCache
+
+def make_key(query="what did we eat", exclude_ids=(), version=1, **kwargs):
+    options = {'number': 5, 'strategy': 'rerank', 'expand': False, 'time_range': (None, None)}
+    options.update(kwargs)
+    return RecallCache.key(query, options['number'], exclude_ids, options['strategy'], options['expand'], options['time_range'], version)
+
+class TestRecallCache(unittest.TestCase):
+    def setUp(self):
+        self.cache = RecallCache(capacity=3, ttl=60)
+
+    def test_key_normalizes_query_and_exclusions(self):
+        self.assertEqual(make_key("What  did we\teat ", ['b', 'a']), make_key("what did we eat", ('a', 'b', 'a')))
+        self.assertNotEqual(make_key(number=5), make_key(number=6))
+        self.assertNotEqual(make_key(strategy='rerank'), make_key(strategy='vector'))
+        self.assertNotEqual(make_key(expand=False), make_key(expand=True))
+        self.assertNotEqual(make_key(time_range=(None, None)), make_key(time_range=(1, None)))
+        self.assertNotEqual(make_key(exclude_ids=['a']), make_key(exclude_ids=[]))
+
+    def test_results_are_copied_in_and_out(self):
+        result = [{'memory_id': 'a', 'metadata': {}}]
+        self.cache.put(make_key(), result)
+        result[0]['metadata']['recalled'] = True
+
+        cached = self.cache.get(make_key())
+        self.assertEqual(cached, [{'memory_id': 'a', 'metadata': {}}])
+        cached[0]['metadata']['recalled'] = True
+        self.assertEqual(self.cache.get(make_key()), [{'memory_id': 'a', 'metadata': {}}])
+        self.assertEqual(self.cache.stats()['hits'], 2)
+
+    def test_new_graph_version_drops_older_entries(self):
+        self.cache.put(make_key("first", version=1), ['a'])
+        self.cache.put(make_key("second", version=1), ['b'])
+        self.assertEqual(self.cache.stats()['size'], 2)
+
+        self.assertIsNone(self.cache.get(make_key("first", version=2)))
+        self.cache.put(make_key("third", version=2), ['c'])
+        self.assertEqual(self.cache.stats()['size'], 1)
+        self.assertIsNone(self.cache.get(make_key("first", version=1)))
+
+    def test_least_recently_used_entry_is_evicted(self):
+        for query in ("a", "b", "c"):
+            self.cache.put(make_key(query), [query])
+        self.cache.get(make_key("a"))
+        self.cache.put(make_key("d"), ["d"])
+
+        self.assertIsNone(self.cache.get(make_key("b")))
+        self.assertEqual(self.cache.get(make_key("a")), ["a"])
+        self.assertEqual(self.cache.stats()['size'], 3)
+
+    def test_entries_expire(self):
+        self.cache.ttl = 0.01
+        self.cache.put(make_key(), ['a'])
+        time.sleep(0.02)
+
+        self.assertIsNone(self.cache.get(make_key()))
+        self.assertEqual(self.cache.stats()['size'], 0)
+
+    def test_disabled_cache_stores_nothing(self):
+        cache = RecallCache(capacity=0)
+        cache.put(make_key(), ['a'])
+        self.assertIsNone(cache.get(make_key()))
+        self.assertEqual(cache.stats()['misses'], 0)
+
+if __name__ == '__main__':
+    unittest.main()
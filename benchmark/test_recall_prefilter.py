@@ -0,0 +1,106 @@
+import time
+import unittest
+
+from libre_agent.memory_access import AccessTracker
+from libre_agent.memory_graph import MemoryGraph
+from libre_agent.recall_prefilter import RecallPrefilter
+from benchmark.memory_corpus import TempGraphMixin, make_memory
+
+DAY = 24 * 3600
+
+def candidate(memory_id, score, lexical):
+    return {'memory': make_memory(memory_id), 'score': score, 'lexical': lexical}
+
+class TestSelect(TempGraphMixin, unittest.TestCase):
+    def setUp(self):
+        super().setUp()
+        self.memory_graph = MemoryGraph.for_file(self.graph_file)
+        self.now = time.time()
+
+    def tearDown(self):
+        AccessTracker.for_graph(self.memory_graph).flush()
+
+    def add(self, content, days_ago=0, **metadata):
+        return self.memory_graph.add_memory('internal', content, metadata, timestamp=self.now - days_ago * DAY)['memory_id']
+
+    def select(self, query, prefilter=None, **kwargs):
+        prefilter = prefilter or RecallPrefilter()
+        return [(candidate['memory']['memory_id'], candidate) for candidate in prefilter.select(query, memory_graph=self.memory_graph, **kwargs)]
+
+    def ranking(self, query, **kwargs):
+        return [memory_id for memory_id, _ in self.select(query, **kwargs)]
+
+    def test_each_signal_orders_the_candidates(self):
+        dentist = self.add("dentist appointment on friday", days_ago=3)
+        recent = self.add("walked the dog", days_ago=1)
+        old = self.add("watered the garden", days_ago=3)
+        important = self.add("passport renewal", days_ago=3, priority_level='HIGH')
+        used = self.add("favourite pasta recipe", days_ago=3, recall_count=10)
+
+        lexical = RecallPrefilter(recency_weight=0, priority_weight=0, usage_weight=0)
+        self.assertEqual(self.ranking("dentist", prefilter=lexical)[0], dentist)
+
+        ranked = self.ranking("", prefilter=RecallPrefilter(lexical_weight=0, priority_weight=0, usage_weight=0))
+        self.assertLess(ranked.index(recent), ranked.index(old))
+
+        ranked = self.ranking("", prefilter=RecallPrefilter(lexical_weight=0, recency_weight=0, usage_weight=0))
+        self.assertEqual(ranked[0], important)
+
+        ranked = self.ranking("", prefilter=RecallPrefilter(lexical_weight=0, recency_weight=0, priority_weight=0))
+        self.assertEqual(ranked[0], used)
+
+    def test_scores_blend_the_signals(self):
+        self.add("dentist appointment on friday", days_ago=1, priority_level='MEDIUM', recall_count=10)
+        self.add("dentist bill", days_ago=1)
+        [(_, best), _] = self.select("dentist appointment")
+
+        self.assertEqual(best['lexical'], 1.0)
+        # Full lexical match, one half-life old, priority 0.5 and the maximal usage
+        self.assertAlmostEqual(best['score'], 1.0 + 0.3 * 0.5 + 0.3 * 0.5 + 0.2 * 1.0, places=3)
+
+    def test_exclusions_and_limits(self):
+        memory_ids = [self.add(f"dentist visit {i}", days_ago=i) for i in range(5)]
+
+        found = self.ranking("dentist", exclude_ids=memory_ids[:2], k=2)
+        self.assertEqual(len(found), 2)
+        self.assertFalse(set(found) & set(memory_ids[:2]))
+
+    def test_time_range_restricts_both_pools(self):
+        week_old = self.add("dentist appointment", days_ago=7)
+        yesterday = self.add("dentist appointment again", days_ago=1)
+        today = self.add("walked the dog")
+
+        self.assertEqual(set(self.ranking("dentist", since=self.now - 2 * DAY)), {yesterday, today})
+        self.assertEqual(self.ranking("dentist", until=self.now - 2 * DAY), [week_old])
+        self.assertEqual(self.ranking("dentist", since=self.now - 2 * DAY, until=self.now - DAY / 2), [yesterday])
+
+class TestDecisive(unittest.TestCase):
+    def setUp(self):
+        self.prefilter = RecallPrefilter()
+
+    def ids(self, memories):
+        return None if memories is None else [memory['memory_id'] for memory in memories]
+
+    def test_clear_leaders_skip_the_model(self):
+        scored = [candidate('a', 1.6, 1.0), candidate('b', 1.5, 0.9), candidate('c', 0.9, 0.2), candidate('d', 0.5, 0.0)]
+        self.assertEqual(self.ids(self.prefilter.decisive(scored)), ['a', 'b'])
+        self.assertEqual(self.ids(self.prefilter.decisive(scored, number=2)), ['a', 'b'])
+
+    def test_close_or_weak_candidates_defer_to_the_recognizer(self):
+        # Not far enough ahead of the runner-up
+        self.assertIsNone(self.prefilter.decisive([candidate('a', 1.2, 1.0), candidate('b', 1.0, 0.3)]))
+        # A requested memory with a weak lexical match
+        self.assertIsNone(self.prefilter.decisive([candidate('a', 1.6, 1.0), candidate('b', 1.5, 0.4), candidate('c', 0.5, 0.0)], number=2))
+        # No strong match at all
+        self.assertIsNone(self.prefilter.decisive([candidate('a', 0.9, 0.3), candidate('b', 0.2, 0.0)]))
+        # Nothing left to compare against
+        self.assertIsNone(self.prefilter.decisive([candidate('a', 1.6, 1.0), candidate('b', 1.5, 1.0)]))
+        self.assertIsNone(self.prefilter.decisive([]))
+
+    def test_fast_path_can_be_turned_off(self):
+        scored = [candidate('a', 1.6, 1.0), candidate('b', 0.5, 0.0)]
+        self.assertEqual(self.ids(self.prefilter.decisive(scored)), ['a'])
+        self.assertIsNone(RecallPrefilter(fast_path=False).decisive(scored))
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,120 @@
+import threading
+import time
+import unittest
+from types import SimpleNamespace
+from unittest import mock
+
+from libre_agent.memory_access import AccessTracker
+from libre_agent.memory_graph import memory_graph, memory_graph_file_ctx
+from libre_agent.recall_cache import RecallCache
+from libre_agent.recall_recognizer import RecallRecognizer
+from libre_agent.tools.recall_tool import RecallTool
+from libre_agent.working_memory import WorkingMemory
+from benchmark.memory_corpus import TempGraphMixin, make_memory
+
+MEMORIES = [make_memory(f"mem-{i:08x}") for i in range(10)]
+
+def ids(memories):
+    return [memory['memory_id'] for memory in memories]
+
+class TestRecognizeShard(unittest.TestCase):
+    @mock.patch('libre_agent.recall_recognizer.ChatCycle')
+    def test_reply_ids_are_parsed(self, chat_cycle):
+        chat_cycle.return_value.run.return_value = SimpleNamespace(content="Relevant memory ids: mem-00000001, mem-00000003, mem-00000001")
+        recognized = RecallRecognizer(MEMORIES).recognize_shard("prompt", MEMORIES[:4])
+        self.assertEqual(recognized, {'mem-00000001', 'mem-00000003'})
+
+    @mock.patch('libre_agent.recall_recognizer.ChatCycle')
+    def test_failed_calls_return_none(self, chat_cycle):
+        chat_cycle.return_value.run.side_effect = TimeoutError("model timed out")
+        self.assertIsNone(RecallRecognizer(MEMORIES).recognize_shard("prompt", MEMORIES[:4]))
+
+class TestRecognizeShards(unittest.TestCase):
+    def setUp(self):
+        self.release = threading.Event()
+        self.addCleanup(self.release.set)
+
+    def recognize(self, behaviour, **options):
+        """Recall over MEMORIES in shards of 3, with `behaviour(index, shard)` standing in for the model call."""
+        recognizer = RecallRecognizer(MEMORIES, shard_size=3, **options)
+
+        def recognize_shard(prompt, shard):
+            return behaviour(MEMORIES.index(shard[0]) // 3, shard)
+
+        with mock.patch.object(recognizer, 'recognize_shard', side_effect=recognize_shard):
+            recalled = recognizer.recall_memories("prompt")
+        return recognizer, ids(recalled)
+
+    def test_merged_ids_are_deduplicated_in_memory_order(self):
+        def behaviour(index, shard):
+            # Every shard also names the first memory, and one made up id
+            return {shard[-1]['memory_id'], MEMORIES[0]['memory_id'], 'mem-ffffffff'}
+
+        recognizer, recalled = self.recognize(behaviour, parallelism=2)
+        self.assertEqual(recalled, ids([MEMORIES[0], MEMORIES[2], MEMORIES[5], MEMORIES[8], MEMORIES[9]]))
+        self.assertEqual(recognizer.errors, 0)
+
+    def test_slow_shards_are_dropped(self):
+        def behaviour(index, shard):
+            if index == 1:
+                self.release.wait(5)
+            return {shard[0]['memory_id']}
+
+        started = time.monotonic()
+        recognizer, recalled = self.recognize(behaviour, parallelism=4, shard_timeout=0.2)
+        self.assertLess(time.monotonic() - started, 1.0)
+        self.assertEqual(recalled, ids([MEMORIES[0], MEMORIES[6], MEMORIES[9]]))
+        self.assertEqual(recognizer.errors, 1)
+
+    def test_queued_shards_start_their_clock_when_they_run(self):
+        def behaviour(index, shard):
+            time.sleep(0.2)
+            return {shard[0]['memory_id']}
+
+        # Two workers, four shards of 0.2s: the last two finish after 0.4s, within 0.3s of their own start
+        recognizer, recalled = self.recognize(behaviour, parallelism=2, shard_timeout=0.3)
+        self.assertEqual(recalled, ids([MEMORIES[0], MEMORIES[3], MEMORIES[6], MEMORIES[9]]))
+        self.assertEqual(recognizer.errors, 0)
+
+    def test_failed_shards_are_counted(self):
+        recognizer, recalled = self.recognize(lambda index, shard: None if index == 2 else {shard[0]['memory_id']}, parallelism=2)
+        self.assertEqual(recalled, ids([MEMORIES[0], MEMORIES[3], MEMORIES[9]]))
+        self.assertEqual(recognizer.errors, 1)
+
+class TestRecallCacheGate(TempGraphMixin, unittest.TestCase):
+    def setUp(self):
+        super().setUp()
+        token = memory_graph_file_ctx.set(self.graph_file)
+        self.addCleanup(memory_graph_file_ctx.reset, token)
+
+        self.addCleanup(RecallRecognizer.configure, shard_size=RecallRecognizer.shard_size)
+        RecallRecognizer.configure(shard_size=3)
+
+        self.tool = RecallTool(WorkingMemory())
+        self.tool.cache = RecallCache()
+        self.tool.prefilter = mock.Mock(candidates=30)
+        # Copies, RecallTool flags what it recalls
+        self.tool.prefilter.select.side_effect = lambda *args, **kwargs: [
+            {'memory': make_memory(memory['memory_id']), 'score': 0.0, 'lexical': 0.0} for memory in MEMORIES
+        ]
+        self.tool.prefilter.decisive.return_value = None
+
+    def tearDown(self):
+        AccessTracker.for_graph(memory_graph).flush()
+
+    def run_recall(self, failing):
+        def recognize_shard(prompt, shard):
+            return None if failing and shard[0]['memory_id'] == MEMORIES[3]['memory_id'] else {shard[0]['memory_id']}
+
+        with mock.patch.object(RecallRecognizer, 'recognize_shard', side_effect=recognize_shard):
+            self.assertTrue(self.tool.run(filter="breakfast"))
+
+    def test_recalls_with_failed_shards_are_not_cached(self):
+        self.run_recall(failing=True)
+        self.assertEqual(self.tool.cache.stats()['size'], 0)
+
+        self.run_recall(failing=False)
+        self.assertEqual(self.tool.cache.stats()['size'], 1)
+
+if __name__ == '__main__':
+    unittest.main()
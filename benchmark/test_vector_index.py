@@ -0,0 +1,92 @@
+import unittest
+
+from libre_agent.memory_graph import MemoryGraph
+from libre_agent.vector_index import HashingEmbedder, VectorIndex
+from benchmark.memory_corpus import TempGraphMixin, make_memory
+
+TOPICS = ['cats', 'trains', 'gardening', 'chess', 'baking', 'sailing']
+
+class TestVectorIndex(TempGraphMixin, unittest.TestCase):
+    def setUp(self):
+        super().setUp()
+        self.index = VectorIndex(self.graph_file)
+        self.index.add([make_memory(topic, f"notes about {topic} and more {topic}") for topic in TOPICS])
+
+    def reload(self):
+        return VectorIndex(self.graph_file)
+
+    def test_search_ranks_matching_memories_first(self):
+        self.assertEqual(self.index.search("chess openings", k=1)[0][0], 'chess')
+        self.assertEqual(len(self.index.search("anything", k=100)), len(TOPICS))
+
+        excluded = [memory_id for memory_id, _ in self.index.search("chess", k=100, exclude_ids=['chess'])]
+        self.assertEqual(sorted(excluded), sorted(topic for topic in TOPICS if topic != 'chess'))
+
+    def test_remove_keeps_the_matrix_dense(self):
+        self.index.remove(['trains', 'unknown'])
+
+        self.assertEqual(len(self.index), len(TOPICS) - 1)
+        self.assertNotIn('trains', self.index)
+        # The last column moved into the freed slot and still answers for its memory
+        self.assertEqual(self.index.search("sailing", k=1)[0][0], 'sailing')
+        self.assertNotIn('trains', [memory_id for memory_id, _ in self.index.search("trains", k=10)])
+
+    def test_journal_is_replayed_on_reload(self):
+        self.index.remove(['cats'])
+        self.index.add([make_memory('chess', "notes about baking bread")])
+
+        self.assertFalse(self.index.vector_file.exists())
+        reloaded = self.reload()
+        self.assertEqual(sorted(reloaded._ids), sorted(topic for topic in TOPICS if topic != 'cats'))
+        self.assertEqual(reloaded.search("chess", k=5), self.index.search("chess", k=5))
+        self.assertEqual(reloaded.search("bread", k=1)[0][0], 'chess')
+
+    def test_snapshot_plus_journal_reload(self):
+        self.index.compact()
+        self.assertTrue(self.index.vector_file.exists())
+        self.assertFalse(self.index.journal_file.exists())
+        self.index.remove(['sailing'])
+
+        reloaded = self.reload()
+        self.assertEqual(len(reloaded), len(TOPICS) - 1)
+        self.assertNotIn('sailing', reloaded)
+        self.assertEqual(reloaded.search("gardening", k=3), self.index.search("gardening", k=3))
+
+    def test_corrupt_journal_tail_is_truncated(self):
+        intact_size = self.index.journal_file.stat().st_size
+        with open(self.index.journal_file, "ab") as f:
+            f.write(b"\x80\x04\x95garbage")
+
+        reloaded = self.reload()
+        self.assertEqual(len(reloaded), len(TOPICS))
+        self.assertEqual(self.index.journal_file.stat().st_size, intact_size)
+
+    def test_vectors_of_another_embedder_are_discarded(self):
+        self.index.compact()
+        reloaded = VectorIndex(self.graph_file, embedder=HashingEmbedder(dim=64))
+
+        self.assertEqual(len(reloaded), 0)
+        self.assertFalse(reloaded.vector_file.exists())
+
+class TestVectorIndexSync(TempGraphMixin, unittest.TestCase):
+    def setUp(self):
+        super().setUp()
+        self.memory_graph = MemoryGraph.for_file(self.graph_file)
+
+    def test_sync_only_runs_when_the_graph_changed(self):
+        memories = [self.memory_graph.add_memory('internal', f"notes about {topic}") for topic in TOPICS]
+        index = VectorIndex(self.memory_graph.graph_file)
+
+        self.assertEqual(index.sync(self.memory_graph), (len(TOPICS), 0))
+        self.assertEqual(index.sync(self.memory_graph), (0, 0))
+
+        self.memory_graph.remove_memory(memories[0]['memory_id'])
+        self.assertEqual(index.sync(self.memory_graph), (0, 1))
+
+        # The delta is journaled, so a reload doesn't need another full sync
+        reloaded = VectorIndex(self.memory_graph.graph_file)
+        self.assertEqual(len(reloaded), len(TOPICS) - 1)
+        self.assertNotIn(memories[0]['memory_id'], reloaded)
+
+if __name__ == '__main__':
+    unittest.main()
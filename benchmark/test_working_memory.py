@@ -0,0 +1,144 @@
+import random
+import unittest
+from collections import deque
+
+from libre_agent.working_memory import WorkingMemory
+from benchmark.memory_corpus import make_memory
+
+class WorkingMemoryTestCase(unittest.TestCase):
+    def assertIndexesConsistent(self, working_memory):
+        memories = working_memory.memories
+        self.assertEqual(sorted(working_memory._by_id), sorted({memory['memory_id'] for memory in memories}))
+
+        for role_key, entries in working_memory._by_role.items():
+            expected = [memory for memory in memories if working_memory._role_key(memory) == role_key]
+            self.assertEqual(list(entries.values()), expected)
+        for recalled, entries in working_memory._by_recalled.items():
+            expected = [memory for memory in memories if bool(memory['metadata'].get('recalled')) == recalled]
+            self.assertEqual(list(entries.values()), expected)
+        self.assertEqual(list(working_memory._evictable.values()), [memory for memory in memories if not working_memory._protected(memory)])
+        self.assertEqual(working_memory.token_count, sum(working_memory.token_counter(memory) for memory in memories))
+
+class TestWorkingMemoryIndexes(WorkingMemoryTestCase):
+    def test_lookups_follow_every_mutation(self):
+        rng = random.Random(7)
+        working_memory = WorkingMemory()
+        roles = [('message', 'User'), ('message', 'ReasoningUnit'), ('reflection', 'ReasoningUnit')]
+
+        for step in range(400):
+            action = rng.random()
+            ids = list(working_memory._by_id)
+            if action < 0.6 or not ids:
+                role, unit_name = rng.choice(roles)
+                working_memory.append_memory(make_memory(f"m{step}", timestamp=step, role=role, unit_name=unit_name, recalled=rng.random() < 0.2))
+            elif action < 0.8:
+                working_memory.update_memory(rng.choice(ids), metadata={'recalled': rng.random() < 0.5, 'role': rng.choice(roles)[0]})
+            else:
+                working_memory.remove_memory(rng.choice(ids))
+
+        self.assertLessEqual(len(working_memory.memories), WorkingMemory.max_memories)
+        self.assertIndexesConsistent(working_memory)
+        for metadata in ({'role': 'message', 'unit_name': 'User'}, {'recalled': True}, {'recalled': [False, None]}):
+            with self.subTest(metadata=metadata):
+                expected = [
+                    memory for memory in working_memory.memories
+                    if all(
+                        memory['metadata'].get(key) in value if isinstance(value, list) else memory['metadata'].get(key) == value
+                        for key, value in metadata.items()
+                    )
+                ]
+                self.assertEqual(working_memory.get_memories(metadata=metadata), expected)
+
+    def test_count_cap_drops_the_oldest(self):
+        working_memory = WorkingMemory()
+        working_memory.memories = deque(maxlen=3)
+        for i in range(5):
+            working_memory.append_memory(make_memory(f"m{i}"))
+
+        self.assertEqual([memory['memory_id'] for memory in working_memory.memories], ['m2', 'm3', 'm4'])
+        self.assertNotIn('m1', working_memory)
+        self.assertIndexesConsistent(working_memory)
+
+    def test_update_merges_metadata_and_keeps_order(self):
+        working_memory = WorkingMemory()
+        for i in range(3):
+            working_memory.append_memory(make_memory(f"m{i}", priority_level='LOW'))
+
+        working_memory.update_memory('m0', content="changed", metadata={'recalled': True})
+        self.assertEqual([memory['memory_id'] for memory in working_memory.memories], ['m0', 'm1', 'm2'])
+        self.assertEqual(working_memory.get_memory('m0')['content'], "changed")
+        self.assertEqual(working_memory.get_memory('m0')['metadata']['priority_level'], 'LOW')
+        self.assertEqual(working_memory.get_memories(metadata={'recalled': True}), [working_memory.get_memory('m0')])
+        self.assertIsNone(working_memory.update_memory('missing', metadata={}))
+        self.assertIndexesConsistent(working_memory)
+
+    def test_last_messages(self):
+        working_memory = WorkingMemory()
+        working_memory.add_interaction('user', "hello")
+        working_memory.add_interaction('assistant', "hi there")
+        working_memory.add_interaction('user', "how are you?")
+
+        self.assertEqual(working_memory.get_last_user_input(), "how are you?")
+        self.assertEqual(working_memory.get_last_assistant_output(), "hi there")
+
+        working_memory.remove_memory(working_memory.memories[-1]['memory_id'])
+        self.assertEqual(working_memory.get_last_user_input(), "hello")
+
+class BudgetedWorkingMemory(WorkingMemory):
+    token_budget = 100
+    token_counter = staticmethod(lambda memory: memory['metadata'].get('tokens', 10))
+
+class TestTokenBudget(WorkingMemoryTestCase):
+    def ids(self, working_memory):
+        return [memory['memory_id'] for memory in working_memory.memories]
+
+    def test_oldest_unprotected_entries_go_first(self):
+        working_memory = BudgetedWorkingMemory()
+        working_memory.append_memory(make_memory('core', priority_level='CORE', tokens=30))
+        working_memory.append_memory(make_memory('old', tokens=30))
+        working_memory.append_memory(make_memory('recalled', recalled=True, tokens=30))
+        working_memory.append_memory(make_memory('new', tokens=30))
+
+        self.assertEqual(self.ids(working_memory), ['core', 'recalled', 'new'])
+        self.assertEqual(working_memory.token_count, 90)
+        self.assertEqual(working_memory.usage(), "90/100 tokens")
+        self.assertIndexesConsistent(working_memory)
+
+    def test_protected_entries_are_never_evicted(self):
+        working_memory = BudgetedWorkingMemory()
+        for i in range(3):
+            working_memory.append_memory(make_memory(f"core{i}", priority_level='CORE', tokens=40))
+        working_memory.append_memory(make_memory('newest', tokens=40))
+
+        # Over budget, but only protected entries and the newest one are left
+        self.assertEqual(self.ids(working_memory), ['core0', 'core1', 'core2', 'newest'])
+        self.assertEqual(working_memory.token_count, 160)
+
+        working_memory.append_memory(make_memory('newer', tokens=10))
+        self.assertEqual(self.ids(working_memory), ['core0', 'core1', 'core2', 'newer'])
+
+    def test_updates_are_recounted_and_keep_their_age(self):
+        working_memory = BudgetedWorkingMemory()
+        for i in range(4):
+            working_memory.append_memory(make_memory(f"m{i}", tokens=20))
+
+        # Growing m2 pushes the total over budget; m0 is still the oldest
+        working_memory.update_memory('m2', metadata={'tokens': 50})
+        self.assertEqual(self.ids(working_memory), ['m1', 'm2', 'm3'])
+        self.assertEqual(working_memory.token_count, 90)
+
+        # Recalling an entry protects it from then on
+        working_memory.update_memory('m1', metadata={'recalled': True})
+        working_memory.append_memory(make_memory('m4', tokens=20))
+        self.assertEqual(self.ids(working_memory), ['m1', 'm3', 'm4'])
+        self.assertIndexesConsistent(working_memory)
+
+    def test_no_count_cap_in_token_mode(self):
+        working_memory = BudgetedWorkingMemory()
+        for i in range(WorkingMemory.max_memories + 10):
+            working_memory.append_memory(make_memory(f"m{i}", tokens=1))
+
+        self.assertEqual(len(working_memory.memories), WorkingMemory.max_memories + 10)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -77,7 +77,9 @@ def register_engine(chat_id: int):
         memory_graph_file=f"{config['memory_graph_file']}_{chat_id}" if config['memory_graph_file'] else None,
     )
 
-    # Register observer for proactive messages
+    # Register observer for proactive messages. It runs on its own
+    # ObserverChannel, so a slow Telegram API call only delays this chat's
+    # messages, never the engine
     async def proactive_handler(memory):
         if (memory['memory_type'] == 'external' and memory['metadata'].get('unit_name') == 'ReasoningUnit'):
             await send_message(
@@ -0,0 +1,237 @@
+import re
+import math
+import time
+import threading
+
+from libre_agent.logger import logger
+from libre_agent.memory_graph import memory_graph as default_memory_graph
+from libre_agent.memory_eviction import PRIORITY_WEIGHTS, MAX_PRIORITY
+from libre_agent.memory_access import AccessTracker, last_used
+
+# Priority levels from most to least valuable; downgrading moves one step right
+PRIORITY_LEVELS = sorted(PRIORITY_WEIGHTS, key=PRIORITY_WEIGHTS.get, reverse=True)
+
+ACTIONS = ('delete', 'downgrade', 'consolidate')
+
+def normalize_content(content):
+    """Lowercase `content` and drop punctuation and extra whitespace, for duplicate detection."""
+    return " ".join(re.findall(r"\w+", str(content or "").lower()))
+
+class ForgetRecognizer:
+    """
+    Deterministic forgetting: scores every stored memory and decides which
+    ones to delete, downgrade or queue for consolidation, without any LLM
+    call.
+
+    A memory's score is a weighted sum of its recency (since it was last
+    stored, recalled or updated, halving every `half_lives[temporal_scope]`
+    seconds), priority_level and recall frequency, each between 0 and 1.
+    Memories scoring below `delete_below` are deleted; below
+    `downgrade_below` they lose one priority level (at most once per
+    `downgrade_cooldown`), or, for `consolidate_roles`, are flagged with
+    metadata `consolidate=True` so a deep reflection can merge them into
+    condensed memories. Copies of the same content are resolved with
+    `duplicate_action`, keeping the best scoring one.
+
+    CORE memories, `protected_roles` and memories younger than `min_age`
+    are never touched. With MemoryGraph archiving on, deleted memories are
+    moved to the archive (the cold tier) rather than lost. `forget` applies
+    a plan in one transaction; `plan` only computes it.
+    """
+
+    half_lives = {
+        'working_memory': 24 * 3600,
+        'short_term': 7 * 24 * 3600,
+        'long_term': 90 * 24 * 3600,
+    }
+    recency_weight = 0.5
+    priority_weight = 0.35
+    access_weight = 0.15
+    # Recall count at which the access part of the score is maxed out
+    frequent_recalls = 10
+
+    delete_below = 0.1
+    downgrade_below = 0.25
+    consolidate_roles = ('reflection', 'episodic')
+    duplicate_action = 'delete'
+    downgrade_cooldown = 24 * 3600
+    min_age = 3600
+    protected_roles = ('personality',)
+
+    def __init__(self, memory_graph=None, dry_run=False):
+        self.memory_graph = memory_graph or default_memory_graph
+        self.dry_run = dry_run
+        self._running = threading.Lock()
+
+    @classmethod
+    def configure(cls, **settings):
+        for key, value in settings.items():
+            if not hasattr(cls, key) or callable(getattr(cls, key)):
+                raise ValueError(f"Unknown ForgetRecognizer setting '{key}'")
+            if key == 'duplicate_action' and value not in ACTIONS:
+                raise ValueError(f"Unknown forget action '{value}'. Available: {', '.join(ACTIONS)}")
+            setattr(cls, key, value)
+
+    def score(self, memory, now):
+        metadata = memory.get('metadata', {})
+
+        half_life = self.half_lives.get(str(metadata.get('temporal_scope')).lower(), self.half_lives['working_memory'])
+        age = max(now - last_used(memory), 0)
+        recency = 2 ** (-age / half_life)
+
+        level = str(metadata.get('priority_level')).upper()
+        priority = math.log2(PRIORITY_WEIGHTS.get(level, 1.0)) / MAX_PRIORITY
+
+        access = min(math.log1p(metadata.get('recall_count') or 0) / math.log1p(self.frequent_recalls), 1.0)
+        if metadata.get('recalled'):
+            access = max(access, 0.5)
+
+        return self.recency_weight * recency + self.priority_weight * priority + self.access_weight * access
+
+    def protected(self, memory, now):
+        metadata = memory.get('metadata', {})
+        return (
+            str(metadata.get('priority_level')).upper() == 'CORE'
+            or metadata.get('role') in self.protected_roles
+            or now - (memory.get('timestamp') or 0) < self.min_age
+        )
+
+    def duplicates(self, memories, scores):
+        """Return the ids of redundant copies: every memory but the best scoring one per distinct content."""
+        best = {}
+        redundant = set()
+        for memory in memories:
+            content = normalize_content(memory.get('content'))
+            if not content:
+                continue
+            key = (memory.get('memory_type'), content)
+            kept = best.get(key)
+            if kept is None:
+                best[key] = memory
+                continue
+
+            # Keep the higher score, and the newer memory on ties
+            candidate = (scores[memory['memory_id']], memory.get('timestamp') or 0)
+            if candidate > (scores[kept['memory_id']], kept.get('timestamp') or 0):
+                best[key] = memory
+                redundant.add(kept['memory_id'])
+            else:
+                redundant.add(memory['memory_id'])
+        return redundant
+
+    def plan(self, memories=None, now=None):
+        """
+        Return the (action, memory, score) decisions for `memories` (default:
+        every stored memory), lowest scores first. Memories to keep are left
+        out.
+        """
+        now = time.time() if now is None else now
+        if memories is None:
+            memories = self.memory_graph.get_all_memories()
+
+        scores = {memory['memory_id']: self.score(memory, now) for memory in memories}
+        redundant = self.duplicates(memories, scores)
+
+        decisions = []
+        for memory in memories:
+            if self.protected(memory, now):
+                continue
+
+            metadata = memory.get('metadata', {})
+            score = scores[memory['memory_id']]
+            if score < self.delete_below:
+                action = 'delete'
+            elif memory['memory_id'] in redundant:
+                action = self.duplicate_action
+            elif score < self.downgrade_below:
+                if metadata.get('role') in self.consolidate_roles:
+                    action = 'consolidate'
+                elif now - (metadata.get('downgraded_at') or 0) >= self.downgrade_cooldown:
+                    action = 'downgrade'
+                else:
+                    continue
+            else:
+                continue
+
+            if action == 'downgrade' and self._lower_priority(metadata) is None:
+                # Already at the lowest level, let it age out
+                continue
+            if action == 'consolidate' and metadata.get('consolidate'):
+                continue
+            decisions.append((action, memory, score))
+
+        decisions.sort(key=lambda decision: decision[2])
+        return decisions
+
+    @staticmethod
+    def _lower_priority(metadata):
+        level = str(metadata.get('priority_level')).upper()
+        position = PRIORITY_LEVELS.index(level) if level in PRIORITY_LEVELS else len(PRIORITY_LEVELS) - 1
+        if position + 1 >= len(PRIORITY_LEVELS):
+            return None
+        return PRIORITY_LEVELS[position + 1]
+
+    def forget(self, now=None):
+        """
+        Plan and apply one round of forgetting. Returns the number of
+        memories per action; overlapping calls return None without doing
+        anything.
+        """
+        if not self._running.acquire(blocking=False):
+            logger.warning("ForgetRecognizer is already running, skipping this round")
+            return None
+
+        try:
+            now = time.time() if now is None else now
+            start = time.perf_counter()
+            # Score on up to date recall counts
+            AccessTracker.for_graph(self.memory_graph).flush()
+            memories = self.memory_graph.get_all_memories()
+            decisions = self.plan(memories, now)
+
+            counts = dict.fromkeys(ACTIONS, 0)
+            deletes = []
+            updates = []
+            for action, memory, score in decisions:
+                counts[action] += 1
+                logger.debug(f"ForgetRecognizer: {action} {memory['memory_id']} (score {score:.3f})")
+
+                if action == 'delete':
+                    deletes.append(memory)
+                elif action == 'downgrade':
+                    updates.append({
+                        'memory_id': memory['memory_id'],
+                        'metadata': {
+                            'priority_level': self._lower_priority(memory['metadata']),
+                            'downgraded_at': now,
+                        },
+                    })
+                else:
+                    updates.append({'memory_id': memory['memory_id'], 'metadata': {'consolidate': True}})
+
+            # Flagged memories that were upgraded or recalled since no longer need consolidating
+            for memory in memories:
+                if memory['metadata'].get('consolidate') and self.score(memory, now) >= self.downgrade_below:
+                    updates.append({'memory_id': memory['memory_id'], 'metadata': {'consolidate': False}})
+
+            if not self.dry_run and (deletes or updates):
+                deleted = {memory['memory_id'] for memory in deletes}
+                # Archived first: a failed round leaves copies behind, never losses
+                self.memory_graph.archive_memories(deletes)
+                try:
+                    with self.memory_graph.transaction():
+                        self.memory_graph.remove_memories(list(deleted))
+                        self.memory_graph.update_memories([update for update in updates if update['memory_id'] not in deleted])
+                except ValueError as e:
+                    # A memory was removed since it was read; the next round starts from fresh data
+                    logger.warning(f"ForgetRecognizer round abandoned: {e}")
+                    return None
+
+            logger.info(
+                f"ForgetRecognizer {'planned' if self.dry_run else 'applied'} "
+                f"{', '.join(f'{count} {action}' for action, count in counts.items())} "
+                f"over {len(memories)} memories in {(time.perf_counter() - start) * 1000:.1f}ms"
+            )
+            return counts
+        finally:
+            self._running.release()
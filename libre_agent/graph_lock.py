@@ -0,0 +1,154 @@
+import threading
+from contextlib import contextmanager
+from pathlib import Path
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+
+from libre_agent.logger import logger
+
+class FileLock:
+    """
+    Advisory `flock` on a lock file next to the graph, so engines in other
+    processes using the same graph file are serialized too.
+    """
+
+    def __init__(self, lock_file):
+        self.lock_file = Path(str(lock_file))
+        self._fd = None
+
+    @staticmethod
+    def available():
+        return fcntl is not None
+
+    def acquire(self, exclusive):
+        if self._fd is None:
+            self.lock_file.parent.mkdir(parents=True, exist_ok=True)
+            self._fd = open(self.lock_file, "a+b")
+        fcntl.flock(self._fd.fileno(), fcntl.LOCK_EX if exclusive else fcntl.LOCK_SH)
+
+    def release(self):
+        if self._fd is not None:
+            fcntl.flock(self._fd.fileno(), fcntl.LOCK_UN)
+
+    def close(self):
+        if self._fd is not None:
+            self._fd.close()
+            self._fd = None
+
+class GraphLock:
+    """
+    Reentrant reader/writer lock guarding one graph file.
+
+    Any number of threads may read at once; a writer waits for the readers to
+    leave and then runs alone. Waiting writers block new readers so they can't
+    be starved. The writing thread may re-enter both `read` and `write`, but a
+    reader can't upgrade to a writer.
+
+    Using the lock directly (`with lock:`) takes it for writing. With a
+    `FileLock` attached, the first reader takes a shared and the writer an
+    exclusive flock on top.
+    """
+
+    def __init__(self, file_lock=None):
+        self.file_lock = file_lock
+        self._condition = threading.Condition(threading.Lock())
+        self._readers = {}
+        self._writer = None
+        self._writer_depth = 0
+        self._waiting_writers = 0
+
+    def acquire_read(self):
+        me = threading.get_ident()
+        with self._condition:
+            if self._writer == me or me in self._readers:
+                self._readers[me] = self._readers.get(me, 0) + 1
+                return
+
+            while self._writer is not None or self._waiting_writers:
+                self._condition.wait()
+
+            if not self._readers and self.file_lock:
+                self.file_lock.acquire(exclusive=False)
+            self._readers[me] = 1
+
+    def release_read(self):
+        me = threading.get_ident()
+        with self._condition:
+            depth = self._readers[me] - 1
+            if depth:
+                self._readers[me] = depth
+                return
+
+            del self._readers[me]
+            if not self._readers and self._writer is None:
+                if self.file_lock:
+                    self.file_lock.release()
+                self._condition.notify_all()
+
+    def acquire_write(self):
+        me = threading.get_ident()
+        with self._condition:
+            if self._writer == me:
+                self._writer_depth += 1
+                return
+            if me in self._readers:
+                raise RuntimeError("Cannot upgrade a graph read lock to a write lock")
+
+            self._waiting_writers += 1
+            try:
+                while self._writer is not None or self._readers:
+                    self._condition.wait()
+            finally:
+                self._waiting_writers -= 1
+
+            if self.file_lock:
+                self.file_lock.acquire(exclusive=True)
+            self._writer = me
+            self._writer_depth = 1
+
+    def release_write(self):
+        with self._condition:
+            self._writer_depth -= 1
+            if self._writer_depth:
+                return
+
+            self._writer = None
+            # Reads nested in the write section end with it
+            self._readers.pop(threading.get_ident(), None)
+            if self.file_lock:
+                self.file_lock.release()
+            self._condition.notify_all()
+
+    @contextmanager
+    def read(self):
+        self.acquire_read()
+        try:
+            yield
+        finally:
+            self.release_read()
+
+    @contextmanager
+    def write(self):
+        self.acquire_write()
+        try:
+            yield
+        finally:
+            self.release_write()
+
+    def __enter__(self):
+        self.acquire_write()
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.release_write()
+
+def create_file_lock(graph_file):
+    """Return a FileLock for `graph_file`, or None where flock isn't available."""
+    if not FileLock.available():
+        logger.warning("fcntl is not available, cross-process graph file locking is disabled.")
+        return None
+    graph_file = Path(str(graph_file))
+    return FileLock(graph_file.with_name(graph_file.name + ".lock"))
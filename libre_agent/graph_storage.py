@@ -0,0 +1,1307 @@
+import os
+import re
+import json
+import pickle
+import sqlite3
+import argparse
+from abc import ABC, abstractmethod
+from contextlib import contextmanager
+from pathlib import Path
+from operator import attrgetter
+
+import networkx as nx
+
+from libre_agent.logger import logger
+from libre_agent.memory_index import MemoryIndex, MemoryStats, TimestampIndex
+from libre_agent.memory_eviction import EvictionPolicy, EvictionQueue
+from libre_agent.graph_lock import GraphLock, create_file_lock
+from libre_agent.memory_store import MemoryStore, FIELDS as MEMORY_FIELDS
+from libre_agent.memory_search import SearchIndex, SEARCHABLE_METADATA_KEYS, tokenize
+from libre_agent.memory_archive import MemoryArchive
+
+# Memory fields `get_memories` can sort on
+SORT_FIELDS = ('memory_id',) + MEMORY_FIELDS
+
+class GraphStorage(ABC):
+    """
+    Persistence engine behind MemoryGraph. One instance exists per graph file
+    and is shared by every MemoryGraph handle pointing at that file.
+
+    `lock` is a reader/writer lock: queries run concurrently, mutations run
+    alone. With `file_lock` it is backed by an flock so other processes
+    using the same file are serialized as well. With `archive`, evicted
+    memories are moved to a MemoryArchive (the cold tier) next to the file.
+    """
+    name: str = "base"
+
+    def __init__(self, graph_file, resident=False, eviction_policy=None, file_lock=False, archive=False):
+        self.graph_file = Path(str(graph_file))
+        self.resident = resident
+        self.eviction_policy = eviction_policy or EvictionPolicy()
+        self.lock = GraphLock(create_file_lock(self.graph_file) if file_lock else None)
+        self.archive = MemoryArchive(self.graph_file) if archive else None
+        self.pending_writes = 0
+        self._transaction_depth = 0
+        # Reads of the whole graph served from (or missing) the read cache
+        self.cache_hits = 0
+        self.cache_misses = 0
+
+    @abstractmethod
+    def add_memory(self, memory: dict, parent_memory_ids: list) -> None:
+        raise NotImplementedError("Subclasses must implement add_memory.")
+
+    @abstractmethod
+    def update_memory(self, memory_id: str, metadata: dict, fields: dict) -> bool:
+        raise NotImplementedError("Subclasses must implement update_memory.")
+
+    @abstractmethod
+    def remove_memory(self, memory_id: str) -> bool:
+        raise NotImplementedError("Subclasses must implement remove_memory.")
+
+    @abstractmethod
+    def get_memories(self, first=None, last=None, memory_type=None, metadata=None, sort='timestamp', reverse=False, since=None, until=None) -> list:
+        raise NotImplementedError("Subclasses must implement get_memories.")
+
+    @abstractmethod
+    def get_memories_by_id(self, memory_ids) -> list:
+        raise NotImplementedError("Subclasses must implement get_memories_by_id.")
+
+    @abstractmethod
+    def get_memory_ids(self) -> list:
+        raise NotImplementedError("Subclasses must implement get_memory_ids.")
+
+    @abstractmethod
+    def get_neighbors(self, memory_ids, relation_type='memory_flow') -> dict:
+        raise NotImplementedError("Subclasses must implement get_neighbors.")
+
+    @abstractmethod
+    def version(self):
+        """Opaque token that changes whenever the stored memories change."""
+        raise NotImplementedError("Subclasses must implement version.")
+
+    def topology_version(self):
+        """Token that changes whenever edges are added or removed."""
+        return self.version()
+
+    def search(self, query: str, k: int = 10, memory_type=None, metadata=None, since=None, until=None) -> list:
+        """Full-text search; returns up to `k` (memory_id, score) pairs, best first."""
+        raise NotImplementedError(f"{self.name} storage does not support search.")
+
+    @abstractmethod
+    def get_stats(self) -> dict:
+        raise NotImplementedError("Subclasses must implement get_stats.")
+
+    @abstractmethod
+    def load_graph(self) -> nx.DiGraph:
+        raise NotImplementedError("Subclasses must implement load_graph.")
+
+    def get_all_memories(self) -> list:
+        return self.get_memories()
+
+    def cache_stats(self) -> dict:
+        total = self.cache_hits + self.cache_misses
+        return {
+            'hits': self.cache_hits,
+            'misses': self.cache_misses,
+            'hit_rate': self.cache_hits / total if total else 0.0,
+        }
+
+    def set_resident(self, resident: bool):
+        self.resident = resident
+
+    def set_eviction_policy(self, eviction_policy: EvictionPolicy):
+        self.eviction_policy = eviction_policy
+
+    def set_file_lock(self, enabled: bool):
+        with self.lock:
+            if self.lock.file_lock:
+                self.lock.file_lock.close()
+            self.lock.file_lock = create_file_lock(self.graph_file) if enabled else None
+
+    def set_archive(self, enabled: bool):
+        with self.lock:
+            if enabled and self.archive is None:
+                self.archive = MemoryArchive(self.graph_file)
+            elif not enabled and self.archive is not None:
+                self.archive.close()
+                self.archive = None
+
+    def _notify_evicted(self, evicted):
+        """Archive the evicted memories (when the cold tier is on), then run the eviction hooks."""
+        if self.archive is not None:
+            try:
+                self.archive.archive(evicted)
+            except Exception as e:
+                logger.error(f"Archiving {len(evicted)} evicted memories failed: {e}")
+        self.eviction_policy.notify(evicted)
+
+    @contextmanager
+    def transaction(self):
+        """
+        Group mutations so they are applied atomically and persisted with a
+        single write. The storage lock is held for the whole block; nested
+        transactions join the outermost one. If the block raises, none of its
+        mutations are kept.
+        """
+        with self.lock:
+            outermost = self._transaction_depth == 0
+            if outermost:
+                self._begin_transaction()
+            self._transaction_depth += 1
+
+            try:
+                yield self
+            except BaseException:
+                self._transaction_depth -= 1
+                if outermost:
+                    self._rollback_transaction()
+                raise
+
+            self._transaction_depth -= 1
+            if outermost:
+                self._commit_transaction()
+
+    def _begin_transaction(self):
+        pass
+
+    def _commit_transaction(self):
+        pass
+
+    def _rollback_transaction(self):
+        pass
+
+    def flush(self):
+        """Persist pending writes. Storages that write through have nothing to do."""
+        pass
+
+    def close(self):
+        self.flush()
+        if self.archive is not None:
+            self.archive.close()
+        if self.lock.file_lock:
+            self.lock.file_lock.close()
+
+    @staticmethod
+    def _check_sort(sort):
+        if sort not in SORT_FIELDS:
+            raise ValueError(f"Cannot sort memories by '{sort}', use one of {', '.join(SORT_FIELDS)}")
+
+    @staticmethod
+    def _limit(sorted_memories, first=None, last=None):
+        if first and last:
+            raise ValueError("Cannot specify both 'first' and 'last' parameters simultaneously")
+        elif first:
+            return sorted_memories[:first], first
+        elif last:
+            return sorted_memories[-last:], last
+        else:
+            return sorted_memories, None
+
+class PickleStorage(GraphStorage):
+    """
+    Stores the memory graph as a pickled MemoryStore snapshot plus an
+    append-only journal of operations written next to it. Snapshots written
+    as a networkx DiGraph by older versions are converted on load.
+
+    Mutations append add/update/remove/edge records to the journal instead of
+    re-serializing the whole graph; loading replays the journal over the last
+    snapshot. Once the journal grows past `compaction_threshold` bytes it is
+    folded into a fresh snapshot, which is swapped in atomically so a crash
+    mid-save can't truncate the memory store. Replaying a record twice leaves
+    the graph unchanged, so a crash between the swap and the journal reset is
+    harmless.
+
+    In resident mode the graph is loaded once and kept in memory; journal
+    records are buffered as pending writes until `flush` is called. Otherwise
+    the last loaded graph is cached together with the size and mtime of the
+    snapshot and journal, and reused while neither file has changed. Writes
+    from this process refresh the cache, writes from other processes
+    invalidate it.
+
+    Records written together (a memory and its edges, or a whole transaction)
+    go to the journal as a single 'batch' record, so a torn append drops the
+    group as a whole instead of leaving half of it applied.
+    """
+    name = "pickle"
+
+    # Journal size (in bytes) after which it gets folded into a new snapshot
+    compaction_threshold = 512 * 1024
+
+    def __init__(self, graph_file, resident=False, eviction_policy=None, file_lock=False, archive=False):
+        super().__init__(graph_file, resident=resident, eviction_policy=eviction_policy, file_lock=file_lock, archive=archive)
+        self.journal_file = self.graph_file.with_name(self.graph_file.name + ".journal")
+        self._graph = None
+        self._pending_records = []
+        self._index = None
+        self._stats = None
+        self._timeline = None
+        self._eviction_queue = None
+        self._index_graph = None
+        self._search_index = None
+        self._search_graph = None
+        self._transaction_graph = None
+        self._transaction_records = []
+        self._read_cache = None
+        self._write_version = 0
+        self._topology_version = 0
+
+    def set_resident(self, resident):
+        with self.lock:
+            if not resident:
+                self.flush()
+                self._graph = None
+            self._read_cache = None
+            self.resident = resident
+
+    def set_eviction_policy(self, eviction_policy):
+        with self.lock:
+            self.eviction_policy = eviction_policy
+            # Scores depend on the policy, rebuild the tracking structures lazily
+            self._index_graph = None
+
+    def load_graph(self):
+        """Export the stored memories as a networkx DiGraph (e.g. for analysis)."""
+        with self.lock.read():
+            return self._load_store().to_networkx()
+
+    def _load_store(self):
+        with self.lock.read():
+            if self._transaction_graph is not None:
+                return self._transaction_graph
+            if self.resident and self._graph is not None:
+                self.cache_hits += 1
+                return self._graph
+
+            cache = self._read_cache
+            if cache is not None and cache[0] == self._file_signature():
+                self.cache_hits += 1
+                return cache[1]
+            self.cache_misses += 1
+
+            if self.graph_file.exists():
+                with open(self.graph_file, "rb") as f:
+                    graph = pickle.load(f)
+                if isinstance(graph, nx.DiGraph):
+                    graph = MemoryStore.from_networkx(graph)
+                logger.info("Memory graph loaded successfully.")
+            else:
+                logger.info("Initializing a new memory graph.")
+                graph = MemoryStore()
+
+            replayed = self._replay_journal(graph)
+            if replayed:
+                logger.info(f"Replayed {replayed} journal records from {self.journal_file}.")
+
+            # Buffered resident writes are not on disk yet when a rolled back
+            # transaction forces a reload
+            for record in self._pending_records:
+                self._apply(graph, record)
+
+            # The files may have been changed by another process
+            self._topology_version += 1
+            if self.resident:
+                self._graph = graph
+            else:
+                self._remember(graph)
+            return graph
+
+    def _file_signature(self):
+        signature = []
+        for path in (self.graph_file, self.journal_file):
+            try:
+                stat = path.stat()
+                signature.append((stat.st_mtime_ns, stat.st_size))
+            except FileNotFoundError:
+                signature.append(None)
+        return tuple(signature)
+
+    def _remember(self, graph):
+        """Cache `graph` as the current state of the files on disk."""
+        self._read_cache = (self._file_signature(), graph)
+
+    def _replay_journal(self, graph):
+        if not self.journal_file.exists():
+            return 0
+
+        replayed = 0
+        with open(self.journal_file, "r+b") as f:
+            while True:
+                offset = f.tell()
+                try:
+                    record = pickle.load(f)
+                except EOFError:
+                    break
+                except (pickle.UnpicklingError, ValueError, TypeError) as e:
+                    # A crash mid-append can leave a truncated tail record. Cut it
+                    # off so later appends stay readable.
+                    logger.warning(f"Discarding corrupt journal tail in {self.journal_file}: {e}")
+                    f.truncate(offset)
+                    break
+                self._apply(graph, record)
+                replayed += 1
+        return replayed
+
+    def _apply(self, graph, record):
+        op = record[0]
+        # Keep the metadata index and stats in sync when they belong to this graph
+        tracked = self._index_graph is graph
+
+        if op == 'add':
+            _, memory_id, data = record
+            if tracked and memory_id in graph:
+                self._untrack(graph, memory_id)
+            graph.add(memory_id, data)
+            if tracked:
+                self._track(graph, memory_id)
+        elif op == 'edge':
+            _, source_id, target_id, relation_type = record
+            if graph.add_edge(source_id, target_id, relation_type):
+                self._topology_version += 1
+                if tracked:
+                    self._stats.total_connections += 1
+        elif op == 'update':
+            _, memory_id, metadata, fields = record
+            if memory_id not in graph:
+                return False
+            if tracked:
+                self._untrack(graph, memory_id, keep_position=True)
+            graph.update(memory_id, metadata, fields)
+            if tracked:
+                self._track(graph, memory_id)
+        elif op == 'batch':
+            for batched_record in record[1]:
+                self._apply(graph, batched_record)
+        elif op == 'remove':
+            _, memory_id = record
+            if memory_id not in graph:
+                return False
+            if tracked:
+                self._untrack(graph, memory_id)
+            removed_edges = graph.remove(memory_id)
+            if removed_edges:
+                self._topology_version += 1
+            if tracked:
+                self._stats.total_connections -= removed_edges
+        else:
+            logger.warning(f"Unknown memory graph journal record: {op}")
+            return False
+
+        return True
+
+    def _track(self, graph, memory_id):
+        # Only the full-text index needs the (possibly compressed) content
+        data = graph.data(memory_id, content=False)
+        self._index.add(memory_id, data.get('memory_type'), data.get('metadata', {}))
+        self._timeline.add(memory_id, data.get('timestamp'))
+        self._stats.add(data)
+        self._eviction_queue.push(memory_id, data)
+        if self._search_graph is graph:
+            self._search_index.add(memory_id, graph.data(memory_id))
+
+    def _untrack(self, graph, memory_id, keep_position=False):
+        data = graph.data(memory_id, content=False)
+        self._index.remove(memory_id, data.get('memory_type'), data.get('metadata', {}), keep_position=keep_position)
+        self._timeline.remove(memory_id, data.get('timestamp'))
+        self._stats.remove(data)
+        self._eviction_queue.remove(memory_id)
+        if self._search_graph is graph:
+            self._search_index.remove(memory_id, graph.data(memory_id))
+
+    def _get_index(self, graph):
+        """Return the metadata index for `graph`, building it (with the timestamp index, stats and eviction queue) on first use."""
+        # Concurrent readers may rebuild this at the same time; they hold the
+        # read lock, so every graph they loaded has the same contents.
+        if self._index_graph is not graph:
+            metadata_view = graph.without_content()
+            self._index = MemoryIndex.from_graph(metadata_view)
+            self._timeline = TimestampIndex.from_graph(metadata_view)
+            self._stats = MemoryStats.from_graph(metadata_view)
+            self._eviction_queue = EvictionQueue.from_graph(metadata_view, self.eviction_policy.score)
+            self._index_graph = graph
+            # Changes made while nothing was tracked never reached the search index
+            self._search_graph = None
+        return self._index
+
+    def _get_search_index(self, graph):
+        """Return the full-text index for `graph`, built on the first search."""
+        self._get_index(graph)
+        if self._search_graph is not graph:
+            self._search_index = SearchIndex.from_graph(graph)
+            self._search_graph = graph
+        return self._search_index
+
+    def _commit(self, graph, records):
+        """Append `records` (already applied to `graph`) to the journal."""
+        if self._transaction_depth:
+            self._transaction_records.extend(records)
+            return
+
+        self._write_version += 1
+        evicted = self._enforce_memory_limit(graph)
+        records = records + [('remove', memory['memory_id']) for memory in evicted]
+        record = records[0] if len(records) == 1 else ('batch', records)
+
+        if self.resident:
+            self._graph = graph
+            self._pending_records.append(record)
+            self.pending_writes += 1
+        else:
+            try:
+                self._append_journal([record])
+                self._maybe_compact(graph)
+            except BaseException:
+                # The cached graph already holds the unsaved change
+                self._read_cache = None
+                raise
+            self._remember(graph)
+
+        if evicted:
+            self._notify_evicted(evicted)
+
+    def _begin_transaction(self):
+        self._transaction_graph = self._load_store()
+        self._transaction_records = []
+
+    def _commit_transaction(self):
+        graph, records = self._transaction_graph, self._transaction_records
+        self._transaction_graph = None
+        self._transaction_records = []
+
+        if records:
+            self._commit(graph, records)
+
+    def _rollback_transaction(self):
+        self._transaction_graph = None
+        self._transaction_records = []
+
+        # The graph was changed in place; drop it so the next load starts
+        # from the persisted state again
+        self._graph = None
+        self._read_cache = None
+        self._index_graph = None
+        self._write_version += 1
+        logger.warning(f"Rolled back memory graph transaction on {self.graph_file}.")
+
+    def flush(self):
+        with self.lock:
+            if self.pending_writes and self._graph is not None:
+                self._append_journal(self._pending_records)
+                self._maybe_compact(self._graph)
+                logger.info(f"Flushed {self.pending_writes} pending memory graph mutations to {self.journal_file}.")
+                self._pending_records = []
+                self.pending_writes = 0
+
+    def _append_journal(self, records):
+        if not records:
+            return
+
+        self.journal_file.parent.mkdir(parents=True, exist_ok=True)
+
+        buffer = b"".join(pickle.dumps(record) for record in records)
+        with open(self.journal_file, "ab") as f:
+            f.write(buffer)
+
+    def _maybe_compact(self, graph):
+        if self.journal_file.exists() and self.journal_file.stat().st_size > self.compaction_threshold:
+            self.compact(graph)
+
+    def compact(self, graph=None):
+        """Fold the journal into a fresh snapshot."""
+        with self.lock:
+            if graph is None:
+                graph = self._load_store()
+
+            self._write_snapshot(graph)
+            if self.journal_file.exists():
+                self.journal_file.unlink()
+            if not self.resident:
+                self._remember(graph)
+
+            logger.info(f"Compacted memory graph journal into snapshot {self.graph_file}.")
+
+    def _write_snapshot(self, graph):
+        parent_dir = Path(self.graph_file.parent)
+
+        if not parent_dir.exists():
+            parent_dir.mkdir(parents=True, exist_ok=True)
+
+        # Write to a temporary file first and atomically swap it in
+        tmp_file = self.graph_file.with_name(self.graph_file.name + ".tmp")
+        with open(tmp_file, "wb") as f:
+            pickle.dump(graph, f)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_file, self.graph_file)
+
+        logger.info(f"Memory graph saved successfully at {self.graph_file}.")
+
+    def _enforce_memory_limit(self, graph):
+        """Evict the lowest scoring memories beyond capacity and return them."""
+        excess = graph.number_of_nodes() - self.eviction_policy.capacity
+        if excess <= 0:
+            return []
+
+        self._get_index(graph)
+
+        evicted = []
+        for memory_id in self._eviction_queue.pop_lowest(excess):
+            evicted.append(graph.memory_dict(memory_id))
+            self._apply(graph, ('remove', memory_id))
+            logger.info(f"Evicted memory {memory_id} to maintain the memory capacity of {self.eviction_policy.capacity}.")
+
+        return evicted
+
+    def add_memory(self, memory, parent_memory_ids):
+        with self.lock:
+            graph = self._load_store()
+
+            records = [('add', memory['memory_id'], {
+                'memory_type': memory['memory_type'],  # 'external', 'internal'
+                'content': memory['content'],
+                'metadata': dict(memory['metadata']),
+                'timestamp': memory['timestamp'],
+            })]
+
+            # Add edges from parent memories to this memory
+            for parent_id in parent_memory_ids:
+                records.append(('edge', parent_id, memory['memory_id'], 'memory_flow'))
+                logger.info(f"Created edge from {parent_id} to {memory['memory_id']}")
+
+            for record in records:
+                self._apply(graph, record)
+
+            self._commit(graph, records)
+
+    def update_memory(self, memory_id, metadata, fields):
+        with self.lock:
+            graph = self._load_store()
+
+            for key in fields:
+                if key not in MEMORY_FIELDS:
+                    logger.warning(f"Ignoring unsupported memory field '{key}' for pickle storage")
+            fields = {key: value for key, value in fields.items() if key in MEMORY_FIELDS}
+
+            record = ('update', memory_id, dict(metadata), fields)
+            if not self._apply(graph, record):
+                return False
+
+            self._commit(graph, [record])
+            return True
+
+    def remove_memory(self, memory_id):
+        with self.lock:
+            graph = self._load_store()
+
+            record = ('remove', memory_id)
+            if not self._apply(graph, record):
+                return False
+
+            self._commit(graph, [record])
+            return True
+
+    def _in_range(self, candidates, since, until):
+        """Narrow index candidates (None for all memories) to a timestamp range."""
+        if since is None and until is None:
+            return candidates
+        in_range = self._timeline.range(since, until)
+        if candidates is None:
+            return set(in_range)
+        return {memory_id for memory_id in in_range if memory_id in candidates}
+
+    def get_memories(self, first=None, last=None, memory_type=None, metadata=None, sort='timestamp', reverse=False, since=None, until=None):
+        self._check_sort(sort)
+        with self.lock.read():
+            graph = self._load_store()
+
+            index = self._get_index(graph)
+            candidates = self._in_range(index.lookup(memory_type, metadata), since, until)
+            if candidates is None:
+                records = list(graph.records())
+            else:
+                # Keep node order so ties in the sort below stay stable
+                records = [graph.get(node) for node in sorted(candidates, key=index.position)]
+
+            if metadata is not None:
+                records = [
+                    memory for memory in records
+                    if all(graph.metadata_value(memory, k) == v for k, v in metadata.items())
+                ]
+
+            # Sort and limit the records, so only the returned memories are decoded
+            if sort == 'content':
+                records.sort(key=graph.content, reverse=reverse)
+            else:
+                records.sort(key=attrgetter(sort), reverse=reverse)
+            records, _ = self._limit(records, first, last)
+
+            return [graph.memory_dict(memory.memory_id) for memory in records]
+
+    def get_memories_by_id(self, memory_ids):
+        with self.lock.read():
+            graph = self._load_store()
+            return [graph.memory_dict(memory_id) for memory_id in memory_ids if memory_id in graph]
+
+    def get_memory_ids(self):
+        with self.lock.read():
+            return list(self._load_store())
+
+    def get_neighbors(self, memory_ids, relation_type='memory_flow'):
+        with self.lock.read():
+            graph = self._load_store()
+            neighbors = {}
+            for memory_id in memory_ids:
+                if memory_id not in graph:
+                    continue
+                neighbors[memory_id] = [
+                    target_id for target_id in graph.successors(memory_id)
+                    if graph.relation_type(memory_id, target_id) == relation_type
+                ] + [
+                    source_id for source_id in graph.predecessors(memory_id)
+                    if graph.relation_type(source_id, memory_id) == relation_type
+                ]
+            return neighbors
+
+    def version(self):
+        # The file signature covers writes from other processes, the write
+        # version this process' own (which resident mode keeps off disk)
+        with self.lock.read():
+            return (self._file_signature(), self._write_version)
+
+    def topology_version(self):
+        with self.lock.read():
+            # Loading picks up (and counts) edge changes made by other processes
+            self._load_store()
+            return self._topology_version
+
+    def search(self, query, k=10, memory_type=None, metadata=None, since=None, until=None):
+        with self.lock.read():
+            graph = self._load_store()
+            candidates = self._in_range(self._get_index(graph).lookup(memory_type, metadata), since, until)
+            search_index = self._get_search_index(graph)
+
+            if metadata is None or all(MemoryIndex._hashable(v) for v in metadata.values()):
+                return search_index.search(query, k, candidates)
+
+            # Unhashable filter values aren't indexed, check them on the ranked matches
+            results = [
+                (memory_id, score) for memory_id, score in search_index.search(query, None, candidates)
+                if all(graph.metadata_value(graph.get(memory_id), key) == value for key, value in metadata.items())
+            ]
+            return results[:k]
+
+    def get_stats(self):
+        with self.lock.read():
+            graph = self._load_store()
+            self._get_index(graph)
+
+            return self._stats.as_dict()
+
+class SQLiteStorage(GraphStorage):
+    """
+    Stores memories in a SQLite database with one row per memory and per edge.
+
+    Metadata is kept as a JSON document; the keys we filter on most are exposed
+    as generated columns so `get_memories` becomes an indexed query with LIMIT.
+    Every mutation is a single-row transaction. SQLite does its own page
+    caching, so resident mode has no effect on this backend.
+    """
+    name = "sqlite"
+
+    # Metadata keys mirrored into indexed generated columns
+    INDEXED_METADATA_KEYS = ('role', 'unit_name', 'priority_level', 'temporal_scope', 'recalled')
+
+    # Memory fields that can be updated directly
+    COLUMNS = ('memory_id', 'memory_type', 'content', 'timestamp')
+
+    # Metadata keys that can be filtered on; they become JSON paths
+    METADATA_KEY = re.compile(r"\w+")
+
+    def __init__(self, graph_file, resident=False, eviction_policy=None, file_lock=False, archive=False):
+        super().__init__(graph_file, resident=resident, eviction_policy=eviction_policy, file_lock=file_lock, archive=archive)
+        self._write_version = 0
+        self._read_cache = None
+        self._search_cache = None
+
+        parent_dir = Path(self.graph_file.parent)
+        if not parent_dir.exists():
+            parent_dir.mkdir(parents=True, exist_ok=True)
+
+        with self.lock:
+            self.connection = sqlite3.connect(self.graph_file, check_same_thread=False)
+            self.connection.execute("PRAGMA journal_mode=WAL")
+            self._create_schema()
+
+    def _create_schema(self):
+        generated_columns = ",\n".join(
+            f"    {key} GENERATED ALWAYS AS (json_extract(metadata, '$.{key}')) VIRTUAL"
+            for key in self.INDEXED_METADATA_KEYS
+        )
+
+        with self.connection:
+            self.connection.execute(f'''
+                CREATE TABLE IF NOT EXISTS memories (
+                    memory_id TEXT PRIMARY KEY,
+                    memory_type TEXT NOT NULL,
+                    content TEXT,
+                    metadata TEXT NOT NULL DEFAULT '{{}}',
+                    timestamp REAL NOT NULL,
+                    retention_score REAL NOT NULL DEFAULT 0,
+{generated_columns}
+                )
+            ''')
+            self.connection.execute('''
+                CREATE TABLE IF NOT EXISTS edges (
+                    source_id TEXT NOT NULL,
+                    target_id TEXT NOT NULL,
+                    relation_type TEXT,
+                    PRIMARY KEY (source_id, target_id)
+                )
+            ''')
+            self.connection.execute('''
+                CREATE TABLE IF NOT EXISTS memory_stats (
+                    kind TEXT NOT NULL,
+                    key TEXT NOT NULL,
+                    count INTEGER NOT NULL DEFAULT 0,
+                    PRIMARY KEY (kind, key)
+                )
+            ''')
+            self._create_stats_triggers()
+            self._add_missing_columns()
+            self._create_search_index()
+            self.connection.execute("CREATE INDEX IF NOT EXISTS idx_edges_target ON edges (target_id)")
+            self.connection.execute("CREATE INDEX IF NOT EXISTS idx_memories_retention_score ON memories (retention_score)")
+            self.connection.execute("CREATE INDEX IF NOT EXISTS idx_memories_memory_type ON memories (memory_type)")
+            self.connection.execute("CREATE INDEX IF NOT EXISTS idx_memories_timestamp ON memories (timestamp)")
+            for key in self.INDEXED_METADATA_KEYS:
+                self.connection.execute(f"CREATE INDEX IF NOT EXISTS idx_memories_{key} ON memories ({key})")
+
+    def _add_missing_columns(self):
+        columns = {row[1] for row in self.connection.execute("PRAGMA table_xinfo(memories)").fetchall()}
+
+        if 'retention_score' not in columns:
+            self.connection.execute("ALTER TABLE memories ADD COLUMN retention_score REAL NOT NULL DEFAULT 0")
+            self._rescore()
+
+    def _create_search_index(self):
+        """FTS5 table mirroring the searchable text of every memory, keyed by rowid."""
+        created = self.connection.execute(
+            "SELECT 1 FROM sqlite_master WHERE name = 'memories_fts'"
+        ).fetchone() is None
+
+        try:
+            self.connection.execute("CREATE VIRTUAL TABLE IF NOT EXISTS memories_fts USING fts5(text)")
+        except sqlite3.OperationalError as e:
+            logger.warning(f"SQLite FTS5 is not available ({e}), search falls back to an in-memory index.")
+            self.full_text_search = False
+            return
+        self.full_text_search = True
+
+        text = " || ' ' || ".join(
+            ["COALESCE(new.content, '')"] + [f"COALESCE(new.{key}, '')" for key in SEARCHABLE_METADATA_KEYS]
+        )
+        self.connection.executescript(f'''
+            CREATE TRIGGER IF NOT EXISTS memories_fts_insert AFTER INSERT ON memories BEGIN
+                INSERT INTO memories_fts (rowid, text) VALUES (new.rowid, {text});
+            END;
+            CREATE TRIGGER IF NOT EXISTS memories_fts_update AFTER UPDATE OF content, metadata ON memories BEGIN
+                DELETE FROM memories_fts WHERE rowid = old.rowid;
+                INSERT INTO memories_fts (rowid, text) VALUES (new.rowid, {text});
+            END;
+            CREATE TRIGGER IF NOT EXISTS memories_fts_delete AFTER DELETE ON memories BEGIN
+                DELETE FROM memories_fts WHERE rowid = old.rowid;
+            END;
+        ''')
+
+        if created:
+            # Backfill databases created before the search index existed
+            self.connection.execute(
+                f"INSERT INTO memories_fts (rowid, text) SELECT rowid, {text.replace('new.', '')} FROM memories"
+            )
+
+    def _rescore(self):
+        rows = self.connection.execute(
+            "SELECT memory_id, memory_type, content, metadata, timestamp FROM memories"
+        ).fetchall()
+        self.connection.executemany(
+            "UPDATE memories SET retention_score = ? WHERE memory_id = ?",
+            [(self.eviction_policy.score(self._row_to_memory(row)), row[0]) for row in rows]
+        )
+
+    def set_eviction_policy(self, eviction_policy):
+        with self.lock, self.connection:
+            self.eviction_policy = eviction_policy
+            self._rescore()
+
+    # Counters kept in memory_stats: kind -> expression over a memories row
+    STATS_COUNTERS = {
+        'memory_type': "{row}.memory_type",
+        'role': "COALESCE({row}.role, 'unknown')",
+        'priority_level': "COALESCE({row}.priority_level, 'unknown')",
+    }
+
+    # Sums of the access stats kept in metadata (see memory_access): key -> expression over a memories row
+    ACCESS_COUNTERS = {
+        'recalls': "CAST(COALESCE(json_extract({row}.metadata, '$.recall_count'), 0) AS INTEGER)",
+        'recalled_memories': "(COALESCE(json_extract({row}.metadata, '$.recall_count'), 0) > 0)",
+        'updates': "CAST(COALESCE(json_extract({row}.metadata, '$.update_count'), 0) AS INTEGER)",
+        'updated_memories': "(COALESCE(json_extract({row}.metadata, '$.update_count'), 0) > 0)",
+    }
+
+    @staticmethod
+    def _bump_stat(kind, key_expression, delta):
+        return (
+            f"INSERT INTO memory_stats (kind, key, count) VALUES ({kind}, {key_expression}, {delta}) "
+            f"ON CONFLICT (kind, key) DO UPDATE SET count = count + ({delta});"
+        )
+
+    @classmethod
+    def _memory_stat_statements(cls, row, delta):
+        statements = [cls._bump_stat("'total'", "'memories'", delta)]
+        for kind, expression in cls.STATS_COUNTERS.items():
+            statements.append(cls._bump_stat(f"'{kind}'", expression.format(row=row), delta))
+        return " ".join(statements)
+
+    @classmethod
+    def _access_stat_statements(cls, row, delta):
+        return " ".join(
+            cls._bump_stat("'access'", f"'{key}'", f"{delta} * {expression.format(row=row)}")
+            for key, expression in cls.ACCESS_COUNTERS.items()
+        )
+
+    def _create_stats_triggers(self):
+        """Maintain memory_stats on every mutation so get_stats never scans the table."""
+        connections = ("'total'", "'connections'")
+        topology = ("'version'", "'edges'")
+        triggers = {
+            'memories_stats_insert': f"AFTER INSERT ON memories BEGIN {self._memory_stat_statements('NEW', 1)} END",
+            'memories_stats_delete': f"AFTER DELETE ON memories BEGIN {self._memory_stat_statements('OLD', -1)} END",
+            'memories_stats_update': (
+                "AFTER UPDATE OF memory_type, metadata ON memories BEGIN "
+                f"{self._memory_stat_statements('OLD', -1)} {self._memory_stat_statements('NEW', 1)} END"
+            ),
+            'edges_stats_insert': f"AFTER INSERT ON edges BEGIN {self._bump_stat(*connections, 1)} END",
+            'edges_stats_delete': f"AFTER DELETE ON edges BEGIN {self._bump_stat(*connections, -1)} END",
+            # Counts every edge change, for caches of graph neighborhoods
+            'edges_version_insert': f"AFTER INSERT ON edges BEGIN {self._bump_stat(*topology, 1)} END",
+            'edges_version_delete': f"AFTER DELETE ON edges BEGIN {self._bump_stat(*topology, 1)} END",
+            'memories_access_insert': f"AFTER INSERT ON memories BEGIN {self._access_stat_statements('NEW', 1)} END",
+            'memories_access_delete': f"AFTER DELETE ON memories BEGIN {self._access_stat_statements('OLD', -1)} END",
+            'memories_access_update': (
+                "AFTER UPDATE OF metadata ON memories BEGIN "
+                f"{self._access_stat_statements('OLD', -1)} {self._access_stat_statements('NEW', 1)} END"
+            ),
+        }
+
+        # Databases created before the stats table (or its access sums) existed need a backfill
+        (stats_rows,) = self.connection.execute("SELECT COUNT(*) FROM memory_stats").fetchone()
+        (memory_rows,) = self.connection.execute("SELECT COUNT(*) FROM memories").fetchone()
+        access_sums = self.connection.execute(
+            "SELECT 1 FROM sqlite_master WHERE type = 'trigger' AND name = 'memories_access_insert'"
+        ).fetchone() is not None
+
+        for name, body in triggers.items():
+            self.connection.execute(f"CREATE TRIGGER IF NOT EXISTS {name} {body}")
+
+        if stats_rows == 0 and memory_rows > 0:
+            self._rebuild_stats()
+        elif not access_sums and memory_rows > 0:
+            self._rebuild_access_stats()
+
+    def _rebuild_stats(self):
+        self.connection.execute("DELETE FROM memory_stats")
+        self.connection.execute(
+            "INSERT INTO memory_stats (kind, key, count) SELECT 'total', 'memories', COUNT(*) FROM memories"
+        )
+        self.connection.execute(
+            "INSERT INTO memory_stats (kind, key, count) SELECT 'total', 'connections', COUNT(*) FROM edges"
+        )
+        for kind, expression in self.STATS_COUNTERS.items():
+            column = expression.format(row='memories')
+            self.connection.execute(
+                f"INSERT INTO memory_stats (kind, key, count) SELECT '{kind}', {column}, COUNT(*) FROM memories GROUP BY {column}"
+            )
+        self._rebuild_access_stats()
+
+    def _rebuild_access_stats(self):
+        self.connection.execute("DELETE FROM memory_stats WHERE kind = 'access'")
+        for key, expression in self.ACCESS_COUNTERS.items():
+            self.connection.execute(
+                f"INSERT INTO memory_stats (kind, key, count) SELECT 'access', '{key}', COALESCE(SUM({expression.format(row='memories')}), 0) FROM memories"
+            )
+
+    @staticmethod
+    def _metadata_column(key, prefix=""):
+        """SQL expression of a metadata key and its parameters; the JSON path is bound, never interpolated."""
+        if key in SQLiteStorage.INDEXED_METADATA_KEYS:
+            return f"{prefix}{key}", []
+        if not isinstance(key, str) or not SQLiteStorage.METADATA_KEY.fullmatch(key):
+            raise ValueError(f"Cannot filter memories on the metadata key {key!r}")
+        return f"json_extract({prefix}metadata, ?)", [f'$."{key}"']
+
+    @staticmethod
+    def _row_to_memory(row):
+        memory_id, memory_type, content, metadata, timestamp = row
+        return {
+            'memory_id': memory_id,
+            'memory_type': memory_type,
+            'content': content,
+            'metadata': json.loads(metadata),
+            'timestamp': timestamp,
+        }
+
+    @contextmanager
+    def _write(self):
+        """Run statements in the open transaction, or commit them on their own."""
+        with self.lock:
+            try:
+                if self._transaction_depth:
+                    yield
+                else:
+                    with self.connection:
+                        yield
+            finally:
+                self._write_version += 1
+
+    def _commit_transaction(self):
+        evicted = self._enforce_memory_limit()
+        self.connection.commit()
+        self._write_version += 1
+
+        if evicted:
+            self._notify_evicted(evicted)
+
+    def _rollback_transaction(self):
+        self.connection.rollback()
+        self._write_version += 1
+        logger.warning(f"Rolled back memory graph transaction on {self.graph_file}.")
+
+    def add_memory(self, memory, parent_memory_ids):
+        with self.lock:
+            with self._write():
+                self._insert_memory(memory)
+
+                for parent_id in parent_memory_ids:
+                    self._insert_edge(parent_id, memory['memory_id'])
+                    logger.info(f"Created edge from {parent_id} to {memory['memory_id']}")
+
+                # Transactions evict once, when they commit
+                evicted = [] if self._transaction_depth else self._enforce_memory_limit()
+
+            if evicted:
+                self._notify_evicted(evicted)
+
+    def _insert_memory(self, memory):
+        self.connection.execute(
+            "INSERT INTO memories (memory_id, memory_type, content, metadata, timestamp, retention_score) VALUES (?, ?, ?, ?, ?, ?) "
+            "ON CONFLICT (memory_id) DO UPDATE SET memory_type = excluded.memory_type, content = excluded.content, "
+            "metadata = excluded.metadata, timestamp = excluded.timestamp, retention_score = excluded.retention_score",
+            (
+                memory['memory_id'],
+                memory['memory_type'],
+                memory['content'],
+                json.dumps(memory.get('metadata', {}), default=str),
+                memory['timestamp'],
+                self.eviction_policy.score(memory),
+            )
+        )
+
+    def _insert_edge(self, source_id, target_id, relation_type='memory_flow'):
+        self.connection.execute(
+            "INSERT INTO edges (source_id, target_id, relation_type) VALUES (?, ?, ?) "
+            "ON CONFLICT (source_id, target_id) DO UPDATE SET relation_type = excluded.relation_type",
+            (source_id, target_id, relation_type)
+        )
+
+    def _delete_memory(self, memory_id):
+        cursor = self.connection.execute("DELETE FROM memories WHERE memory_id = ?", (memory_id,))
+        self.connection.execute("DELETE FROM edges WHERE source_id = ? OR target_id = ?", (memory_id, memory_id))
+        return cursor.rowcount > 0
+
+    def _enforce_memory_limit(self):
+        """Evict the lowest scoring memories beyond capacity and return them."""
+        (total,) = self.connection.execute("SELECT COUNT(*) FROM memories").fetchone()
+        capacity = self.eviction_policy.capacity
+        if total <= capacity:
+            return []
+
+        rows = self.connection.execute(
+            "SELECT memory_id, memory_type, content, metadata, timestamp FROM memories ORDER BY retention_score, rowid LIMIT ?",
+            (total - capacity,)
+        ).fetchall()
+
+        evicted = []
+        for row in rows:
+            evicted.append(self._row_to_memory(row))
+            self._delete_memory(row[0])
+            logger.info(f"Evicted memory {row[0]} to maintain the memory capacity of {capacity}.")
+        return evicted
+
+    def update_memory(self, memory_id, metadata, fields):
+        with self._write():
+            row = self.connection.execute(
+                "SELECT memory_id, memory_type, content, metadata, timestamp FROM memories WHERE memory_id = ?", (memory_id,)
+            ).fetchone()
+
+            if row is None:
+                return False
+
+            memory = self._row_to_memory(row)
+            memory['metadata'].update(metadata)
+
+            assignments = ["metadata = ?"]
+            params = [json.dumps(memory['metadata'], default=str)]
+            for key, value in fields.items():
+                if key not in self.COLUMNS or key == 'memory_id':
+                    logger.warning(f"Ignoring unsupported memory field '{key}' for SQLite storage")
+                    continue
+                assignments.append(f"{key} = ?")
+                params.append(value)
+                memory[key] = value
+
+            assignments.append("retention_score = ?")
+            params.append(self.eviction_policy.score(memory))
+
+            self.connection.execute(
+                f"UPDATE memories SET {', '.join(assignments)} WHERE memory_id = ?",
+                (*params, memory_id)
+            )
+            return True
+
+    def remove_memory(self, memory_id):
+        with self._write():
+            return self._delete_memory(memory_id)
+
+    def _filter_conditions(self, memory_type=None, metadata=None, table=None, since=None, until=None):
+        prefix = f"{table}." if table else ""
+        conditions = []
+        params = []
+        # Both bounds are answered by idx_memories_timestamp
+        if since is not None:
+            conditions.append(f"{prefix}timestamp >= ?")
+            params.append(since)
+        if until is not None:
+            conditions.append(f"{prefix}timestamp < ?")
+            params.append(until)
+        if memory_type is not None:
+            conditions.append(f"{prefix}memory_type = ?")
+            params.append(memory_type)
+        for key, value in (metadata or {}).items():
+            column, column_params = self._metadata_column(key, prefix)
+            conditions.append(f"{column} IS ?")
+            params.extend(column_params + [value])
+        return conditions, params
+
+    def get_memories(self, first=None, last=None, memory_type=None, metadata=None, sort='timestamp', reverse=False, since=None, until=None):
+        if first and last:
+            raise ValueError("Cannot specify both 'first' and 'last' parameters simultaneously")
+
+        self._check_sort(sort)
+        conditions, params = self._filter_conditions(memory_type, metadata, since=since, until=until)
+
+        sort_column = sort
+        descending = reverse
+        if last:
+            # Fetch the tail in the opposite order and flip it back below
+            descending = not reverse
+
+        query = "SELECT memory_id, memory_type, content, metadata, timestamp FROM memories"
+        if conditions:
+            query += " WHERE " + " AND ".join(conditions)
+        query += f" ORDER BY {sort_column} {'DESC' if descending else 'ASC'}, rowid {'DESC' if descending else 'ASC'}"
+        if first or last:
+            query += " LIMIT ?"
+            params.append(first or last)
+
+        with self.lock.read():
+            rows = self.connection.execute(query, params).fetchall()
+
+        result = [self._row_to_memory(row) for row in rows]
+        if last:
+            result.reverse()
+        return result
+
+    def get_memories_by_id(self, memory_ids):
+        memory_ids = list(memory_ids)
+        with self.lock.read():
+            rows = []
+            # Stay below SQLite's bound parameter limit
+            for start in range(0, len(memory_ids), 500):
+                chunk = memory_ids[start:start + 500]
+                rows.extend(self.connection.execute(
+                    "SELECT memory_id, memory_type, content, metadata, timestamp FROM memories "
+                    f"WHERE memory_id IN ({', '.join('?' * len(chunk))})",
+                    chunk
+                ).fetchall())
+
+        found = {row[0]: self._row_to_memory(row) for row in rows}
+        return [found[memory_id] for memory_id in memory_ids if memory_id in found]
+
+    def get_memory_ids(self):
+        with self.lock.read():
+            return [memory_id for (memory_id,) in self.connection.execute("SELECT memory_id FROM memories")]
+
+    def get_neighbors(self, memory_ids, relation_type='memory_flow'):
+        memory_ids = list(memory_ids)
+        neighbors = {}
+        with self.lock.read():
+            # Stay below SQLite's bound parameter limit (each id is bound twice)
+            for start in range(0, len(memory_ids), 250):
+                chunk = memory_ids[start:start + 250]
+                placeholders = ', '.join('?' * len(chunk))
+                rows = self.connection.execute(
+                    "SELECT source_id, target_id FROM edges WHERE relation_type = ? "
+                    f"AND (source_id IN ({placeholders}) OR target_id IN ({placeholders}))",
+                    [relation_type] + chunk + chunk
+                ).fetchall()
+
+                requested = set(chunk)
+                for source_id, target_id in rows:
+                    if source_id in requested:
+                        neighbors.setdefault(source_id, []).append(target_id)
+                    if target_id in requested:
+                        neighbors.setdefault(target_id, []).append(source_id)
+        return neighbors
+
+    def version(self):
+        with self.lock.read():
+            return self._data_version()
+
+    def topology_version(self):
+        with self.lock.read():
+            row = self.connection.execute(
+                "SELECT count FROM memory_stats WHERE kind = 'version' AND key = 'edges'"
+            ).fetchone()
+        return row[0] if row else 0
+
+    def search(self, query, k=10, memory_type=None, metadata=None, since=None, until=None):
+        tokens = set(tokenize(query))
+        if not tokens:
+            return []
+
+        if not self.full_text_search:
+            with self.lock.read():
+                graph = self.load_graph()
+                cache = self._search_cache
+                if cache is None or cache[0] is not graph:
+                    cache = self._search_cache = (graph, SearchIndex.from_graph(graph))
+            candidates = {
+                memory['memory_id']
+                for memory in self.get_memories(memory_type=memory_type, metadata=metadata, since=since, until=until)
+            }
+            return cache[1].search(query, k, candidates)
+
+        conditions, params = self._filter_conditions(memory_type, metadata, table="m", since=since, until=until)
+        conditions.insert(0, "memories_fts MATCH ?")
+        params.insert(0, " OR ".join(f'"{token}"' for token in tokens))
+        params.append(k)
+
+        # bm25() is lower-is-better, negate it so scores rank like SearchIndex
+        with self.lock.read():
+            rows = self.connection.execute(
+                "SELECT m.memory_id, -bm25(memories_fts) FROM memories_fts "
+                "JOIN memories m ON m.rowid = memories_fts.rowid "
+                f"WHERE {' AND '.join(conditions)} ORDER BY bm25(memories_fts) LIMIT ?",
+                params
+            ).fetchall()
+        return [(memory_id, score) for memory_id, score in rows]
+
+    def get_stats(self):
+        with self.lock.read():
+            rows = self.connection.execute("SELECT kind, key, count FROM memory_stats WHERE count > 0").fetchall()
+
+        counters = {kind: {} for kind in ('total', *self.STATS_COUNTERS)}
+        for kind, key, count in rows:
+            counters.setdefault(kind, {})[key] = count
+
+        return {
+            'total_memories': counters['total'].get('memories', 0),
+            'total_connections': counters['total'].get('connections', 0),
+            'memory_type_distribution': counters['memory_type'],
+            'role_distribution': counters['role'],
+            'priority_distribution': counters['priority_level'],
+            'access_stats': {key: counters.get('access', {}).get(key, 0) for key in self.ACCESS_COUNTERS},
+        }
+
+    def _data_version(self):
+        # data_version changes when another connection commits, the write
+        # version covers this connection's own writes
+        (data_version,) = self.connection.execute("PRAGMA data_version").fetchone()
+        return (data_version, self._write_version)
+
+    def load_graph(self):
+        """Export the stored memories as a networkx DiGraph (e.g. for analysis)."""
+        with self.lock.read():
+            version = self._data_version()
+            cache = self._read_cache
+            if cache is not None and cache[0] == version:
+                self.cache_hits += 1
+                return cache[1]
+            self.cache_misses += 1
+
+            graph = nx.DiGraph()
+            for memory in self.get_memories():
+                memory_id = memory.pop('memory_id')
+                graph.add_node(memory_id, **memory)
+
+            edges = self.connection.execute("SELECT source_id, target_id, relation_type FROM edges").fetchall()
+            for source_id, target_id, relation_type in edges:
+                graph.add_edge(source_id, target_id, relation_type=relation_type)
+
+            self._read_cache = (version, graph)
+            return graph
+
+    def close(self):
+        with self.lock:
+            self.connection.close()
+            if self.archive is not None:
+                self.archive.close()
+        if self.lock.file_lock:
+            self.lock.file_lock.close()
+
+STORAGE_BACKENDS = {
+    PickleStorage.name: PickleStorage,
+    SQLiteStorage.name: SQLiteStorage,
+}
+
+def migrate_pickle_to_sqlite(pickle_file, sqlite_file):
+    """
+    One-shot migration of a pickled networkx memory graph into a SQLite store.
+    Returns the number of migrated memories.
+    """
+    source = PickleStorage(pickle_file)
+    if not source.graph_file.exists() and not source.journal_file.exists():
+        raise FileNotFoundError(f"Memory graph file not found: {pickle_file}")
+
+    graph = source.load_graph()
+    target = SQLiteStorage(sqlite_file)
+
+    migrated = 0
+    with target.lock, target.connection:
+        for node, data in graph.nodes(data=True):
+            if 'memory_type' not in data:
+                # Dangling edge endpoint without memory attributes
+                continue
+            migrated += 1
+            target._insert_memory({
+                'memory_id': node,
+                'memory_type': data['memory_type'],
+                'content': data.get('content'),
+                'metadata': data.get('metadata', {}),
+                'timestamp': data.get('timestamp', 0),
+            })
+        for source_id, target_id, data in graph.edges(data=True):
+            target._insert_edge(source_id, target_id, data.get('relation_type', 'memory_flow'))
+
+    target.close()
+
+    logger.info(f"Migrated {migrated} memories from {pickle_file} to {sqlite_file}")
+    return migrated
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Migrate a pickled memory graph into a SQLite memory store")
+    parser.add_argument("pickle_file", help="path to the existing .pkl memory graph")
+    parser.add_argument("sqlite_file", help="path of the SQLite database to create")
+    args = parser.parse_args()
+
+    count = migrate_pickle_to_sqlite(args.pickle_file, args.sqlite_file)
+    print(f"Migrated {count} memories to {args.sqlite_file}")
@@ -32,6 +32,29 @@ def _get_input_value(method: Callable[..., Any], *args: Any, **kwargs: Any) -> s
     arguments = _strip_method_args(arguments)
     return safe_json_dumps(arguments)
 
+def _get_memory_stats_attributes() -> Dict[str, AttributeValue]:
+    # The stats are maintained incrementally by the storage, so this is cheap
+    from libre_agent.memory_graph import MemoryGraph
+
+    try:
+        memory_graph = MemoryGraph()
+        stats = memory_graph.get_stats()
+        cache_stats = memory_graph.get_cache_stats()
+    except Exception:
+        return {}
+
+    attributes: Dict[str, AttributeValue] = {
+        "memory_graph.total_memories": stats['total_memories'],
+        "memory_graph.total_connections": stats['total_connections'],
+    }
+    for key in ("memory_type_distribution", "role_distribution", "priority_distribution", "access_stats"):
+        if key in stats:
+            attributes[f"memory_graph.{key}"] = safe_json_dumps(stats[key])
+
+    attributes["memory_graph.cache_hits"] = cache_stats['hits']
+    attributes["memory_graph.cache_misses"] = cache_stats['misses']
+    return attributes
+
 class _ExecuteWrapper:
     def __init__(self, tracer: trace_api.Tracer) -> None:
         self._tracer = tracer
@@ -88,6 +111,7 @@ class _ReasonWrapper:
             OPENINFERENCE_SPAN_KIND: OpenInferenceSpanKindValues.CHAIN.value,
             INPUT_VALUE: _get_input_value(wrapped, *args, **kwargs)
         }
+        attributes.update(_get_memory_stats_attributes())
         attributes.update(dict(get_attributes_from_context()))
 
         with self._tracer.start_as_current_span(span_name, attributes=attributes) as span:
@@ -0,0 +1,146 @@
+import time
+import atexit
+import threading
+
+from libre_agent.logger import logger
+from libre_agent.memory_graph import MemoryGraph
+
+# Metadata keys holding a memory's usage, maintained by AccessTracker
+ACCESS_KEYS = ('recall_count', 'last_recalled', 'update_count', 'last_updated')
+
+def last_used(memory):
+    """Latest of a memory's timestamp and the times it was last recalled or updated."""
+    metadata = memory.get('metadata', {})
+    return max(memory.get('timestamp') or 0, metadata.get('last_recalled') or 0, metadata.get('last_updated') or 0)
+
+class AccessTracker:
+    """
+    Counts how often and how recently each memory of one graph file is
+    recalled and updated.
+
+    Events are buffered in process memory and folded into the memories'
+    metadata (`ACCESS_KEYS`) in one transaction once `flush_threshold`
+    events are pending or the oldest one is `flush_interval` seconds old,
+    so a recall doesn't cost a graph write. Flushes store absolute values,
+    which keeps replayed journal records harmless; memories evicted in the
+    meantime are skipped. `stats` overlays the pending events on a memory's
+    stored values.
+    """
+
+    flush_threshold = 50
+    flush_interval = 60.0
+
+    _trackers = {}
+    _trackers_lock = threading.RLock()
+
+    def __init__(self, memory_graph):
+        self.memory_graph = memory_graph
+        self.lock = threading.Lock()
+        self._pending = {}
+        self._events = 0
+        self._oldest = None
+
+    @classmethod
+    def for_graph(cls, memory_graph):
+        """Return the process-wide tracker of the file `memory_graph` is bound to."""
+        graph_file = memory_graph._storage().graph_file
+        with cls._trackers_lock:
+            tracker = cls._trackers.get(graph_file)
+            if tracker is None:
+                if not cls._trackers:
+                    atexit.register(cls.flush_all)
+                # Flushes may run in another context, bind to the file itself
+                tracker = cls._trackers[graph_file] = cls(MemoryGraph.for_file(graph_file))
+            return tracker
+
+    @classmethod
+    def configure(cls, flush_threshold=None, flush_interval=None):
+        if flush_threshold is not None:
+            cls.flush_threshold = flush_threshold
+        if flush_interval is not None:
+            cls.flush_interval = flush_interval
+
+    @classmethod
+    def flush_all(cls):
+        with cls._trackers_lock:
+            trackers = list(cls._trackers.values())
+        for tracker in trackers:
+            tracker.flush()
+
+    def record_recall(self, memory_ids, now=None):
+        self._record(memory_ids, 0, now)
+
+    def record_update(self, memory_ids, now=None):
+        self._record(memory_ids, 2, now)
+
+    def _record(self, memory_ids, slot, now):
+        now = time.time() if now is None else now
+        with self.lock:
+            for memory_id in memory_ids:
+                # [recalls, last recalled, updates, last updated]
+                pending = self._pending.setdefault(memory_id, [0, None, 0, None])
+                pending[slot] += 1
+                pending[slot + 1] = now
+                self._events += 1
+            if self._oldest is None and self._pending:
+                self._oldest = now
+            due = self._events >= self.flush_threshold or (
+                self._oldest is not None and now - self._oldest >= self.flush_interval
+            )
+
+        if due:
+            self.flush()
+
+    def stats(self, memory):
+        """Return the ACCESS_KEYS of `memory`, including events not flushed yet."""
+        metadata = memory.get('metadata', {})
+        stats = {key: metadata.get(key) for key in ACCESS_KEYS}
+        with self.lock:
+            pending = self._pending.get(memory['memory_id'])
+        if pending:
+            self._merge(stats, pending)
+        return stats
+
+    @staticmethod
+    def _merge(stats, pending):
+        recalls, last_recalled, updates, last_updated = pending
+        stats['recall_count'] = (stats.get('recall_count') or 0) + recalls
+        stats['update_count'] = (stats.get('update_count') or 0) + updates
+        if last_recalled is not None:
+            stats['last_recalled'] = max(stats.get('last_recalled') or 0, last_recalled)
+        if last_updated is not None:
+            stats['last_updated'] = max(stats.get('last_updated') or 0, last_updated)
+
+    def flush(self):
+        """Write the pending events to the graph; returns the number of memories updated."""
+        with self.lock:
+            pending, self._pending = self._pending, {}
+            self._events = 0
+            self._oldest = None
+        if not pending:
+            return 0
+
+        try:
+            with self.memory_graph.transaction():
+                updates = []
+                for memory in self.memory_graph.get_memories_by_id(list(pending)):
+                    stats = {key: memory['metadata'].get(key) for key in ACCESS_KEYS}
+                    self._merge(stats, pending[memory['memory_id']])
+                    updates.append({
+                        'memory_id': memory['memory_id'],
+                        'metadata': {key: value for key, value in stats.items() if value},
+                    })
+                self.memory_graph.update_memories(updates)
+        except Exception as e:
+            logger.error(f"Access stats flush failed, keeping {len(pending)} memories pending: {e}")
+            with self.lock:
+                for memory_id, events in pending.items():
+                    current = self._pending.setdefault(memory_id, [0, None, 0, None])
+                    current[0] += events[0]
+                    current[2] += events[2]
+                    current[1] = max(filter(None, (current[1], events[1])), default=None)
+                    current[3] = max(filter(None, (current[3], events[3])), default=None)
+            return 0
+
+        logger.info(f"Flushed access stats of {len(updates)} memories ({len(pending) - len(updates)} no longer stored).")
+        return len(updates)
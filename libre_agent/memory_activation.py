@@ -0,0 +1,143 @@
+import math
+import threading
+from collections import OrderedDict
+
+from libre_agent.logger import logger
+from libre_agent.memory_graph import memory_graph as default_memory_graph
+
+class SpreadingActivation:
+    """
+    Expands a set of seed memories along `memory_flow` edges, so memories
+    linked to the recalled ones come back in the same recall.
+
+    Each seed starts with activation 1.0 (or the weight it is given). Every
+    hop passes `decay` of a memory's activation on to its neighbors, split
+    between them by the square root of their number so a memory with many
+    links doesn't flood the result. Spreading stops after `max_hops` hops or
+    once activation drops below `threshold`; the `max_results` most
+    activated memories are returned.
+
+    The neighborhood of a memory that has been a seed at least `hub_seeds`
+    times is kept in an LRU of `hub_cache_size` entries, tagged with the
+    graph's topology version so it is recomputed after edges change.
+    """
+
+    def __init__(self, decay=0.5, max_hops=2, threshold=0.05, max_results=10,
+                 hub_seeds=3, hub_cache_size=256):
+        self.decay = decay
+        self.max_hops = max_hops
+        self.threshold = threshold
+        self.max_results = max_results
+        self.hub_seeds = hub_seeds
+        self.hub_cache_size = hub_cache_size
+        self.hub_hits = 0
+        self.hub_misses = 0
+        self._seed_counts = {}
+        self._hubs = OrderedDict()
+        self._lock = threading.Lock()
+
+    def neighborhood(self, memory_id, memory_graph=None):
+        """Return {memory_id: activation} reached from `memory_id` with activation 1.0."""
+        memory_graph = memory_graph or default_memory_graph
+        key = (memory_graph._storage().graph_file, memory_id)
+
+        with self._lock:
+            seeds = self._seed_counts[key] = self._seed_counts.get(key, 0) + 1
+            if len(self._seed_counts) > 100 * self.hub_cache_size:
+                # Forget memories that were only used once
+                self._seed_counts = {k: count for k, count in self._seed_counts.items() if count > 1}
+            cached = self._hubs.get(key)
+
+        if seeds < self.hub_seeds or self.hub_cache_size <= 0:
+            return self._spread(memory_id, memory_graph)
+
+        topology = memory_graph.topology_version()
+        if cached is not None and cached[0] == topology:
+            with self._lock:
+                self.hub_hits += 1
+                if key in self._hubs:
+                    self._hubs.move_to_end(key)
+            return cached[1]
+
+        activation = self._spread(memory_id, memory_graph)
+        with self._lock:
+            self.hub_misses += 1
+            self._hubs[key] = (topology, activation)
+            self._hubs.move_to_end(key)
+            while len(self._hubs) > self.hub_cache_size:
+                self._hubs.popitem(last=False)
+        logger.debug(f"Cached the neighborhood of hub memory {memory_id} ({len(activation)} memories)")
+        return activation
+
+    def _spread(self, memory_id, memory_graph):
+        activation = {}
+        frontier = {memory_id: 1.0}
+        visited = {memory_id}
+
+        for _ in range(self.max_hops):
+            # One storage call per hop, for the whole frontier
+            neighbors = memory_graph.get_neighbors(list(frontier))
+            spread = {}
+            for source_id, energy in frontier.items():
+                linked = neighbors.get(source_id)
+                if not linked:
+                    continue
+                share = energy * self.decay / math.sqrt(len(linked))
+                for target_id in linked:
+                    if target_id != memory_id:
+                        spread[target_id] = spread.get(target_id, 0.0) + share
+
+            frontier = {}
+            for target_id, energy in spread.items():
+                activation[target_id] = activation.get(target_id, 0.0) + energy
+                if target_id not in visited and energy >= self.threshold:
+                    visited.add(target_id)
+                    frontier[target_id] = energy
+            if not frontier:
+                break
+
+        return activation
+
+    def spread(self, seeds, exclude_ids=(), k=None, memory_graph=None):
+        """
+        Return up to `k` (default `max_results`) (memory_id, activation) pairs
+        reached from `seeds`, best first. `seeds` is an iterable of memory
+        ids or a {memory_id: weight} dict; seeds and `exclude_ids` are never
+        returned.
+        """
+        memory_graph = memory_graph or default_memory_graph
+        if not isinstance(seeds, dict):
+            seeds = dict.fromkeys(seeds, 1.0)
+        k = self.max_results if k is None else k
+
+        totals = {}
+        for seed_id, weight in seeds.items():
+            for memory_id, activation in self.neighborhood(seed_id, memory_graph).items():
+                totals[memory_id] = totals.get(memory_id, 0.0) + weight * activation
+
+        excluded = set(seeds) | set(exclude_ids)
+        results = sorted(
+            ((memory_id, activation) for memory_id, activation in totals.items()
+             if memory_id not in excluded and activation >= self.threshold),
+            key=lambda item: item[1],
+            reverse=True
+        )
+        return results[:k]
+
+    def expand(self, memories, exclude_ids=(), k=None, memory_graph=None):
+        """Return the stored memories most activated by the `memories` dicts, best first."""
+        memory_graph = memory_graph or default_memory_graph
+        activated = self.spread([memory['memory_id'] for memory in memories], exclude_ids, k, memory_graph)
+        linked = memory_graph.get_memories_by_id([memory_id for memory_id, _ in activated])
+
+        logger.info(f"Spreading activation from {len(memories)} memories reached {len(linked)} linked memories")
+        return linked
+
+    def cache_stats(self):
+        total = self.hub_hits + self.hub_misses
+        return {
+            'hits': self.hub_hits,
+            'misses': self.hub_misses,
+            'hit_rate': self.hub_hits / total if total else 0.0,
+            'hubs': len(self._hubs),
+        }
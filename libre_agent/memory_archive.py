@@ -0,0 +1,258 @@
+import os
+import json
+import time
+import zlib
+import struct
+import sqlite3
+import threading
+from collections import OrderedDict
+from pathlib import Path
+
+from libre_agent.logger import logger
+from libre_agent.memory_search import SearchIndex, searchable_text, tokenize
+
+# Every block starts with its format and the length of its compressed payload
+BLOCK_HEADER = struct.Struct(">BI")
+
+# Evictions usually archive a single memory, too little text for zlib to find
+# repeats in. Blocks of format 1 are compressed against this preset dictionary
+# of the JSON every memory shares, which roughly halves them. Blocks already
+# written depend on it: never edit it, add a new format instead.
+BLOCK_FORMAT = 1
+PRESET_DICTIONARIES = {
+    1: (
+        b'"recall_count": "last_recalled": "update_count": "last_updated": "archived": true '
+        b'"reasoning_mode": "none" "quick" "deep" "unit_name": "ReasoningUnit" "User" "unknown" '
+        b'"temporal_scope": "working_memory" "short_term" "long_term" '
+        b'"priority_level": "CORE" "HIGH" "MEDIUM" "LOW" "BACKGROUND" '
+        b'"role": "message" "reflection" "episodic" "semantic" "procedural" "personality" '
+        b'[{"memory_id": "mem-", "memory_type": "internal", "external", "content": "The user ", '
+        b'"metadata": {"role": "timestamp": 17'
+    ),
+}
+
+class MemoryArchive:
+    """
+    Cold tier of a memory graph file. Memories evicted from the graph (the
+    hot tier) or forgotten by ForgetRecognizer are appended here instead of
+    being lost; the archive has no capacity and never feeds prompts or the
+    graph stats.
+
+    Each archived batch is written as one zlib-compressed JSON block (see
+    PRESET_DICTIONARIES) at the end of `<graph file>.archive`, which is never
+    rewritten. A SQLite index next to it (`<graph file>.archive.db`) maps
+    memory ids to their block and holds a contentless FTS5 index of their
+    text, so searching the archive costs an indexed query and fetching
+    memories only decompresses the blocks holding them. The last
+    `block_cache_size` decompressed blocks are kept in memory.
+
+    A memory is archived once; later copies of the same id are skipped.
+    """
+
+    compression_level = 6
+    block_cache_size = 8
+
+    def __init__(self, graph_file):
+        self.graph_file = Path(str(graph_file))
+        self.archive_file = self.graph_file.with_name(self.graph_file.name + ".archive")
+        self.index_file = self.graph_file.with_name(self.graph_file.name + ".archive.db")
+        self.lock = threading.RLock()
+        self._blocks = OrderedDict()
+        self._fallback_index = None
+
+        self.index_file.parent.mkdir(parents=True, exist_ok=True)
+        self.connection = sqlite3.connect(self.index_file, check_same_thread=False)
+        self._create_schema()
+
+    def _create_schema(self):
+        with self.connection:
+            self.connection.execute('''
+                CREATE TABLE IF NOT EXISTS archived (
+                    id INTEGER PRIMARY KEY,
+                    memory_id TEXT NOT NULL UNIQUE,
+                    memory_type TEXT,
+                    timestamp REAL NOT NULL,
+                    archived_at REAL NOT NULL,
+                    block_offset INTEGER NOT NULL,
+                    block_length INTEGER NOT NULL
+                )
+            ''')
+            self.connection.execute("CREATE INDEX IF NOT EXISTS idx_archived_timestamp ON archived (timestamp)")
+
+            try:
+                # Contentless: the text is only in the compressed blocks
+                self.connection.execute("CREATE VIRTUAL TABLE IF NOT EXISTS archived_fts USING fts5(text, content='')")
+                self.full_text_search = True
+            except sqlite3.OperationalError as e:
+                logger.warning(f"SQLite FTS5 is not available ({e}), archive search decompresses the whole archive.")
+                self.full_text_search = False
+
+    def __len__(self):
+        with self.lock:
+            (count,) = self.connection.execute("SELECT COUNT(*) FROM archived").fetchone()
+        return count
+
+    def __call__(self, memories):
+        """Eviction hook signature: archive the evicted `memories`."""
+        self.archive(memories)
+
+    def archive(self, memories):
+        """Append `memories` as one block; returns the number of newly archived ones."""
+        with self.lock:
+            memories = [memory for memory in memories if memory.get('memory_id')]
+            known = self._known([memory['memory_id'] for memory in memories])
+            memories = [memory for memory in memories if memory['memory_id'] not in known]
+            if not memories:
+                return 0
+
+            compressor = zlib.compressobj(self.compression_level, zdict=PRESET_DICTIONARIES[BLOCK_FORMAT])
+            raw = json.dumps(memories, default=str).encode("utf-8")
+            payload = compressor.compress(raw) + compressor.flush()
+            with open(self.archive_file, "ab") as f:
+                f.seek(0, os.SEEK_END)
+                offset = f.tell()
+                f.write(BLOCK_HEADER.pack(BLOCK_FORMAT, len(payload)) + payload)
+                f.flush()
+                os.fsync(f.fileno())
+
+            # The block is on disk before it is indexed; a crash in between
+            # only leaves an unreferenced block behind
+            archived_at = time.time()
+            with self.connection:
+                for memory in memories:
+                    cursor = self.connection.execute(
+                        "INSERT INTO archived (memory_id, memory_type, timestamp, archived_at, block_offset, block_length) "
+                        "VALUES (?, ?, ?, ?, ?, ?)",
+                        (memory['memory_id'], memory.get('memory_type'), memory.get('timestamp') or 0,
+                         archived_at, offset, len(payload))
+                    )
+                    if self.full_text_search:
+                        self.connection.execute(
+                            "INSERT INTO archived_fts (rowid, text) VALUES (?, ?)",
+                            (cursor.lastrowid, searchable_text(memory))
+                        )
+            self._fallback_index = None
+
+        logger.info(f"Archived {len(memories)} memories ({len(raw)} bytes compressed to {len(payload)}) in {self.archive_file}.")
+        return len(memories)
+
+    def _known(self, memory_ids):
+        known = set()
+        for start in range(0, len(memory_ids), 500):
+            chunk = memory_ids[start:start + 500]
+            known.update(memory_id for (memory_id,) in self.connection.execute(
+                f"SELECT memory_id FROM archived WHERE memory_id IN ({', '.join('?' * len(chunk))})", chunk
+            ))
+        return known
+
+    def _read_block(self, offset, length):
+        block = self._blocks.get(offset)
+        if block is not None:
+            self._blocks.move_to_end(offset)
+            return block
+
+        try:
+            with open(self.archive_file, "rb") as f:
+                f.seek(offset)
+                block_format, _ = BLOCK_HEADER.unpack(f.read(BLOCK_HEADER.size))
+                payload = f.read(length)
+            decompressor = zlib.decompressobj(zdict=PRESET_DICTIONARIES[block_format])
+            memories = json.loads(decompressor.decompress(payload) + decompressor.flush())
+            block = {memory['memory_id']: memory for memory in memories}
+        except (OSError, zlib.error, ValueError, KeyError, struct.error) as e:
+            logger.error(f"Unreadable archive block at {offset} in {self.archive_file}: {e}")
+            block = {}
+
+        self._blocks[offset] = block
+        while len(self._blocks) > self.block_cache_size:
+            self._blocks.popitem(last=False)
+        return block
+
+    def get_memories_by_id(self, memory_ids):
+        """Return the archived memories with the given ids, in that order, marked with metadata `archived`."""
+        memory_ids = list(memory_ids)
+        with self.lock:
+            locations = {}
+            for start in range(0, len(memory_ids), 500):
+                chunk = memory_ids[start:start + 500]
+                for memory_id, offset, length in self.connection.execute(
+                    f"SELECT memory_id, block_offset, block_length FROM archived WHERE memory_id IN ({', '.join('?' * len(chunk))})",
+                    chunk
+                ):
+                    locations[memory_id] = (offset, length)
+
+            memories = []
+            for memory_id in memory_ids:
+                if memory_id not in locations:
+                    continue
+                memory = self._read_block(*locations[memory_id]).get(memory_id)
+                if memory is not None:
+                    memory = json.loads(json.dumps(memory))
+                    memory.setdefault('metadata', {})['archived'] = True
+                    memories.append(memory)
+            return memories
+
+    def search(self, query, k=10, since=None, until=None):
+        """
+        Full-text search; returns up to `k` (memory_id, score) pairs, best
+        first. Without query terms, the most recent memories in the
+        `since`/`until` range come back with a score of 0.
+        """
+        tokens = set(tokenize(query or ""))
+        conditions, params = [], []
+        if since is not None:
+            conditions.append("a.timestamp >= ?")
+            params.append(since)
+        if until is not None:
+            conditions.append("a.timestamp < ?")
+            params.append(until)
+
+        with self.lock:
+            if not tokens:
+                rows = self.connection.execute(
+                    "SELECT a.memory_id, 0.0 FROM archived a"
+                    + (f" WHERE {' AND '.join(conditions)}" if conditions else "")
+                    + " ORDER BY a.timestamp DESC LIMIT ?",
+                    params + [k]
+                ).fetchall()
+                return [(memory_id, score) for memory_id, score in rows]
+
+            if not self.full_text_search:
+                return self._fallback_search(query, k, since, until)
+
+            # bm25() is lower-is-better, negate it so scores rank like SearchIndex
+            rows = self.connection.execute(
+                "SELECT a.memory_id, -bm25(archived_fts) FROM archived_fts "
+                "JOIN archived a ON a.id = archived_fts.rowid "
+                f"WHERE {' AND '.join(['archived_fts MATCH ?'] + conditions)} ORDER BY bm25(archived_fts) LIMIT ?",
+                [" OR ".join(f'"{token}"' for token in tokens)] + params + [k]
+            ).fetchall()
+        return [(memory_id, score) for memory_id, score in rows]
+
+    def _fallback_search(self, query, k, since, until):
+        rows = self.connection.execute(
+            "SELECT memory_id, timestamp, block_offset, block_length FROM archived"
+        ).fetchall()
+        if self._fallback_index is None:
+            index = SearchIndex()
+            for memory_id, _, offset, length in rows:
+                memory = self._read_block(offset, length).get(memory_id)
+                if memory is not None:
+                    index.add(memory_id, memory)
+            self._fallback_index = index
+
+        candidates = {
+            memory_id for memory_id, timestamp, _, _ in rows
+            if (since is None or timestamp >= since) and (until is None or timestamp < until)
+        }
+        return self._fallback_index.search(query, k, candidates)
+
+    def stats(self):
+        with self.lock:
+            (count,) = self.connection.execute("SELECT COUNT(*) FROM archived").fetchone()
+        size = self.archive_file.stat().st_size if self.archive_file.exists() else 0
+        return {'archived_memories': count, 'archive_bytes': size}
+
+    def close(self):
+        with self.lock:
+            self.connection.close()
@@ -0,0 +1,235 @@
+import zlib
+import threading
+
+import numpy as np
+
+from libre_agent.logger import logger
+from libre_agent.memory_search import tokenize
+from libre_agent.memory_eviction import PRIORITY_WEIGHTS, TEMPORAL_SCOPE_WEIGHTS
+from libre_agent.memory_access import AccessTracker
+
+# Hash family ((a * x + b) mod p) & (2**32 - 1) over 32-bit shingle hashes,
+# with a, b < p, computed exactly in uint64 arithmetic (see `mul_mod`).
+MERSENNE_PRIME = np.uint64((1 << 61) - 1)
+MAX_HASH = np.uint64((1 << 32) - 1)
+
+
+def shingles(text, size=2):
+    """Word `size`-grams of `text` (stopwords dropped); shorter texts are their own words."""
+    tokens = tokenize(text or "")
+    if len(tokens) < size:
+        return set(tokens)
+    return {" ".join(tokens[i:i + size]) for i in range(len(tokens) - size + 1)}
+
+def jaccard(first, second):
+    if not first and not second:
+        return 1.0
+    return len(first & second) / len(first | second)
+
+def mod_mersenne(values):
+    """`values` mod MERSENNE_PRIME, for uint64 values below 2**63."""
+    # 2**61 = 1 (mod p): the bits above 61 fold back onto the low ones
+    values = (values & MERSENNE_PRIME) + (values >> np.uint64(61))
+    return np.where(values >= MERSENNE_PRIME, values - MERSENNE_PRIME, values)
+
+def mul_mod(a, x):
+    """(a * x) mod MERSENNE_PRIME for a < 2**61 and x < 2**32, without overflowing uint64."""
+    # a * x = (a >> 32) * x * 2**32 + (a & MAX_HASH) * x; both products fit,
+    # and high * 2**32 = (high >> 29) * 2**61 + (high & (2**29 - 1)) * 2**32
+    high = (a >> np.uint64(32)) * x
+    low = (a & MAX_HASH) * x
+    folded = (high >> np.uint64(29)) + ((high & np.uint64((1 << 29) - 1)) << np.uint64(32))
+    return mod_mersenne(mod_mersenne(low) + folded)
+
+class MinHasher:
+    """MinHash signatures of shingle sets; equal signature slots estimate Jaccard similarity."""
+
+    def __init__(self, num_perm=64, seed=1):
+        rng = np.random.default_rng(seed)
+        self.num_perm = num_perm
+        self._a = rng.integers(1, MERSENNE_PRIME, num_perm, dtype=np.uint64)
+        self._b = rng.integers(0, MERSENNE_PRIME, num_perm, dtype=np.uint64)
+
+    def signature(self, shingle_set):
+        if not shingle_set:
+            return np.full(self.num_perm, MAX_HASH, dtype=np.uint64)
+        hashes = np.fromiter((zlib.crc32(s.encode("utf-8")) for s in shingle_set), dtype=np.uint64, count=len(shingle_set))
+        return (mod_mersenne(mul_mod(self._a[:, None], hashes) + self._b[:, None]) & MAX_HASH).min(axis=1)
+
+class DuplicateIndex:
+    """
+    MinHash LSH index over the content of the memories in one graph file.
+
+    Signatures are cut into `bands` bands of `num_perm / bands` rows; memories
+    sharing any band with a new text are candidates, and only candidates are
+    compared exactly (Jaccard similarity of word-bigram sets). With 16 bands
+    of 4 rows, pairs above ~0.5 similarity are very likely to collide, so a
+    lookup at `threshold` 0.8 costs a handful of comparisons whatever the
+    size of the graph.
+
+    The index is kept in process memory and rebuilt from the graph on first
+    use; the writing tools add what they store, `sync` catches up with
+    memories written or evicted elsewhere, and stale entries are harmless
+    since candidates are re-read from the graph.
+
+    `action` decides what the writing tools do with a near-duplicate:
+    'merge' folds the new memory into the existing one, 'reject' drops it.
+    A `threshold` of 0 turns detection off.
+    """
+
+    threshold = 0.8
+    action = 'merge'
+    bands = 16
+
+    _indexes = {}
+    _indexes_lock = threading.RLock()
+
+    def __init__(self, hasher=None):
+        self.hasher = hasher or MinHasher()
+        self.rows = self.hasher.num_perm // self.bands
+        self.lock = threading.RLock()
+        self._buckets = [{} for _ in range(self.bands)]
+        self._keys = {}
+        self._synced_version = None
+
+    @classmethod
+    def for_graph(cls, memory_graph):
+        """Return the process-wide index of the file `memory_graph` is bound to."""
+        graph_file = memory_graph._storage().graph_file
+        with cls._indexes_lock:
+            index = cls._indexes.get(graph_file)
+            if index is None:
+                index = cls._indexes[graph_file] = cls()
+            return index
+
+    @classmethod
+    def configure(cls, threshold=None, action=None):
+        if action is not None:
+            if action not in ('merge', 'reject'):
+                raise ValueError(f"Unknown duplicate action '{action}'")
+            cls.action = action
+        if threshold is not None:
+            cls.threshold = threshold
+
+    @classmethod
+    def enabled(cls):
+        return cls.threshold > 0
+
+    def __len__(self):
+        return len(self._keys)
+
+    def _band_keys(self, signature):
+        return [signature[band * self.rows:(band + 1) * self.rows].tobytes() for band in range(self.bands)]
+
+    def add(self, memories):
+        with self.lock:
+            for memory in memories:
+                memory_id = memory['memory_id']
+                self.remove([memory_id])
+                keys = self._band_keys(self.hasher.signature(shingles(memory.get('content'))))
+                for buckets, key in zip(self._buckets, keys):
+                    buckets.setdefault(key, set()).add(memory_id)
+                self._keys[memory_id] = keys
+
+    def remove(self, memory_ids):
+        with self.lock:
+            for memory_id in memory_ids:
+                keys = self._keys.pop(memory_id, None)
+                if keys is None:
+                    continue
+                for buckets, key in zip(self._buckets, keys):
+                    bucket = buckets[key]
+                    bucket.discard(memory_id)
+                    if not bucket:
+                        del buckets[key]
+
+    def sync(self, memory_graph, batch_size=1000):
+        """Index memories missing from the index and drop the ones gone from the graph."""
+        version = memory_graph.version()
+        with self.lock:
+            if version == self._synced_version:
+                return
+
+            graph_ids = set(memory_graph.get_memory_ids())
+            self.remove([memory_id for memory_id in self._keys if memory_id not in graph_ids])
+            missing = [memory_id for memory_id in graph_ids if memory_id not in self._keys]
+            for start in range(0, len(missing), batch_size):
+                self.add(memory_graph.get_memories_by_id(missing[start:start + batch_size]))
+            self._synced_version = version
+
+        if missing:
+            logger.info(f"Duplicate index synced: {len(missing)} memories added, {len(self)} indexed.")
+
+    def find(self, content, memory_graph, memory_type=None, metadata=None):
+        """
+        Return (memory, similarity) for the stored memory most similar to
+        `content` at or above `threshold`, or None. `memory_type` and
+        `metadata` restrict the memories it may match.
+        """
+        if not self.enabled():
+            return None
+
+        self.sync(memory_graph)
+        content_shingles = shingles(content)
+        if not content_shingles:
+            return None
+
+        keys = self._band_keys(self.hasher.signature(content_shingles))
+        with self.lock:
+            candidates = set()
+            for buckets, key in zip(self._buckets, keys):
+                candidates |= buckets.get(key, set())
+
+        best = None
+        for memory in memory_graph.get_memories_by_id(candidates):
+            if memory_type is not None and memory['memory_type'] != memory_type:
+                continue
+            if metadata and any(memory['metadata'].get(key) != value for key, value in metadata.items()):
+                continue
+            similarity = jaccard(content_shingles, shingles(memory['content']))
+            if similarity >= self.threshold and (best is None or similarity > best[1]):
+                best = (memory, similarity)
+
+        if best is not None:
+            logger.info(f"Near-duplicate of {best[0]['memory_id']} found (similarity {best[1]:.2f}, {len(candidates)} candidates)")
+        return best
+
+def merge_duplicate(existing, content, metadata, memory_graph):
+    """
+    Fold a new memory into its stored near-duplicate: the longer content
+    wins, priority_level and temporal_scope take the higher of both values.
+    The stored timestamp is kept, so time range queries still place the
+    memory when it was first written; the merge is recorded as an update
+    (`last_updated`), which recency scoring reads. Returns the updated memory.
+    """
+    merged = {}
+    for key, weights in (('priority_level', PRIORITY_WEIGHTS), ('temporal_scope', TEMPORAL_SCOPE_WEIGHTS)):
+        values = [value for value in (existing['metadata'].get(key), metadata.get(key)) if value in weights]
+        if values:
+            merged[key] = max(values, key=weights.get)
+    merged['merged_count'] = (existing['metadata'].get('merged_count') or 0) + 1
+
+    fields = {}
+    if len(shingles(content)) > len(shingles(existing['content'])):
+        fields['content'] = content
+
+    memory_graph.update_memory(existing['memory_id'], merged, **fields)
+    AccessTracker.for_graph(memory_graph).record_update([existing['memory_id']])
+    return memory_graph.get_memories_by_id([existing['memory_id']])[0]
+
+def find_duplicate(content, memory_graph, memory_type=None, metadata=None):
+    """Look up a near-duplicate of `content` before writing it; failures are only logged."""
+    try:
+        return DuplicateIndex.for_graph(memory_graph).find(content, memory_graph, memory_type, metadata)
+    except Exception as e:
+        logger.error(f"Duplicate lookup failed: {e}")
+        return None
+
+def index_duplicates(memories, memory_graph):
+    """Add freshly written memories to the duplicate index of their graph; failures are only logged."""
+    if not DuplicateIndex.enabled():
+        return
+    try:
+        DuplicateIndex.for_graph(memory_graph).add(memories)
+    except Exception as e:
+        logger.error(f"Duplicate index update failed: {e}")
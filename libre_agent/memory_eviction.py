@@ -0,0 +1,138 @@
+import json
+import math
+import heapq
+import itertools
+import threading
+from pathlib import Path
+
+from libre_agent.logger import logger
+
+PRIORITY_WEIGHTS = {
+    'CORE': 16.0,
+    'HIGH': 8.0,
+    'MEDIUM': 4.0,
+    'LOW': 2.0,
+    'BACKGROUND': 1.0,
+}
+
+# log2 of the largest priority weight, so log2(weight) / MAX_PRIORITY puts CORE at 1.0 and BACKGROUND at 0.0
+MAX_PRIORITY = math.log2(max(PRIORITY_WEIGHTS.values()))
+
+TEMPORAL_SCOPE_WEIGHTS = {
+    'long_term': 4.0,
+    'short_term': 2.0,
+    'working_memory': 1.0,
+}
+
+# A memory's retention value halves every week unless it is recalled or re-prioritized
+DEFAULT_HALF_LIFE = 7 * 24 * 3600
+
+def default_retention_score(memory: dict, half_life: float = DEFAULT_HALF_LIFE) -> float:
+    """
+    Score how much a memory is worth keeping; the lowest scores are evicted
+    first.
+
+    The value of a memory is weight * 2 ** (-age / half_life), where the weight
+    grows with priority_level, temporal_scope and recall frequency, and the
+    age counts from the last time the memory was stored, recalled or
+    updated (see memory_access.AccessTracker). Scores are
+    compared in log space, where the `now` term is shared by every memory and
+    drops out. That leaves a static score per memory, which is what lets the
+    eviction queue stay a heap.
+    """
+    metadata = memory.get('metadata', {})
+
+    weight = PRIORITY_WEIGHTS.get(str(metadata.get('priority_level')).upper(), 1.0)
+    weight *= TEMPORAL_SCOPE_WEIGHTS.get(str(metadata.get('temporal_scope')).lower(), 1.0)
+    weight *= 1.0 + math.log1p(metadata.get('recall_count') or 0)
+    if metadata.get('recalled'):
+        weight *= 2.0
+
+    last_used = max(memory.get('timestamp') or 0, metadata.get('last_recalled') or 0, metadata.get('last_updated') or 0)
+    return math.log2(weight) + last_used / half_life
+
+class EvictionPolicy:
+    """
+    Decides how many memories a graph may hold and which ones go first.
+
+    `score` maps a memory dict to a retention score (lower is evicted first).
+    Hooks registered with `register_hook` receive the list of evicted memories,
+    e.g. to archive them instead of losing them.
+    """
+
+    def __init__(self, capacity=200, score=default_retention_score):
+        self.capacity = capacity
+        self.score = score
+        self.hooks = []
+
+    def register_hook(self, hook):
+        self.hooks.append(hook)
+
+    def notify(self, memories):
+        for hook in self.hooks:
+            try:
+                hook(memories)
+            except Exception as e:
+                logger.error(f"Eviction hook {hook} failed: {e}")
+
+class EvictionQueue:
+    """
+    Min-heap of (score, memory_id) with lazy invalidation: updates push a new
+    entry and stale ones are skipped when popped, so evicting k memories costs
+    O(k log n).
+    """
+
+    def __init__(self, score):
+        self.score = score
+        self._heap = []
+        self._scores = {}
+        self._counter = itertools.count()
+
+    @classmethod
+    def from_graph(cls, graph, score):
+        queue = cls(score)
+        for node, data in graph.nodes(data=True):
+            queue._scores[node] = score(data)
+        queue._heap = [(s, next(queue._counter), node) for node, s in queue._scores.items()]
+        heapq.heapify(queue._heap)
+        return queue
+
+    def __len__(self):
+        return len(self._scores)
+
+    def push(self, memory_id, memory):
+        score = self.score(memory)
+        self._scores[memory_id] = score
+        heapq.heappush(self._heap, (score, next(self._counter), memory_id))
+
+        # Drop stale entries once they dominate the heap
+        if len(self._heap) > 2 * len(self._scores) + 64:
+            self._heap = [(s, next(self._counter), node) for node, s in self._scores.items()]
+            heapq.heapify(self._heap)
+
+    def remove(self, memory_id):
+        self._scores.pop(memory_id, None)
+
+    def pop_lowest(self, count):
+        """Remove and return the ids of the `count` lowest scoring memories."""
+        evicted = []
+        while self._heap and len(evicted) < count:
+            score, _, memory_id = heapq.heappop(self._heap)
+            if self._scores.get(memory_id) != score:
+                continue  # stale entry
+            del self._scores[memory_id]
+            evicted.append(memory_id)
+        return evicted
+
+class JsonlEvictionLog:
+    """Eviction hook that appends evicted memories to a JSON lines file."""
+
+    def __init__(self, log_file):
+        self.log_file = Path(str(log_file))
+        self._lock = threading.Lock()
+
+    def __call__(self, memories):
+        self.log_file.parent.mkdir(parents=True, exist_ok=True)
+        with self._lock, open(self.log_file, "a", encoding="utf-8") as f:
+            for memory in memories:
+                f.write(json.dumps(memory, default=str) + "\n")
@@ -1,217 +1,439 @@
-import networkx as nx
-import pickle
 import contextvars
 from pathlib import Path
 import threading
+import atexit
 import time
 import secrets
+from contextlib import contextmanager
+from datetime import datetime
 # Context variable to store graph instances
 memory_graph_file_ctx = contextvars.ContextVar('memory_graph_file')
 
 from libre_agent.logger import logger
+from libre_agent.graph_storage import STORAGE_BACKENDS
+from libre_agent.memory_eviction import EvictionPolicy
+
+def to_timestamp(value):
+    """Accept a datetime or epoch seconds (or None) where a timestamp is expected."""
+    if isinstance(value, datetime):
+        return value.timestamp()
+    return value
 
 def generate_memory_id():
     random_part = secrets.token_hex(4)[:8]
     return f"mem-{random_part}"
 
 class MemoryGraph:
-    def __init__(self):
-        self._lock = threading.Lock()
+    """
+    Handle on a memory graph file. Handles created without a file follow the
+    file set for the current context (`set_graph_file`); `for_file` returns
+    the shared handle bound to one file. Either way, all handles on a file
+    share a single storage engine and its reader/writer lock.
+    """
+
+    # Storage engine used for graph files, see graph_storage.STORAGE_BACKENDS
+    storage_backend = 'pickle'
+
+    # Resident mode: each graph file is unpickled once and kept in process
+    # memory. Mutations only mark the graph dirty; a background writer
+    # persists it every `flush_interval` seconds or as soon as
+    # `flush_threshold` mutations are pending.
+    resident = False
+    flush_interval = 5.0
+    flush_threshold = 20
+
+    # Capacity and retention scoring shared by every graph file, see memory_eviction
+    eviction_policy = EvictionPolicy()
+
+    # Also take an flock on "<graph file>.lock" so engines in other processes
+    # sharing a graph file are serialized (not available on Windows)
+    file_locking = False
+
+    # Move evicted and forgotten memories to a compressed archive next to the
+    # graph file (the cold tier) instead of dropping them, see memory_archive
+    archiving = False
+
+    _handles = {}
+    _storages = {}
+    _storages_lock = threading.RLock()
+    _writer_thread = None
+    _writer_wakeup = threading.Event()
+    _writer_stop = threading.Event()
+
+    def __init__(self, graph_file=None):
+        self.graph_file = graph_file
+
+    @classmethod
+    def for_file(cls, graph_file):
+        """Return the process-wide handle bound to `graph_file`."""
+        path = Path(str(graph_file)).resolve()
+        with cls._storages_lock:
+            handle = cls._handles.get(path)
+            if handle is None:
+                handle = cls._handles[path] = cls(path)
+            return handle
 
     @classmethod
     def set_graph_file(cls, graph_file):
         memory_graph_file_ctx.set(graph_file)
 
-    def load_graph(self):
-        graph_file = memory_graph_file_ctx.get()
-        graph_file = Path(str(graph_file))
+    @classmethod
+    def set_storage_backend(cls, backend):
+        if backend not in STORAGE_BACKENDS:
+            raise ValueError(f"Unknown memory graph storage backend '{backend}'. Available: {', '.join(STORAGE_BACKENDS)}")
+        cls.storage_backend = backend
+        logger.info(f"Memory graph storage backend set to '{backend}'.")
 
-        if graph_file.exists():
-            logger.info("Memory graph loaded successfully.")
-            with open(graph_file, "rb") as f:
-                return pickle.load(f)
-        else:
-            logger.info("Initializing a new memory graph.")
-            return nx.DiGraph()
+    @classmethod
+    def set_eviction_policy(cls, eviction_policy):
+        with cls._storages_lock:
+            cls.eviction_policy = eviction_policy
+            for storage in cls._storages.values():
+                storage.set_eviction_policy(eviction_policy)
+        logger.info(f"Memory graph capacity set to {eviction_policy.capacity} memories.")
 
-    def save_graph(self, graph):
-        graph_file = memory_graph_file_ctx.get()
+    @classmethod
+    def set_file_locking(cls, enabled=True):
+        with cls._storages_lock:
+            cls.file_locking = enabled
+            for storage in cls._storages.values():
+                storage.set_file_lock(enabled)
 
-        graph_file = Path(str(graph_file))
-        parent_dir = Path(graph_file.parent)
+        if enabled and cls.resident:
+            logger.warning("Resident memory graphs don't see writes from other processes; file locking only serializes them.")
+        logger.info(f"Memory graph file locking {'enabled' if enabled else 'disabled'}.")
 
-        if not parent_dir.exists():
-            parent_dir.mkdir(parents=True, exist_ok=True)
+    @classmethod
+    def set_archiving(cls, enabled=True):
+        with cls._storages_lock:
+            cls.archiving = enabled
+            for storage in cls._storages.values():
+                storage.set_archive(enabled)
+        logger.info(f"Memory graph archiving {'enabled' if enabled else 'disabled'}.")
 
-        # Check if the number of memories exceeds 200
-        if graph.number_of_nodes() > 200:
-            # Sort memories by temporal_scope
-            memories = [{'memory_id': node, **data} for node, data in graph.nodes(data=True)]
-            sorted_memories = sorted(memories, key=lambda x: x.get('metadata', {}).get('temporal_scope', 'working_memory'))
+    @classmethod
+    def get_storage(cls, graph_file=None):
+        """Return the shared storage engine for `graph_file` (defaults to the current context's file)."""
+        if graph_file is None:
+            graph_file = memory_graph_file_ctx.get()
+
+        key = (cls.storage_backend, Path(str(graph_file)).resolve())
+        with cls._storages_lock:
+            storage = cls._storages.get(key)
+            if storage is None:
+                storage = STORAGE_BACKENDS[cls.storage_backend](
+                    key[1], resident=cls.resident, eviction_policy=cls.eviction_policy, file_lock=cls.file_locking,
+                    archive=cls.archiving
+                )
+                cls._storages[key] = storage
+            return storage
 
-            while graph.number_of_nodes() > 200:
-                memory_to_remove = sorted_memories.pop(0)  # Remove the first memory (oldest temporal_scope)
-                graph.remove_node(memory_to_remove['memory_id'])
-                logger.info(f"Removed memory {memory_to_remove['memory_id']} to maintain memory limit.")
+    @classmethod
+    def enable_resident_mode(cls, flush_interval=5.0, flush_threshold=20):
+        with cls._storages_lock:
+            cls.resident = True
+            cls.flush_interval = flush_interval
+            cls.flush_threshold = flush_threshold
+
+            for storage in cls._storages.values():
+                storage.set_resident(True)
+
+            if cls._writer_thread is None or not cls._writer_thread.is_alive():
+                cls._writer_stop.clear()
+                cls._writer_thread = threading.Thread(
+                    target=cls._writer_loop,
+                    name="MemoryGraphWriter",
+                    daemon=True
+                )
+                cls._writer_thread.start()
+                atexit.register(cls.flush)
 
-        with open(graph_file, "wb") as f:
-            pickle.dump(graph, f)
+        logger.info(
+            f"Memory graph resident mode enabled (flush_interval={flush_interval}s, flush_threshold={flush_threshold})."
+        )
 
-        logger.info(f"Memory graph saved successfully at {graph_file}.")
+    @classmethod
+    def disable_resident_mode(cls):
+        with cls._storages_lock:
+            cls.resident = False
+            for storage in cls._storages.values():
+                storage.set_resident(False)
 
-    def add_memory(self, memory_type, content, metadata=None, parent_memory_ids=None, timestamp=None):
-        with self._lock:
-            memory_id = generate_memory_id()
+        cls._writer_stop.set()
+        cls._writer_wakeup.set()
+        if cls._writer_thread is not None:
+            cls._writer_thread.join()
+            cls._writer_thread = None
 
-            if parent_memory_ids is None:
-                parent_memory_ids = []
-            if metadata is None:
-                metadata = {}
-            if timestamp is None:
-                timestamp = time.time()
+        logger.info("Memory graph resident mode disabled.")
 
-            if metadata.get('role') is None:
-                metadata['role'] = 'reflection'
+    @classmethod
+    def flush(cls, graph_file=None):
+        """Persist pending writes of every storage (or only the one for `graph_file`)."""
+        if graph_file is not None:
+            cls.get_storage(graph_file).flush()
+            return
 
-            if metadata.get('temporal_scope') is None:
-                metadata['temporal_scope'] = 'working_memory'
+        with cls._storages_lock:
+            storages = list(cls._storages.values())
+        for storage in storages:
+            storage.flush()
 
-            if metadata.get('unit_name') is None:
-                metadata['unit_name'] = 'unknown'
+    @classmethod
+    def _writer_loop(cls):
+        while not cls._writer_stop.is_set():
+            cls._writer_wakeup.wait(cls.flush_interval)
+            cls._writer_wakeup.clear()
+            try:
+                cls.flush()
+            except Exception as e:
+                logger.error(f"Memory graph background flush failed: {e}")
+
+    def _storage(self):
+        return MemoryGraph.get_storage(self.graph_file)
+
+    def _after_write(self, storage):
+        if storage.pending_writes >= MemoryGraph.flush_threshold:
+            MemoryGraph._writer_wakeup.set()
 
-            if metadata.get('reasoning_mode') is None:
-                metadata['reasoning_mode'] = 'none'
+    def load_graph(self):
+        return self._storage().load_graph()
 
-            graph = self.load_graph()
+    @contextmanager
+    def transaction(self):
+        """
+        Apply every mutation made inside the block atomically, holding the
+        storage lock once and persisting them with a single write:
 
-            # Add memory node with attributes
-            graph.add_node(
-                memory_id,
-                memory_type=memory_type,  # 'external', 'internal'
-                content=content,
-                metadata=metadata,
-                timestamp=timestamp
-            )
+            with memory_graph.transaction():
+                memory_graph.add_memory(...)
+                memory_graph.remove_memory(...)
+        """
+        storage = self._storage()
+        with storage.transaction():
+            yield self
+        self._after_write(storage)
 
-            memory = {
-                "memory_id": memory_id,
-                "memory_type": memory_type,
-                "content": content,
-                "metadata": metadata,
-                "timestamp": timestamp,
-            }
+    def add_memory(self, memory_type, content, metadata=None, parent_memory_ids=None, timestamp=None):
+        memory_id = generate_memory_id()
 
-            metadata_str = ', '.join(f"{k.capitalize()}={v}" for k, v in metadata.items())
-            logger.debug(f"Added memory {memory_id}: Type={memory_type}, {metadata_str}")
+        if parent_memory_ids is None:
+            parent_memory_ids = []
+        if metadata is None:
+            metadata = {}
+        if timestamp is None:
+            timestamp = time.time()
 
-            # Add edges from parent memories to this memory
-            for parent_id in parent_memory_ids:
-                graph.add_edge(parent_id, memory_id, relation_type='memory_flow')
-                logger.info(f"Created edge from {parent_id} to {memory_id}")
+        if metadata.get('role') is None:
+            metadata['role'] = 'reflection'
 
-            self.save_graph(graph)
+        if metadata.get('temporal_scope') is None:
+            metadata['temporal_scope'] = 'working_memory'
 
-            return memory
+        if metadata.get('unit_name') is None:
+            metadata['unit_name'] = 'unknown'
 
-    def update_memory(self, memory_id: str, metadata: dict, **kwargs):
-        with self._lock:
-            graph = self.load_graph()
+        if metadata.get('reasoning_mode') is None:
+            metadata['reasoning_mode'] = 'none'
+
+        memory = {
+            "memory_id": memory_id,
+            "memory_type": memory_type,
+            "content": content,
+            "metadata": metadata,
+            "timestamp": timestamp,
+        }
 
-            # Check if memory exists
-            if memory_id not in graph:
-                raise ValueError(f"Memory with ID '{memory_id}' not found")
+        storage = self._storage()
+        storage.add_memory(memory, parent_memory_ids)
+        self._after_write(storage)
 
-            memory = graph.nodes[memory_id]
+        metadata_str = ', '.join(f"{k.capitalize()}={v}" for k, v in metadata.items())
+        logger.debug(f"Added memory {memory_id}: Type={memory_type}, {metadata_str}")
 
-            memory_metadata = graph.nodes[memory_id].get('metadata', {})
+        return memory
 
-            for key, value in metadata.items():
-                memory_metadata[key] = value
-            memory['metadata'] = memory_metadata
+    def update_memory(self, memory_id: str, metadata: dict, **kwargs):
+        storage = self._storage()
 
-            for key, value in kwargs.items():
-                memory[key] = value
+        # Check if memory exists
+        if not storage.update_memory(memory_id, metadata, kwargs):
+            raise ValueError(f"Memory with ID '{memory_id}' not found")
 
-            logger.info(f"Updated memory {memory_id} with attributes: {kwargs}")
+        self._after_write(storage)
 
-            self.save_graph(graph)
+        logger.info(f"Updated memory {memory_id} with attributes: {kwargs}")
 
-            return True
+        return True
 
     def remove_memory(self, memory_id):
-        with self._lock:
-            graph = self.load_graph()
+        storage = self._storage()
 
-            if memory_id not in graph:
-                logger.warning(f"Attempted to remove non-existent memory: {memory_id}")
-                return False
+        if not storage.remove_memory(memory_id):
+            logger.warning(f"Attempted to remove non-existent memory: {memory_id}")
+            return False
 
-            graph.remove_node(memory_id)
-            logger.info(f"Removed memory {memory_id} and its associated edges")
+        self._after_write(storage)
 
-            self.save_graph(graph)
-            return True
+        logger.info(f"Removed memory {memory_id} and its associated edges")
+        return True
 
-    def get_all_memories(self):
-        graph = self.load_graph()
+    def add_memories(self, memories):
+        """
+        Add several memories in one transaction. Each item holds the keyword
+        arguments of `add_memory` (memory_type, content, metadata, ...).
+        """
+        with self.transaction():
+            added = [self.add_memory(**memory) for memory in memories]
+
+        logger.info(f"Added {len(added)} memories in one batch.")
+        return added
 
-        result = [ {'memory_id': node, **data} for node, data in graph.nodes(data=True) ]
+    def update_memories(self, updates):
+        """
+        Update several memories in one transaction. Each item is a dict with
+        'memory_id', optional 'metadata' and any field accepted by
+        `update_memory`. Raises ValueError (and keeps none of the updates) if
+        a memory doesn't exist.
+        """
+        with self.transaction():
+            for update in updates:
+                fields = dict(update)
+                memory_id = fields.pop('memory_id')
+                metadata = fields.pop('metadata', {})
+                self.update_memory(memory_id, metadata, **fields)
+
+        logger.info(f"Updated {len(updates)} memories in one batch.")
+        return True
+
+    def remove_memories(self, memory_ids):
+        """Remove several memories in one transaction and return how many existed."""
+        with self.transaction():
+            removed = sum(1 for memory_id in memory_ids if self.remove_memory(memory_id))
+
+        logger.info(f"Removed {removed} memories in one batch.")
+        return removed
+
+    def get_all_memories(self):
+        result = self._storage().get_all_memories()
         logger.info(f"get_all_memories called. Returned {len(result)} memories.")
         return result
 
-    def get_memories(self, first=None, last=None, memory_type=None, metadata=None, sort='timestamp', reverse=False):
+    def get_memories_by_id(self, memory_ids):
+        """Return the memories with the given ids, in that order; unknown ids are skipped."""
+        result = self._storage().get_memories_by_id(memory_ids)
+        logger.debug(f"get_memories_by_id called. Returned {len(result)} memories.")
+        return result
+
+    def get_memory_ids(self):
+        """Return the ids of every stored memory, without decoding the memories."""
+        return self._storage().get_memory_ids()
+
+    def get_neighbors(self, memory_ids, relation_type='memory_flow'):
         """
-        Retrieve memories with optional filtering by memory_type and metadata, with sorting and limiting.
+        Map each of `memory_ids` to the memories it is linked to by
+        `relation_type` edges, in either direction. Memories without such
+        edges may be left out.
         """
-        graph = self.load_graph()
-
-        memories = [
-            {'memory_id': node, **data} for node, data in graph.nodes(data=True)
-            if (memory_type is None or data.get('memory_type') == memory_type) and
-            (metadata is None or all(data.get('metadata', {}).get(k) == v for k, v in metadata.items()))
-        ]
-        # Sort by specified field
-        sorted_memories = sorted(memories, key=lambda x: x.get(sort, 0), reverse=reverse)
+        return self._storage().get_neighbors(memory_ids, relation_type)
 
+    def get_memories(self, first=None, last=None, memory_type=None, metadata=None, sort='timestamp', reverse=False, since=None, until=None):
+        """
+        Retrieve memories with optional filtering by memory_type and metadata, with sorting and limiting.
+        `since` (inclusive) and `until` (exclusive) restrict the timestamps to a range; both take epoch
+        seconds or datetimes and are answered from a sorted timestamp index.
+        """
         if first and last:
             raise ValueError("Cannot specify both 'first' and 'last' parameters simultaneously")
-        elif first:
-            limit = first
-            result = sorted_memories[:first]
-        elif last:
-            result = sorted_memories[-last:]
-            limit = last
-        else:
-            limit = None
-            result = sorted_memories
 
+        result = self._storage().get_memories(
+            first=first,
+            last=last,
+            memory_type=memory_type,
+            metadata=metadata,
+            sort=sort,
+            reverse=reverse,
+            since=to_timestamp(since),
+            until=to_timestamp(until)
+        )
+        limit = first or last
 
         memory_ids = [mem['memory_id'] for mem in result]
         logger.info(
-            f"get_memories called with memory_type='{memory_type}', metadata='{metadata}', sort='{sort}', limit={limit}. "
-            f"Found {len(result)} memories: {memory_ids}"
+            f"get_memories called with memory_type='{memory_type}', metadata='{metadata}', sort='{sort}', limit={limit}, "
+            f"since={since}, until={until}. Found {len(result)} memories: {memory_ids}"
         )
         return result
 
-    def get_stats(self):
-        graph = self.load_graph()
+    def search(self, query, k=10, filters=None, memory_type=None, with_scores=False, since=None, until=None):
+        """
+        Full-text search over memory content (and role/unit/priority). Returns
+        up to `k` memory ids ranked by BM25, or (memory_id, score) pairs when
+        `with_scores` is set. `filters` narrows the candidates by metadata,
+        `since`/`until` by timestamp as in `get_memories`.
+        """
+        results = self._storage().search(
+            query, k=k, memory_type=memory_type, metadata=filters, since=to_timestamp(since), until=to_timestamp(until)
+        )
 
-        """Return statistics about the memory graph"""
-        stats = {
-            'total_memories': graph.number_of_nodes(),
-            'total_connections': graph.number_of_edges(),
-            'memory_type_distribution': {},
-            'role_distribution': {}
-        }
+        logger.info(f"search called with query='{query}', k={k}, filters='{filters}'. Found {len(results)} memories.")
+        if with_scores:
+            return results
+        return [memory_id for memory_id, _ in results]
 
-        # Calculate memory type distribution
-        for _, data in graph.nodes(data=True):
-            mem_type = data.get('memory_type', 'unknown')
-            stats['memory_type_distribution'][mem_type] = stats['memory_type_distribution'].get(mem_type, 0) + 1
+    def archive_memories(self, memories):
+        """
+        Copy `memories` to the cold tier archive, e.g. before deleting them.
+        Returns the number of newly archived memories (0 when archiving is off).
+        """
+        archive = self._storage().archive
+        if archive is None:
+            return 0
+        return archive.archive(memories)
 
-            # Calculate role distribution
-            role = data.get('metadata', {}).get('role', 'unknown')
-            stats['role_distribution'][role] = stats['role_distribution'].get(role, 0) + 1
+    def search_archive(self, query, k=10, with_scores=False, since=None, until=None):
+        """
+        Search the cold tier like `search`; without query terms the most recent
+        archived memories in the `since`/`until` range are returned. Empty when
+        archiving is off.
+        """
+        archive = self._storage().archive
+        if archive is None:
+            return []
+
+        results = archive.search(query, k=k, since=to_timestamp(since), until=to_timestamp(until))
+        logger.info(f"search_archive called with query='{query}', k={k}. Found {len(results)} archived memories.")
+        if with_scores:
+            return results
+        return [memory_id for memory_id, _ in results]
+
+    def get_archived_memories(self, memory_ids):
+        """Return the archived memories with the given ids, in that order; their metadata has `archived` set."""
+        archive = self._storage().archive
+        if archive is None:
+            return []
+        return archive.get_memories_by_id(memory_ids)
+
+    def get_archive_stats(self):
+        """Return the size of the cold tier archive, or None when archiving is off."""
+        archive = self._storage().archive
+        return archive.stats() if archive is not None else None
+
+    def version(self):
+        """Token that changes with every mutation of the graph, e.g. to key caches on."""
+        return self._storage().version()
+
+    def topology_version(self):
+        """Token that changes whenever edges are added or removed, e.g. to key neighborhood caches on."""
+        return self._storage().topology_version()
+
+    def get_cache_stats(self):
+        """Return hit/miss counters of the graph read cache."""
+        return self._storage().cache_stats()
+
+    def get_stats(self):
+        """Return statistics about the memory graph"""
+        stats = self._storage().get_stats()
 
         logger.info(f"Generated memory graph statistics: {stats}")
         return stats
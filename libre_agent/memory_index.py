@@ -0,0 +1,235 @@
+import bisect
+import itertools
+from collections import defaultdict
+
+class MemoryIndex:
+    """
+    Inverted index from (metadata key, value) pairs and memory types to memory
+    ids. It is kept up to date incrementally on add/update/remove so that
+    `get_memories` filters become set intersections instead of full scans.
+
+    Lookups follow the same equality semantics as the linear filter: a `None`
+    filter value matches memories where the key is missing or None.
+    """
+
+    def __init__(self):
+        self._ids = set()
+        self._by_type = defaultdict(set)
+        self._by_metadata = defaultdict(set)
+        self._with_key = defaultdict(set)
+        # Insertion order, so results can keep the graph's node order
+        self._positions = {}
+        self._counter = itertools.count()
+
+    @classmethod
+    def from_graph(cls, graph):
+        index = cls()
+        for node, data in graph.nodes(data=True):
+            index.add(node, data.get('memory_type'), data.get('metadata', {}))
+        return index
+
+    def __len__(self):
+        return len(self._ids)
+
+    @staticmethod
+    def _hashable(value):
+        try:
+            hash(value)
+            return True
+        except TypeError:
+            return False
+
+    def position(self, memory_id):
+        return self._positions.get(memory_id, -1)
+
+    def add(self, memory_id, memory_type, metadata):
+        self._ids.add(memory_id)
+        if memory_id not in self._positions:
+            self._positions[memory_id] = next(self._counter)
+        self._by_type[memory_type].add(memory_id)
+
+        for key, value in metadata.items():
+            self._with_key[key].add(memory_id)
+            if self._hashable(value):
+                self._by_metadata[(key, value)].add(memory_id)
+
+    def remove(self, memory_id, memory_type, metadata, keep_position=False):
+        """Drop a memory's entries. Updates pass keep_position to preserve its order."""
+        self._ids.discard(memory_id)
+        if not keep_position:
+            self._positions.pop(memory_id, None)
+        self._discard(self._by_type, memory_type, memory_id)
+
+        for key, value in metadata.items():
+            self._discard(self._with_key, key, memory_id)
+            if self._hashable(value):
+                self._discard(self._by_metadata, (key, value), memory_id)
+
+    @staticmethod
+    def _discard(buckets, key, memory_id):
+        bucket = buckets.get(key)
+        if bucket is None:
+            return
+        bucket.discard(memory_id)
+        if not bucket:
+            del buckets[key]
+
+    def _matching(self, key, value):
+        if value is None:
+            # Missing keys compare equal to None as well
+            keyed = self._with_key.get(key, set()) - self._by_metadata.get((key, None), set())
+            return self._ids - keyed
+        return self._by_metadata.get((key, value), set())
+
+    def lookup(self, memory_type=None, metadata=None):
+        """
+        Return the set of memory ids matching every filter, or None when no
+        filter applies. Filters on unhashable values can't be answered from the
+        index and are left for the caller to check.
+        """
+        candidate_sets = []
+
+        if memory_type is not None:
+            candidate_sets.append(self._by_type.get(memory_type, set()))
+
+        for key, value in (metadata or {}).items():
+            if self._hashable(value):
+                candidate_sets.append(self._matching(key, value))
+
+        if not candidate_sets:
+            return None
+
+        # Intersect starting from the smallest set
+        candidate_sets.sort(key=len)
+        result = set(candidate_sets[0])
+        for candidates in candidate_sets[1:]:
+            if not result:
+                break
+            result &= candidates
+        return result
+
+class TimestampIndex:
+    """
+    Memory ids sorted by timestamp, so a time range is two binary searches
+    plus a slice: O(log n + k) instead of a pass over every memory.
+
+    Keys are (timestamp, memory_id) pairs; memories mostly arrive in time
+    order, so inserting is usually an append.
+    """
+
+    def __init__(self):
+        self._keys = []
+
+    @classmethod
+    def from_graph(cls, graph):
+        index = cls()
+        index._keys = sorted((cls._timestamp(data.get('timestamp')), node) for node, data in graph.nodes(data=True))
+        return index
+
+    def __len__(self):
+        return len(self._keys)
+
+    @staticmethod
+    def _timestamp(timestamp):
+        return float(timestamp or 0)
+
+    def add(self, memory_id, timestamp):
+        key = (self._timestamp(timestamp), memory_id)
+        if not self._keys or self._keys[-1] < key:
+            self._keys.append(key)
+        else:
+            bisect.insort(self._keys, key)
+
+    def remove(self, memory_id, timestamp):
+        key = (self._timestamp(timestamp), memory_id)
+        position = bisect.bisect_left(self._keys, key)
+        if position < len(self._keys) and self._keys[position] == key:
+            del self._keys[position]
+
+    def range(self, since=None, until=None):
+        """Ids of the memories with since <= timestamp < until, oldest first."""
+        start = 0 if since is None else bisect.bisect_left(self._keys, (since,))
+        end = len(self._keys) if until is None else bisect.bisect_left(self._keys, (until,))
+        return [memory_id for _, memory_id in self._keys[start:end]]
+
+class MemoryStats:
+    """
+    Counters over the stored memories, maintained on every mutation so reading
+    the world state costs O(1) instead of a pass over the whole graph.
+    """
+
+    def __init__(self):
+        self.total_memories = 0
+        self.total_connections = 0
+        self.memory_types = defaultdict(int)
+        self.roles = defaultdict(int)
+        self.priorities = defaultdict(int)
+        # Sums of the access stats kept in metadata, see memory_access
+        self.recalls = 0
+        self.recalled_memories = 0
+        self.updates = 0
+        self.updated_memories = 0
+
+    @classmethod
+    def from_graph(cls, graph):
+        stats = cls()
+        for _, data in graph.nodes(data=True):
+            stats.add(data)
+        stats.total_connections = graph.number_of_edges()
+        return stats
+
+    @staticmethod
+    def _decrement(counter, key):
+        counter[key] -= 1
+        if counter[key] <= 0:
+            del counter[key]
+
+    @staticmethod
+    def _key(value):
+        # Metadata written by the LLM may hold lists or dicts
+        return value if MemoryIndex._hashable(value) else repr(value)
+
+    @staticmethod
+    def _count(value):
+        return int(value) if isinstance(value, (int, float)) and value > 0 else 0
+
+    def _add_access(self, metadata, sign):
+        recalls = self._count(metadata.get('recall_count'))
+        updates = self._count(metadata.get('update_count'))
+        self.recalls += sign * recalls
+        self.recalled_memories += sign * (recalls > 0)
+        self.updates += sign * updates
+        self.updated_memories += sign * (updates > 0)
+
+    def add(self, data):
+        metadata = data.get('metadata', {})
+
+        self.total_memories += 1
+        self.memory_types[self._key(data.get('memory_type', 'unknown'))] += 1
+        self.roles[self._key(metadata.get('role', 'unknown'))] += 1
+        self.priorities[self._key(metadata.get('priority_level', 'unknown'))] += 1
+        self._add_access(metadata, 1)
+
+    def remove(self, data):
+        metadata = data.get('metadata', {})
+
+        self.total_memories -= 1
+        self._decrement(self.memory_types, self._key(data.get('memory_type', 'unknown')))
+        self._decrement(self.roles, self._key(metadata.get('role', 'unknown')))
+        self._decrement(self.priorities, self._key(metadata.get('priority_level', 'unknown')))
+        self._add_access(metadata, -1)
+
+    def as_dict(self):
+        return {
+            'total_memories': self.total_memories,
+            'total_connections': self.total_connections,
+            'memory_type_distribution': dict(self.memory_types),
+            'role_distribution': dict(self.roles),
+            'priority_distribution': dict(self.priorities),
+            'access_stats': {
+                'recalls': self.recalls,
+                'recalled_memories': self.recalled_memories,
+                'updates': self.updates,
+                'updated_memories': self.updated_memories,
+            },
+        }
@@ -0,0 +1,115 @@
+import re
+import math
+import heapq
+from operator import itemgetter
+from collections import defaultdict
+
+# Metadata values indexed next to the content, so e.g. "User" or "CORE" match
+SEARCHABLE_METADATA_KEYS = ('role', 'unit_name', 'priority_level')
+
+TOKEN_PATTERN = re.compile(r"\w+", re.UNICODE)
+
+STOPWORDS = frozenset((
+    'a', 'an', 'and', 'are', 'as', 'at', 'be', 'by', 'do', 'for', 'from', 'i', 'in', 'is', 'it',
+    'me', 'my', 'of', 'on', 'or', 'that', 'the', 'this', 'to', 'was', 'what', 'with', 'you',
+))
+
+def tokenize(text):
+    return [token for token in TOKEN_PATTERN.findall(str(text).lower()) if token not in STOPWORDS]
+
+def searchable_text(memory_data):
+    """Text indexed for a memory: its content plus a few metadata values."""
+    metadata = memory_data.get('metadata', {})
+    parts = [memory_data.get('content') or '']
+    parts.extend(str(metadata[key]) for key in SEARCHABLE_METADATA_KEYS if metadata.get(key) is not None)
+    return ' '.join(parts)
+
+class SearchIndex:
+    """
+    BM25 inverted index over memory text, updated incrementally like
+    MemoryIndex so a keyword search doesn't need a pass over every memory.
+    """
+    k1 = 1.2
+    b = 0.75
+
+    def __init__(self):
+        self._postings = defaultdict(dict)
+        self._lengths = {}
+        self._total_length = 0
+
+    @classmethod
+    def from_graph(cls, graph):
+        index = cls()
+        for node, data in graph.nodes(data=True):
+            index.add(node, data)
+        return index
+
+    def __len__(self):
+        return len(self._lengths)
+
+    def add(self, memory_id, memory_data):
+        if memory_id in self._lengths:
+            self.remove(memory_id)
+
+        tokens = tokenize(searchable_text(memory_data))
+        counts = defaultdict(int)
+        for token in tokens:
+            counts[token] += 1
+        for token, count in counts.items():
+            self._postings[token][memory_id] = count
+
+        self._lengths[memory_id] = len(tokens)
+        self._total_length += len(tokens)
+
+    def remove(self, memory_id, memory_data=None):
+        length = self._lengths.pop(memory_id, None)
+        if length is None:
+            return
+        self._total_length -= length
+
+        # Without the indexed text, every posting list has to be checked
+        tokens = set(tokenize(searchable_text(memory_data))) if memory_data else list(self._postings)
+        for token in tokens:
+            postings = self._postings.get(token)
+            if postings is None:
+                continue
+            postings.pop(memory_id, None)
+            if not postings:
+                del self._postings[token]
+
+    def search(self, query, k=10, candidates=None):
+        """
+        Return up to `k` (memory_id, score) pairs, best first, or all matches
+        when `k` is None. `candidates` restricts the results to a set of
+        memory ids (e.g. from MemoryIndex).
+        """
+        if not self._lengths:
+            return []
+
+        total = len(self._lengths)
+        average_length = self._total_length / total or 1.0
+
+        # norm = k1 * (1 - b + b * length / average_length), split into a constant and a per-length factor
+        base = self.k1 * (1 - self.b)
+        per_length = self.k1 * self.b / average_length
+        lengths = self._lengths
+
+        scores = defaultdict(float)
+        for token in set(tokenize(query)):
+            postings = self._postings.get(token)
+            if not postings:
+                continue
+
+            idf = math.log(1 + (total - len(postings) + 0.5) / (len(postings) + 0.5))
+            weight = idf * (self.k1 + 1)
+            if candidates is not None:
+                if len(candidates) < len(postings):
+                    postings = {memory_id: postings[memory_id] for memory_id in candidates if memory_id in postings}
+                else:
+                    postings = {memory_id: count for memory_id, count in postings.items() if memory_id in candidates}
+            for memory_id, count in postings.items():
+                scores[memory_id] += weight * count / (count + base + per_length * lengths[memory_id])
+
+        if k is None:
+            return sorted(scores.items(), key=itemgetter(1), reverse=True)
+        return heapq.nlargest(k, scores.items(), key=itemgetter(1))
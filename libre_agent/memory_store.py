@@ -0,0 +1,439 @@
+import sys
+import zlib
+import threading
+from collections import OrderedDict
+from operator import attrgetter
+
+import networkx as nx
+
+# Code 0 in every codebook: the metadata key is not set
+MISSING = object()
+
+# Metadata keys stored as small integer codes instead of per-memory strings
+CODED_KEYS = ('role', 'unit_name', 'priority_level', 'temporal_scope', 'reasoning_mode', 'recalled')
+
+# Known values get stable codes; anything else is appended on first use
+KNOWN_VALUES = {
+    'role': ('message', 'reflection', 'episodic', 'semantic', 'procedural', 'personality',
+             'system_status', 'system_operation', 'tool_result'),
+    'unit_name': ('User', 'ReasoningUnit', 'unknown'),
+    'priority_level': ('CORE', 'HIGH', 'MEDIUM', 'LOW', 'BACKGROUND'),
+    'temporal_scope': ('working_memory', 'short_term', 'long_term'),
+    'reasoning_mode': ('none', 'quick', 'deep'),
+    'recalled': (None, False, True),
+}
+
+RELATION_TYPES = ('memory_flow',)
+
+# Memory fields that `update` may overwrite
+FIELDS = ('memory_type', 'content', 'timestamp')
+
+# Content of at least this many characters is kept zlib-compressed
+COMPRESS_THRESHOLD = 1024
+
+class CompressedContent:
+    """zlib-compressed memory content; MemoryStore.content decompresses it."""
+    __slots__ = ('data',)
+
+    def __init__(self, data):
+        self.data = data
+
+    @classmethod
+    def pack(cls, content):
+        """Compress long text content, or return `content` unchanged when it isn't worth it."""
+        if not isinstance(content, str) or len(content) < COMPRESS_THRESHOLD:
+            return content
+        data = zlib.compress(content.encode('utf-8'))
+        return cls(data) if len(data) < 0.9 * len(content) else content
+
+    def unpack(self):
+        return zlib.decompress(self.data).decode('utf-8')
+
+class Codebook:
+    """Maps the values of one metadata key to small integer codes."""
+
+    def __init__(self, values=()):
+        self.values = [MISSING]
+        self._codes = {}
+        for value in values:
+            self.encode(value)
+
+    @staticmethod
+    def codable(value):
+        try:
+            hash(value)
+            return True
+        except TypeError:
+            return False
+
+    def encode(self, value):
+        # Key on the type too, so True, 1 and 1.0 keep distinct codes
+        key = (type(value), value)
+        code = self._codes.get(key)
+        if code is None:
+            code = len(self.values)
+            self.values.append(value)
+            self._codes[key] = code
+        return code
+
+    def decode(self, code):
+        return self.values[code]
+
+class Memory:
+    """One stored memory. Coded metadata lives in slots, the rest in `extra`."""
+    __slots__ = ('memory_id', 'memory_type', 'content', 'timestamp', *CODED_KEYS, 'extra')
+
+    def __init__(self, memory_id, memory_type, content, timestamp,
+                 role=0, unit_name=0, priority_level=0, temporal_scope=0, reasoning_mode=0, recalled=0, extra=None):
+        self.memory_id = memory_id
+        self.memory_type = memory_type
+        self.content = content
+        self.timestamp = timestamp
+        self.role = role
+        self.unit_name = unit_name
+        self.priority_level = priority_level
+        self.temporal_scope = temporal_scope
+        self.reasoning_mode = reasoning_mode
+        self.recalled = recalled
+        self.extra = extra
+
+_codes_of = attrgetter(*CODED_KEYS)
+_row_of = attrgetter(*Memory.__slots__)
+CONTENT = Memory.__slots__.index('content')
+
+# Code of the default relation type, which isn't stored per edge
+MEMORY_FLOW = 1
+
+class MemoryStore:
+    """
+    Compact replacement for the networkx DiGraph the pickle backend used to
+    keep memories in.
+
+    Each memory is a `__slots__` record; the common metadata keys are stored
+    as codebook codes and the remaining keys (interned) in a small dict that
+    is only allocated when needed. Edges are kept as successor/predecessor
+    id lists, with the relation type only recorded when it isn't
+    `memory_flow`. Snapshots pickle plain tuples, which is smaller and
+    faster than pickling records or networkx node dicts.
+
+    Content longer than COMPRESS_THRESHOLD is kept zlib-compressed, in
+    memory and in snapshots, and only decompressed when a memory is read;
+    the `content_cache_size` most recently read contents stay decompressed.
+    Indexes, stats and eviction scores are built from `without_content()`,
+    so they never touch content.
+
+    Edges are only stored between existing memories. `to_networkx` exports
+    the store for analysis and `from_networkx` imports legacy snapshots.
+    """
+
+    content_cache_size = 64
+
+    def __init__(self):
+        self._init_content_cache()
+        self._memories = {}
+        self._successors = {}
+        self._predecessors = {}
+        self._relations = {}
+        self._edge_count = 0
+        self._set_codebooks({key: Codebook(KNOWN_VALUES.get(key, ())) for key in CODED_KEYS}, Codebook(RELATION_TYPES))
+
+    def _init_content_cache(self):
+        self._contents = OrderedDict()
+        self._contents_lock = threading.Lock()
+
+    def _set_codebooks(self, codebooks, relation_types):
+        self.codebooks = codebooks
+        self.relation_types = relation_types
+        # Decoding tables in CODED_KEYS order; codebooks only ever append to them
+        self._tables = [codebooks[key].values for key in CODED_KEYS]
+        self._decoded = {}
+
+    def __len__(self):
+        return len(self._memories)
+
+    def __contains__(self, memory_id):
+        return memory_id in self._memories
+
+    def __iter__(self):
+        return iter(self._memories)
+
+    def number_of_nodes(self):
+        return len(self._memories)
+
+    def number_of_edges(self):
+        return self._edge_count
+
+    def get(self, memory_id):
+        return self._memories.get(memory_id)
+
+    def records(self):
+        return self._memories.values()
+
+    def _encode_metadata(self, metadata):
+        codes = []
+        extra = {}
+        for key in CODED_KEYS:
+            value = metadata.get(key, MISSING)
+            if value is MISSING:
+                codes.append(0)
+            elif Codebook.codable(value):
+                codes.append(self.codebooks[key].encode(value))
+            else:
+                codes.append(0)
+                extra[key] = value
+
+        for key, value in metadata.items():
+            if key not in self.codebooks:
+                extra[sys.intern(key)] = value
+        return codes, extra or None
+
+    def metadata(self, memory):
+        """Decode the full metadata dict of a record."""
+        codes = _codes_of(memory)
+        decoded = self._decoded.get(codes)
+        if decoded is None:
+            # Few distinct combinations exist, so decode each one only once
+            if len(self._decoded) >= 4096:
+                self._decoded.clear()
+            decoded = self._decoded[codes] = {
+                key: table[code]
+                for key, table, code in zip(CODED_KEYS, self._tables, codes)
+                if code
+            }
+
+        metadata = decoded.copy()
+        if memory.extra:
+            metadata.update(memory.extra)
+        return metadata
+
+    def metadata_value(self, memory, key, default=None):
+        """Decode a single metadata value without building the whole dict."""
+        if key in self.codebooks:
+            code = getattr(memory, key)
+            if code:
+                return self.codebooks[key].values[code]
+        if memory.extra:
+            return memory.extra.get(key, default)
+        return default
+
+    def content(self, memory):
+        """Return the content of a record, decompressing it (through the content cache) if needed."""
+        content = memory.content
+        if not isinstance(content, CompressedContent):
+            return content
+
+        with self._contents_lock:
+            cached = self._contents.get(memory.memory_id)
+            if cached is not None and cached[0] is content:
+                self._contents.move_to_end(memory.memory_id)
+                return cached[1]
+
+        text = content.unpack()
+        with self._contents_lock:
+            self._contents[memory.memory_id] = (content, text)
+            self._contents.move_to_end(memory.memory_id)
+            while len(self._contents) > self.content_cache_size:
+                self._contents.popitem(last=False)
+        return text
+
+    def data(self, memory_id, content=True):
+        """Return a memory as the dict a networkx node used to hold; `content=False` leaves the content out."""
+        memory = self._memories[memory_id]
+        data = {
+            'memory_type': memory.memory_type,
+            'metadata': self.metadata(memory),
+            'timestamp': memory.timestamp,
+        }
+        if content:
+            data['content'] = self.content(memory)
+        return data
+
+    def memory_dict(self, memory_id):
+        memory = self._memories[memory_id]
+        return {
+            'memory_id': memory_id,
+            'memory_type': memory.memory_type,
+            'content': self.content(memory),
+            'metadata': self.metadata(memory),
+            'timestamp': memory.timestamp,
+        }
+
+    def nodes(self, data=False, content=True):
+        """Iterate like networkx `graph.nodes(data=True)`, e.g. for MemoryIndex.from_graph."""
+        if not data:
+            return iter(self._memories)
+        return ((memory_id, self.data(memory_id, content)) for memory_id in self._memories)
+
+    def without_content(self):
+        """A view whose `nodes(data=True)` leaves content out, for building indexes and stats."""
+        return ContentlessView(self)
+
+    def add(self, memory_id, data):
+        """Insert or replace a memory; edges of a replaced memory are kept."""
+        codes, extra = self._encode_metadata(data.get('metadata', {}))
+        memory_type = data.get('memory_type')
+        self._memories[memory_id] = Memory(
+            memory_id,
+            sys.intern(memory_type) if isinstance(memory_type, str) else memory_type,
+            CompressedContent.pack(data.get('content')),
+            data.get('timestamp', 0),
+            *codes,
+            extra,
+        )
+
+    def update(self, memory_id, metadata, fields):
+        memory = self._memories.get(memory_id)
+        if memory is None:
+            return False
+
+        if metadata:
+            codes, extra = self._encode_metadata({**self.metadata(memory), **metadata})
+            for key, code in zip(CODED_KEYS, codes):
+                setattr(memory, key, code)
+            memory.extra = extra
+
+        for key, value in fields.items():
+            if key == 'content':
+                value = CompressedContent.pack(value)
+            if key in FIELDS:
+                setattr(memory, key, value)
+        return True
+
+    def remove(self, memory_id):
+        """Remove a memory and its edges; returns the number of edges removed."""
+        if self._memories.pop(memory_id, None) is None:
+            return None
+        with self._contents_lock:
+            self._contents.pop(memory_id, None)
+
+        removed = 0
+        for target_id in self._successors.pop(memory_id, ()):
+            if target_id != memory_id:
+                self._predecessors[target_id].remove(memory_id)
+            self._relations.pop((memory_id, target_id), None)
+            removed += 1
+        for source_id in self._predecessors.pop(memory_id, ()):
+            if source_id != memory_id:
+                self._successors[source_id].remove(memory_id)
+                self._relations.pop((source_id, memory_id), None)
+                removed += 1
+        self._edge_count -= removed
+        return removed
+
+    def add_edge(self, source_id, target_id, relation_type='memory_flow'):
+        """Add or relabel an edge. Returns True when a new edge was created."""
+        if source_id not in self._memories or target_id not in self._memories:
+            return False
+
+        code = self.relation_types.encode(relation_type)
+        if code == MEMORY_FLOW:
+            self._relations.pop((source_id, target_id), None)
+        else:
+            self._relations[(source_id, target_id)] = code
+
+        successors = self._successors.setdefault(source_id, [])
+        if target_id in successors:
+            return False
+
+        successors.append(target_id)
+        self._predecessors.setdefault(target_id, []).append(source_id)
+        self._edge_count += 1
+        return True
+
+    def has_edge(self, source_id, target_id):
+        return target_id in self._successors.get(source_id, ())
+
+    def successors(self, memory_id):
+        return iter(self._successors.get(memory_id, ()))
+
+    def predecessors(self, memory_id):
+        return iter(self._predecessors.get(memory_id, ()))
+
+    def relation_type(self, source_id, target_id):
+        return self.relation_types.values[self._relations.get((source_id, target_id), MEMORY_FLOW)]
+
+    def edges(self):
+        relations = self.relation_types.values
+        for source_id, targets in self._successors.items():
+            for target_id in targets:
+                yield source_id, target_id, relations[self._relations.get((source_id, target_id), MEMORY_FLOW)]
+
+    def to_networkx(self):
+        graph = nx.DiGraph()
+        for memory_id in self._memories:
+            graph.add_node(memory_id, **self.data(memory_id))
+        for source_id, target_id, relation_type in self.edges():
+            graph.add_edge(source_id, target_id, relation_type=relation_type)
+        return graph
+
+    @classmethod
+    def from_networkx(cls, graph):
+        store = cls()
+        for node, data in graph.nodes(data=True):
+            if 'memory_type' not in data:
+                # Dangling edge endpoint without memory attributes
+                continue
+            store.add(node, data)
+        for source_id, target_id, data in graph.edges(data=True):
+            store.add_edge(source_id, target_id, data.get('relation_type', 'memory_flow'))
+        return store
+
+    @staticmethod
+    def _row(memory):
+        row = _row_of(memory)
+        if isinstance(row[CONTENT], CompressedContent):
+            # Snapshots keep the compressed bytes, which unpickle with a plain copy
+            return row[:CONTENT] + (row[CONTENT].data,) + row[CONTENT + 1:]
+        return row
+
+    def __getstate__(self):
+        return {
+            'codebooks': {key: codebook.values[1:] for key, codebook in self.codebooks.items()},
+            'relation_types': self.relation_types.values[1:],
+            'memories': [self._row(memory) for memory in self._memories.values()],
+            'successors': self._successors,
+            'relations': self._relations,
+        }
+
+    def __setstate__(self, state):
+        self._set_codebooks(
+            {key: Codebook(values) for key, values in state['codebooks'].items()},
+            Codebook(state['relation_types']),
+        )
+
+        self._init_content_cache()
+        self._memories = {}
+        for row in state['memories']:
+            memory = Memory(*row)
+            if isinstance(memory.content, bytes):
+                memory.content = CompressedContent(memory.content)
+            else:
+                # Snapshots written before content compression
+                memory.content = CompressedContent.pack(memory.content)
+            if memory.extra:
+                memory.extra = {sys.intern(key): value for key, value in memory.extra.items()}
+            self._memories[memory.memory_id] = memory
+
+        self._successors = state['successors']
+        self._relations = state['relations']
+        self._predecessors = {}
+        self._edge_count = 0
+        for source_id, targets in self._successors.items():
+            for target_id in targets:
+                self._predecessors.setdefault(target_id, []).append(source_id)
+            self._edge_count += len(targets)
+
+class ContentlessView:
+    """Read-only view of a MemoryStore that iterates memories without their content."""
+
+    def __init__(self, store):
+        self.store = store
+
+    def nodes(self, data=False):
+        return self.store.nodes(data=data, content=False)
+
+    def number_of_nodes(self):
+        return self.store.number_of_nodes()
+
+    def number_of_edges(self):
+        return self.store.number_of_edges()
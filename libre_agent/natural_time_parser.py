@@ -0,0 +1,305 @@
+import re
+from datetime import datetime, timedelta
+
+UNITS = r'seconds?|minutes?|hours?|days?|weeks?|months?|years?'
+DAYS = ['monday', 'tuesday', 'wednesday', 'thursday', 'friday', 'saturday', 'sunday']
+
+# Periods of a single word or phrase, tried in this order; capturing groups feed `_resolve_period`
+PERIOD_PATTERNS = [
+    rf'(?:the )?(?:last|past|previous) (\d+|an?) ({UNITS})',
+    rf'(?:the )?past ({UNITS})',
+    r'(last|previous|this|next) (week|month|year)',
+    r'(?:the )?(?:last|previous) (day|hour|minute)',
+    rf'(\d+|an?) ({UNITS}) ago',
+    r'(today|yesterday|tomorrow)',
+    r'(last night|tonight|this morning|this afternoon|this evening)',
+    r'(?:(last|this|next|on) )?(' + '|'.join(DAYS) + r')',
+    r'(\d{4}-\d{2}-\d{2})',
+]
+
+# Parts of the day, as (start hour, end hour) relative to today's midnight
+DAY_PARTS = {
+    'this morning': (6, 12),
+    'this afternoon': (12, 18),
+    'this evening': (18, 24),
+    'tonight': (18, 30),
+    'last night': (-6, 6),
+}
+
+def _uncaptured(pattern):
+    return re.sub(r'\((?!\?)', '(?:', pattern)
+
+PERIOD = '|'.join(_uncaptured(pattern) for pattern in PERIOD_PATTERNS)
+
+# Whole temporal expressions, as searched for in free text by `find_range`
+RANGE_EXPRESSION = re.compile(
+    rf'\b(?:between (?:{PERIOD}) and (?:{PERIOD})|from (?:{PERIOD}) (?:to|until) (?:{PERIOD})'
+    rf'|(?:since|before|until) (?:{PERIOD})|{PERIOD})\b'
+)
+
+class NaturalTimeParser:
+    """
+    Parses natural language time expressions relative to `now`: `parse`
+    resolves a point in time ("tomorrow at 5pm", "3 days ago"), `parse_range`
+    a period ("yesterday", "last week", "past 3 hours", "since monday"), and
+    `find_range` looks for such a period inside a sentence.
+    """
+
+    def __init__(self, now=None):
+        self.now = now or datetime.now()
+        self.time_units = {
+            'minute': 60,
+            'hour': 3600,
+            'day': 86400,
+            'week': 604800,
+            'month': 2592000,  # approx
+            'year': 31536000   # approx
+        }
+
+    def parse(self, text):
+        text = text.lower().strip()
+        dt = self._parse_combined(text) or self._parse_relative(text) or \
+             self._parse_absolute(text) or self._parse_day_of_week(text) or \
+             self._parse_special_cases(text)
+
+        if dt:
+            return dt
+
+        raise ValueError(f'Unable to parse time: {text}')
+
+    def _parse_combined(self, text):
+        # Handle "X at Y" format (e.g., "tomorrow at 5pm")
+        if ' at ' in text:
+            date_part, time_part = text.split(' at ', 1)
+            base_date = self.parse(date_part)
+            return self._parse_time(base_date, time_part)
+        return None
+
+    def _parse_relative(self, text):
+        # Handle "in X units" format first
+        in_match = re.match(r'^in\s+(\d+)\s*(seconds?|minutes?|hours?|days?|weeks?|months?|years?)\b', text)
+        if in_match:
+            amount = int(in_match.group(1))
+            unit = in_match.group(2).rstrip('s')
+            return self.now + self._get_timedelta(amount, unit)
+
+        # Handle "X units ago/from now" format
+        amount_match = re.match(
+            r'^(\d+)\s*(seconds?|minutes?|hours?|days?|weeks?|months?|years?)\s+(ago|from now)\b',
+            text
+        )
+        if amount_match:
+            amount = int(amount_match.group(1))
+            unit = amount_match.group(2).rstrip('s')
+            direction = -1 if amount_match.group(3) == 'ago' else 1
+            return self.now + direction * self._get_timedelta(amount, unit)
+
+        # Handle "next/last X units" format with optional quantity
+        next_last_match = re.match(
+            r'^(next|last)\s+(\d+)?\s*(seconds?|minutes?|hours?|days?|weeks?|months?|years?)\b',
+            text
+        )
+
+        if next_last_match:
+            direction = 1 if next_last_match.group(1) == 'next' else -1
+            amount = int(next_last_match.group(2)) if next_last_match.group(2) else 1
+            unit = next_last_match.group(3).rstrip('s')
+            return self.now + direction * self._get_timedelta(amount, unit)
+
+        return None
+
+    def _parse_absolute(self, text):
+        # Handle special keywords first
+        if text == "midnight":
+            return self.now.replace(hour=0, minute=0, second=0, microsecond=0)
+        if text == "noon":
+            return self.now.replace(hour=12, minute=0, second=0, microsecond=0)
+
+        # Handle numeric time formats
+        time_match = re.match(r'(\d+)(?::(\d+))?\s*(am|pm)?', text)
+        if time_match:
+            return self._parse_time(self.now, text)
+
+        return None
+
+    def _parse_day_of_week(self, text):
+        # Patterns like "next monday" or "last friday"
+        days = ['monday', 'tuesday', 'wednesday', 'thursday', 'friday', 'saturday', 'sunday']
+        match = re.match(r'(next|last|this)\s+(' + '|'.join(days) + ')', text)
+        if match:
+            direction = match.group(1)
+            target_day = days.index(match.group(2))
+            current_day = self.now.weekday()
+            delta = target_day - current_day
+
+            if direction == 'next':
+                delta += 7 if delta <= 0 else 0
+            elif direction == 'last':
+                delta -= 7 if delta >= 0 else 0
+            else:  # this
+                delta = delta % 7
+
+            return self.now + timedelta(days=delta)
+        return None
+
+    def _parse_special_cases(self, text):
+        # Handle standalone "now" first
+        if text == "now":
+            return self.now
+
+        # Track if we make any changes
+        modified = False
+
+        # Handle replacements
+        if 'tomorrow' in text:
+            text = text.replace('tomorrow', 'in 1 day')
+            modified = True
+        if 'yesterday' in text:
+            text = text.replace('yesterday', '1 day ago')
+            modified = True
+
+        # Handle today removal
+        new_text, count = re.subn(r'\btoday\b', '', text)
+        if count > 0:
+            text = new_text.strip()
+            modified = True
+
+        if not modified:
+            return None  # Prevent recursion if no changes
+
+        return self.parse(text) if text else None
+
+    def _parse_time(self, base_date, time_str):
+        # Parse time component and apply to base date
+        time_match = re.match(r'(\d+)(?::(\d+))?\s*(am|pm)?', time_str)
+        if not time_match:
+            return base_date
+
+        hour = int(time_match.group(1))
+        minute = int(time_match.group(2) or 0)
+        period = time_match.group(3)
+
+        if period == 'pm' and hour < 12:
+            hour += 12
+        elif period == 'am' and hour == 12:
+            hour = 0
+
+        return base_date.replace(hour=hour, minute=minute, second=0, microsecond=0)
+
+    def _get_timedelta(self, amount, unit):
+        unit = unit.rstrip('s')  # normalize plural
+        if unit in ['second', 'minute', 'hour', 'day']:
+            return timedelta(**{f'{unit}s': amount})
+        elif unit == 'week':
+            return timedelta(days=amount*7)
+        elif unit == 'month':
+            return timedelta(days=amount*30)
+        elif unit == 'year':
+            return timedelta(days=amount*365)
+        return timedelta(0)
+
+    def parse_range(self, text):
+        """
+        Resolve a period into a (start, end) datetime pair, start inclusive
+        and end exclusive; either may be None for an open range. Calendar
+        periods ("yesterday", "last week") cover whole days, weeks, months
+        or years; "past/last N units" ends now.
+        """
+        text = ' '.join(text.lower().split())
+
+        match = re.fullmatch(r'(?:between (.+) and (.+)|from (.+) (?:to|until) (.+))', text)
+        if match:
+            first, second = [group for group in match.groups() if group is not None]
+            return self.parse_range(first)[0], self.parse_range(second)[1]
+
+        match = re.fullmatch(r'(since|before|until) (.+)', text)
+        if match:
+            start, end = self.parse_range(match.group(2))
+            if match.group(1) == 'since':
+                return start, None
+            return None, start if match.group(1) == 'before' else end
+
+        for pattern in PERIOD_PATTERNS:
+            match = re.fullmatch(pattern, text)
+            if match:
+                return self._resolve_period(pattern, match.groups())
+
+        # A point in time ("5pm", "noon") stands for the minute it names
+        point = self.parse(text)
+        return point, point + timedelta(minutes=1)
+
+    def find_range(self, text):
+        """
+        Find the first temporal expression in `text`. Returns
+        (start, end, rest of the text) or None when there is none.
+        """
+        lowered = text.lower()
+        for match in RANGE_EXPRESSION.finditer(lowered):
+            try:
+                start, end = self.parse_range(match.group(0))
+            except ValueError:
+                continue
+            rest = ' '.join((text[:match.start()] + ' ' + text[match.end():]).split())
+            return start, end, rest
+        return None
+
+    def _resolve_period(self, pattern, groups):
+        today = self._start_of_day(self.now)
+
+        if pattern == PERIOD_PATTERNS[0]:
+            amount, unit = groups
+            return self.now - self._get_timedelta(self._amount(amount), unit), self.now
+        if pattern == PERIOD_PATTERNS[1]:
+            return self.now - self._get_timedelta(1, groups[0]), self.now
+        if pattern == PERIOD_PATTERNS[2]:
+            direction, unit = groups
+            return self._calendar_period(unit, {'last': -1, 'previous': -1, 'this': 0, 'next': 1}[direction])
+        if pattern == PERIOD_PATTERNS[3]:
+            return self.now - self._get_timedelta(1, groups[0]), self.now
+        if pattern == PERIOD_PATTERNS[4]:
+            amount, unit = groups
+            unit = unit.rstrip('s')
+            if unit in ('day', 'week', 'month', 'year'):
+                return self._calendar_period(unit, -self._amount(amount))
+            return self.now - self._get_timedelta(self._amount(amount), unit), self.now
+        if pattern == PERIOD_PATTERNS[5]:
+            return self._calendar_period('day', {'yesterday': -1, 'today': 0, 'tomorrow': 1}[groups[0]])
+        if pattern == PERIOD_PATTERNS[6]:
+            start_hour, end_hour = DAY_PARTS[groups[0]]
+            return today + timedelta(hours=start_hour), today + timedelta(hours=end_hour)
+        if pattern == PERIOD_PATTERNS[7]:
+            direction, day = groups
+            if direction in ('last', 'this', 'next'):
+                start = self._start_of_day(self._parse_day_of_week(f"{direction} {day}"))
+            else:
+                # A bare weekday means the most recent one, today included
+                start = today - timedelta(days=(self.now.weekday() - DAYS.index(day)) % 7)
+            return start, start + timedelta(days=1)
+
+        start = datetime.strptime(groups[0], '%Y-%m-%d')
+        return start, start + timedelta(days=1)
+
+    def _calendar_period(self, unit, offset):
+        """The calendar day, week, month or year `offset` periods away from the current one."""
+        today = self._start_of_day(self.now)
+        if unit == 'day':
+            start = today + timedelta(days=offset)
+            return start, start + timedelta(days=1)
+        if unit == 'week':
+            start = today - timedelta(days=today.weekday()) + timedelta(weeks=offset)
+            return start, start + timedelta(weeks=1)
+        if unit == 'month':
+            month = today.year * 12 + today.month - 1 + offset
+            start = today.replace(year=month // 12, month=month % 12 + 1, day=1)
+            end = today.replace(year=(month + 1) // 12, month=(month + 1) % 12 + 1, day=1)
+            return start, end
+        start = today.replace(year=today.year + offset, month=1, day=1)
+        return start, start.replace(year=start.year + 1)
+
+    @staticmethod
+    def _start_of_day(dt):
+        return dt.replace(hour=0, minute=0, second=0, microsecond=0)
+
+    @staticmethod
+    def _amount(amount):
+        return 1 if amount in ('a', 'an') else int(amount)
@@ -0,0 +1,197 @@
+import time
+import asyncio
+import inspect
+import threading
+from collections import deque
+
+from libre_agent.logger import logger
+
+OVERFLOW_POLICIES = ('drop_oldest', 'coalesce', 'block')
+
+def observer_name(observer):
+    return getattr(observer, '__qualname__', None) or type(observer).__name__
+
+class ObserverChannel:
+    """
+    Delivers working memory notifications to one observer, in order, from
+    its own bounded queue and worker task, so a slow observer only delays
+    itself.
+
+    `put` may be called from any thread and never waits on the observer.
+    When `capacity` notifications are pending, the `overflow` policy decides:
+    'drop_oldest' drops the oldest pending one, 'coalesce' first folds a
+    notification into the pending one for the same memory id (keeping its
+    place) and otherwise drops the oldest, and 'block' makes producer
+    threads wait up to `block_timeout` seconds for room before dropping the
+    oldest (the event loop itself is never blocked).
+
+    Batch observers are called with a list of up to `batch_size` memories
+    per wake-up, gathered for `batch_window` seconds; others are called
+    with one memory at a time. Coroutine observers are cancelled after
+    `timeout` seconds and errors are logged, never raised. `stats` reports
+    deliveries, drops and the latency from enqueueing to delivery.
+    """
+
+    capacity = 100
+    overflow = 'drop_oldest'
+    batch_size = 20
+    batch_window = 0.05
+    timeout = 10.0
+    block_timeout = 5.0
+
+    def __init__(self, observer, loop, batch=False, capacity=None, overflow=None, timeout=None):
+        if overflow is not None and overflow not in OVERFLOW_POLICIES:
+            raise ValueError(f"Unknown observer overflow policy '{overflow}'")
+
+        self.observer = observer
+        self.name = observer_name(observer)
+        self.loop = loop
+        self.batch = batch
+        self.capacity = capacity or self.capacity
+        self.overflow = overflow or self.overflow
+        # Like `configure`, 0 waits on the observer indefinitely
+        self.timeout = self.timeout if timeout is None else (timeout or None)
+
+        self.lock = threading.Lock()
+        self.not_full = threading.Condition(self.lock)
+        # Pending [enqueued at, memory] entries, and the entry of each memory id when coalescing
+        self._pending = deque()
+        self._pending_by_id = {}
+        self._wakeup = asyncio.Event()
+
+        self.delivered = 0
+        self.dropped = 0
+        self.coalesced = 0
+        self.timeouts = 0
+        self.errors = 0
+        self.batches = 0
+        self._handled = 0
+        self._latency_total = 0.0
+        self._latency_max = 0.0
+
+        self.task = loop.create_task(self._run())
+
+    @classmethod
+    def configure(cls, capacity=None, overflow=None, batch_size=None, batch_window=None, timeout=None, block_timeout=None):
+        if overflow is not None:
+            if overflow not in OVERFLOW_POLICIES:
+                raise ValueError(f"Unknown observer overflow policy '{overflow}'")
+            cls.overflow = overflow
+        if capacity is not None:
+            cls.capacity = capacity
+        if batch_size is not None:
+            cls.batch_size = batch_size
+        if batch_window is not None:
+            cls.batch_window = batch_window
+        if timeout is not None:
+            # 0 waits on observers indefinitely
+            cls.timeout = timeout or None
+        if block_timeout is not None:
+            cls.block_timeout = block_timeout
+
+    def _on_loop(self):
+        try:
+            return asyncio.get_running_loop() is self.loop
+        except RuntimeError:
+            return False
+
+    def put(self, memory):
+        on_loop = self._on_loop()
+        memory_id = memory.get('memory_id') if self.overflow == 'coalesce' else None
+        with self.lock:
+            entry = self._pending_by_id.get(memory_id) if memory_id is not None else None
+            if entry is not None:
+                entry[1] = memory
+                self.coalesced += 1
+                return
+
+            if len(self._pending) >= self.capacity and self.overflow == 'block' and not on_loop:
+                deadline = time.monotonic() + self.block_timeout
+                while len(self._pending) >= self.capacity and time.monotonic() < deadline:
+                    self.not_full.wait(deadline - time.monotonic())
+
+            while len(self._pending) >= self.capacity:
+                self._forget(self._pending.popleft())
+                self.dropped += 1
+                if self.dropped == 1 or self.dropped % 100 == 0:
+                    logger.warning(f"Observer {self.name} is falling behind, {self.dropped} notifications dropped so far")
+
+            entry = [time.monotonic(), memory]
+            self._pending.append(entry)
+            if memory_id is not None:
+                self._pending_by_id[memory_id] = entry
+
+        if on_loop:
+            self._wakeup.set()
+        else:
+            self.loop.call_soon_threadsafe(self._wakeup.set)
+
+    def _forget(self, entry):
+        memory_id = entry[1].get('memory_id')
+        if self._pending_by_id.get(memory_id) is entry:
+            del self._pending_by_id[memory_id]
+
+    def _take(self):
+        with self.lock:
+            count = min(self.batch_size if self.batch else 1, len(self._pending))
+            entries = [self._pending.popleft() for _ in range(count)]
+            for entry in entries:
+                self._forget(entry)
+            if entries:
+                self.not_full.notify_all()
+        return entries
+
+    async def _run(self):
+        while True:
+            await self._wakeup.wait()
+            # Cleared before draining, so a put racing the drain wakes us again
+            self._wakeup.clear()
+            if self.batch and self.batch_window:
+                await asyncio.sleep(self.batch_window)
+
+            entries = self._take()
+            while entries:
+                await self._deliver(entries)
+                entries = self._take()
+
+    async def _deliver(self, entries):
+        memories = [memory for _, memory in entries]
+        try:
+            result = self.observer(memories) if self.batch else self.observer(memories[0])
+            if inspect.isawaitable(result):
+                await asyncio.wait_for(result, self.timeout)
+            self.delivered += len(memories)
+        except asyncio.TimeoutError:
+            self.timeouts += 1
+            logger.warning(f"Observer {self.name} timed out after {self.timeout}s on {len(memories)} memories")
+        except Exception as e:
+            self.errors += 1
+            logger.error(f"Observer {self.name} failed on {len(memories)} memories: {e}", exc_info=True)
+
+        self.batches += 1
+        self._handled += len(entries)
+        finished = time.monotonic()
+        for enqueued_at, _ in entries:
+            latency = finished - enqueued_at
+            self._latency_total += latency
+            self._latency_max = max(self._latency_max, latency)
+
+    def stats(self):
+        with self.lock:
+            pending = len(self._pending)
+        handled = self._handled
+        return {
+            'observer': self.name,
+            'pending': pending,
+            'delivered': self.delivered,
+            'dropped': self.dropped,
+            'coalesced': self.coalesced,
+            'timeouts': self.timeouts,
+            'errors': self.errors,
+            'batches': self.batches,
+            'mean_latency': self._latency_total / handled if handled else 0.0,
+            'max_latency': self._latency_max,
+        }
+
+    def close(self):
+        self.task.cancel()
@@ -7,6 +7,8 @@ from libre_agent.working_memory import WorkingMemory, WorkingMemoryAsync
 from libre_agent.logger import logger
 from libre_agent.utils import load_units, load_tools, maybe_invoke_tool_new
 from libre_agent.units.reasoning_unit import ReasoningUnit
+from libre_agent.forget_recognizer import ForgetRecognizer
+from libre_agent.memory_access import AccessTracker
 
 from contextvars import ContextVar, copy_context
 
@@ -19,12 +21,14 @@ class LibreAgentEngine:
         reasoning_model="gemini/gemini-2.0-flash-001",
         sync=False,
         memory_graph_file=None,
+        forget_schedule=0,
     ):
         self.deep_schedule = deep_schedule
+        self.forget_schedule = forget_schedule
         self.reasoning_model = reasoning_model
 
         self.memory_graph_file = memory_graph_file
-        self.memory_graph = MemoryGraph()
+        self.memory_graph = MemoryGraph.for_file(memory_graph_file) if memory_graph_file else MemoryGraph()
 
         load_units()
         load_tools()
@@ -40,10 +44,11 @@ class LibreAgentEngine:
         self.async_task1 = None
         self.async_task2 = None
         self.reflection_schedule = None
+        self.forget_recognizer = ForgetRecognizer(memory_graph=self.memory_graph)
 
         self.reasoning_queue_counter = 0
 
-        logger.info(f"libreagentengine: initialized with deep_schedule={deep_schedule}, reasoning_model={reasoning_model}")
+        logger.info(f"libreagentengine: initialized with deep_schedule={deep_schedule}, forget_schedule={forget_schedule}, reasoning_model={reasoning_model}")
 
     def purge(self):
         self.working_memory.clear()
@@ -63,7 +68,7 @@ class LibreAgentEngine:
                 scheduler_memory = self.working_memory.get_memories(metadata={'role': 'system_status', 'unit_name': 'Scheduler'}, last=1)
 
                 if scheduler_memory:
-                    scheduler_memory[0]['content'] = content
+                    self.working_memory.update_memory(scheduler_memory[0]['memory_id'], content=content)
                 else:
                     self.working_memory.add_memory(
                         memory_type='internal',
@@ -107,6 +112,9 @@ class LibreAgentEngine:
             self.reflection_schedule = schedule.every(self.deep_schedule).minutes.do(self._queue_reflection, 2, 'deep')
             self.stop_flag.clear()
 
+        if self.forget_schedule > 0:
+            schedule.every(self.forget_schedule).minutes.do(self._queue_forgetting)
+
         self.working_memory.register_observer(self.reflex)
         self.async_task1 = asyncio.create_task(self.schedule_reasoning_queue())
         self.async_task2 = asyncio.create_task(self.process_reasoning_queue())
@@ -149,6 +157,11 @@ class LibreAgentEngine:
     async def migrate(self):
         self._queue_reflection(1, 'migration')
 
+    def _queue_forgetting(self):
+        # Forgetting needs no LLM call, so it runs next to reflections instead of queueing behind them
+        ctx = copy_context()
+        threading.Thread(target=ctx.run, args=(self.forget_recognizer.forget,), name="ForgetRecognizer", daemon=True).start()
+
     def _queue_reflection(self, priority=1, mode='quick'):
         async def _perform_reflection():
             await asyncio.to_thread(self.execute, mode)
@@ -167,6 +180,8 @@ class LibreAgentEngine:
             self.async_task1.cancel()
         if self.async_task2:
             self.async_task2.cancel()
-        self.working_memory.observers = []
+        self.working_memory.clear_observers()
         schedule.clear()
+        AccessTracker.flush_all()
+        MemoryGraph.flush()
         logger.info("libreagentengine: fully stopped.")
@@ -0,0 +1,92 @@
+import copy
+import time
+import threading
+from collections import OrderedDict
+
+from libre_agent.logger import logger
+
+def normalize_query(query):
+    return " ".join(str(query or "").lower().split())
+
+class RecallCache:
+    """
+    LRU cache of recall results with a time-to-live.
+
+    Keys include the graph version, so any mutation of the graph makes the
+    cached results unreachable; entries of older versions are dropped as soon
+    as a result for a newer version is stored. Results are copied in and out,
+    since RecallTool marks the memories it returns as recalled.
+    """
+
+    def __init__(self, capacity=128, ttl=300.0):
+        self.capacity = capacity
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        self._version = None
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def key(query, number, exclude_ids, strategy, expand, time_range, version):
+        return (normalize_query(query), number, frozenset(exclude_ids), strategy, expand, time_range, version)
+
+    @property
+    def enabled(self):
+        return self.capacity > 0 and self.ttl > 0
+
+    def get(self, key):
+        """Return a copy of the cached result for `key`, or None."""
+        if not self.enabled:
+            return None
+
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and time.monotonic() - entry[0] > self.ttl:
+                del self._entries[key]
+                entry = None
+
+            if entry is None:
+                self.misses += 1
+            else:
+                self._entries.move_to_end(key)
+                self.hits += 1
+            self._log(key, entry is not None)
+
+        return copy.deepcopy(entry[1]) if entry is not None else None
+
+    def put(self, key, result):
+        if not self.enabled:
+            return
+
+        version = key[-1]
+        with self._lock:
+            if version != self._version:
+                # Results computed against an older graph can't be hit anymore
+                self._entries = OrderedDict((k, v) for k, v in self._entries.items() if k[-1] == version)
+                self._version = version
+
+            self._entries[key] = (time.monotonic(), copy.deepcopy(result))
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.capacity:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self):
+        total = self.hits + self.misses
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_rate': self.hits / total if total else 0.0,
+            'size': len(self._entries),
+        }
+
+    def _log(self, key, hit):
+        total = self.hits + self.misses
+        logger.info(
+            f"Recall cache {'hit' if hit else 'miss'} for '{key[0]}': "
+            f"hit rate {self.hits / total:.1%} ({self.hits}/{total}), {len(self._entries)} entries"
+        )
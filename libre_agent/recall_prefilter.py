@@ -0,0 +1,169 @@
+import math
+import time
+
+from libre_agent.logger import logger
+from libre_agent.memory_graph import memory_graph as default_memory_graph
+from libre_agent.memory_eviction import PRIORITY_WEIGHTS, MAX_PRIORITY
+from libre_agent.memory_access import AccessTracker
+from libre_agent.memory_search import tokenize
+
+class RecallPrefilter:
+    """
+    First stage of recall: picks the `candidates` most promising memories
+    locally, so the LLM only ever reranks a bounded set.
+
+    The candidate pool is the `lexical_pool` best full-text matches plus the
+    `recent_pool` most recent memories, both bounded, so the cost doesn't
+    depend on the size of the graph. Each memory in the pool is scored as a
+    weighted sum of its lexical match (BM25 relative to the best match),
+    recency (since it was stored or last recalled or updated, halving every
+    `recency_half_life` seconds), priority_level and usage (recall count,
+    maxed out at `frequent_recalls`).
+
+    When the graph has an archive (the cold tier), up to `archive_pool` of
+    its best full-text matches join the pool, their lexical match scaled by
+    `archive_weight`. Queries without terms only reach the archive through
+    a time range.
+    """
+
+    def __init__(self, candidates=30, lexical_pool=100, recent_pool=50,
+                 lexical_weight=1.0, recency_weight=0.3, priority_weight=0.3,
+                 usage_weight=0.2, frequent_recalls=10, archive_pool=20, archive_weight=0.8,
+                 recency_half_life=24 * 3600, fast_path=True,
+                 decisive_lexical=0.5, decisive_margin=0.3):
+        self.candidates = candidates
+        self.lexical_pool = lexical_pool
+        self.recent_pool = recent_pool
+        self.lexical_weight = lexical_weight
+        self.recency_weight = recency_weight
+        self.priority_weight = priority_weight
+        self.usage_weight = usage_weight
+        self.frequent_recalls = frequent_recalls
+        self.archive_pool = archive_pool
+        self.archive_weight = archive_weight
+        self.recency_half_life = recency_half_life
+        self.fast_path = fast_path
+        self.decisive_lexical = decisive_lexical
+        self.decisive_margin = decisive_margin
+
+    def priority(self, memory):
+        level = str(memory['metadata'].get('priority_level')).upper()
+        return math.log2(PRIORITY_WEIGHTS.get(level, 1.0)) / MAX_PRIORITY
+
+    def recency(self, memory, now, access=None):
+        access = access or {}
+        used = max(memory.get('timestamp') or 0, access.get('last_recalled') or 0, access.get('last_updated') or 0)
+        age = max(now - used, 0)
+        return 2 ** (-age / self.recency_half_life)
+
+    def usage(self, access):
+        return min(math.log1p(access.get('recall_count') or 0) / math.log1p(self.frequent_recalls), 1.0)
+
+    def score(self, memory, lexical, now, access=None):
+        """`access` holds the memory's ACCESS_KEYS; without it the stored metadata is used."""
+        access = access if access is not None else memory.get('metadata', {})
+        return (
+            self.lexical_weight * lexical
+            + self.recency_weight * self.recency(memory, now, access)
+            + self.priority_weight * self.priority(memory)
+            + self.usage_weight * self.usage(access)
+        )
+
+    def select(self, query, exclude_ids=(), k=None, memory_graph=None, since=None, until=None):
+        """
+        Return up to `k` (default `candidates`) dicts of
+        {'memory', 'score', 'lexical'}, best first, leaving out `exclude_ids`.
+        `since`/`until` restrict both pools to a timestamp range.
+        """
+        memory_graph = memory_graph or default_memory_graph
+        k = k or self.candidates
+        exclude_ids = set(exclude_ids)
+
+        # Ask for extra matches to make up for the excluded ones
+        matches = memory_graph.search(
+            query, k=self.lexical_pool + len(exclude_ids), with_scores=True, since=since, until=until
+        ) if query else []
+        lexical = {memory_id: score for memory_id, score in matches if memory_id not in exclude_ids}
+        best_match = max(lexical.values(), default=0.0) or 1.0
+
+        pool = {memory['memory_id']: memory for memory in memory_graph.get_memories_by_id(lexical)}
+        for memory in memory_graph.get_memories(last=self.recent_pool + len(exclude_ids), since=since, until=until):
+            if memory['memory_id'] not in exclude_ids:
+                pool.setdefault(memory['memory_id'], memory)
+
+        now = time.time()
+        tracker = AccessTracker.for_graph(memory_graph)
+        scored = []
+        for memory_id, memory in pool.items():
+            relative_match = lexical.get(memory_id, 0.0) / best_match
+            scored.append({
+                'memory': memory,
+                'score': self.score(memory, relative_match, now, tracker.stats(memory)),
+                'lexical': relative_match,
+            })
+        for memory, relative_match in self.archived(query, exclude_ids | set(pool), memory_graph, since, until):
+            relative_match *= self.archive_weight
+            scored.append({
+                'memory': memory,
+                'score': self.score(memory, relative_match, now),
+                'lexical': relative_match,
+            })
+        scored.sort(key=lambda candidate: candidate['score'], reverse=True)
+
+        logger.debug(f"RecallPrefilter scored {len(scored)} memories ({len(lexical)} lexical matches) for '{query}'")
+        return scored[:k]
+
+    def archived(self, query, exclude_ids=(), memory_graph=None, since=None, until=None):
+        """
+        Return up to `archive_pool` (memory, relative match) pairs from the
+        archive, best first, leaving out `exclude_ids` and memories that are
+        still in the graph.
+        """
+        memory_graph = memory_graph or default_memory_graph
+        if self.archive_pool <= 0 or (not tokenize(query or "") and since is None and until is None):
+            return []
+
+        matches = [
+            (memory_id, score)
+            for memory_id, score in memory_graph.search_archive(
+                query, k=self.archive_pool + len(exclude_ids), with_scores=True, since=since, until=until
+            )
+            if memory_id not in exclude_ids
+        ][:self.archive_pool]
+        if not matches:
+            return []
+
+        # ForgetRecognizer archives before deleting, a failed round leaves both copies
+        hot = {memory['memory_id'] for memory in memory_graph.get_memories_by_id([memory_id for memory_id, _ in matches])}
+        scores = dict(matches)
+        best_match = max(scores.values()) or 1.0
+
+        archived = memory_graph.get_archived_memories([memory_id for memory_id in scores if memory_id not in hot])
+        logger.debug(f"RecallPrefilter found {len(archived)} archived memories for '{query}'")
+        return [(memory, scores[memory['memory_id']] / best_match) for memory in archived]
+
+    def decisive(self, scored, number=None):
+        """
+        Return the memories to recall without asking the LLM, or None when the
+        scores don't clearly separate relevant candidates from the rest.
+
+        The top `number` candidates (by default, every strong lexical match)
+        are decisive when each of them matches the query well and they lead
+        the next candidate by at least `decisive_margin`.
+        """
+        if not self.fast_path or not scored:
+            return None
+
+        if number is None:
+            number = sum(1 for candidate in scored if candidate['lexical'] >= self.decisive_lexical)
+        # Without a runner-up there is nothing to be decisive against
+        if number <= 0 or number >= len(scored):
+            return None
+
+        selected = scored[:number]
+        if any(candidate['lexical'] < self.decisive_lexical for candidate in selected):
+            return None
+        if selected[-1]['score'] - scored[number]['score'] < self.decisive_margin:
+            return None
+
+        return [candidate['memory'] for candidate in selected]
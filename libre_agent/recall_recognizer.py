@@ -1,4 +1,6 @@
 import re
+import time
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
 from libre_agent.memory_graph import memory_graph
 from libre_agent.logger import logger
 from libre_agent.utils import format_memories
@@ -7,15 +9,107 @@ from libre_agent.dataclasses import ChatCycle, ChatRequest, ChatRequestMessage
 import traceback
 
 class RecallRecognizer:
+    """
+    Asks the recall model which of `memories` are relevant to a prompt.
 
-    def __init__(self, memories: list | None = None) -> None:
+    Memory sets larger than `shard_size` are split into shards that are
+    recognized concurrently by up to `parallelism` threads, and the memory ids
+    picked in each shard are merged. A shard that takes longer than
+    `shard_timeout` seconds is given up on, so one slow call can't stall the
+    whole recall; its memories are simply not recalled.
+    """
+
+    shard_size = 200
+    parallelism = 4
+    shard_timeout = 30.0
+
+    def __init__(self, memories: list | None = None, shard_size=None, parallelism=None, shard_timeout=None) -> None:
         self.memories = memories or memory_graph.get_all_memories()
+        self.shard_size = shard_size or RecallRecognizer.shard_size
+        self.parallelism = parallelism or RecallRecognizer.parallelism
+        self.shard_timeout = shard_timeout or RecallRecognizer.shard_timeout
+        # Shards whose call failed or timed out in the last recall
+        self.errors = 0
+
+    @classmethod
+    def configure(cls, shard_size=None, parallelism=None, shard_timeout=None):
+        if shard_size is not None:
+            cls.shard_size = shard_size
+        if parallelism is not None:
+            cls.parallelism = parallelism
+        if shard_timeout is not None:
+            cls.shard_timeout = shard_timeout
 
     def recall_memories(self, prompt):
+        shards = [
+            self.memories[start:start + self.shard_size]
+            for start in range(0, len(self.memories), self.shard_size)
+        ]
+
+        self.errors = 0
+        if len(shards) <= 1 or self.parallelism <= 1:
+            memory_ids = set()
+            for shard in shards:
+                recognized = self.recognize_shard(prompt, shard)
+                if recognized is None:
+                    self.errors += 1
+                else:
+                    memory_ids.update(recognized)
+        else:
+            memory_ids = self.recognize_shards(prompt, shards)
+
+        # filter original memory set, which also drops ids the model made up
+        return [m for m in self.memories if m['memory_id'] in memory_ids]
+
+    def recognize_shards(self, prompt, shards):
+        started = {}
+        executor = ThreadPoolExecutor(max_workers=self.parallelism, thread_name_prefix="RecallShard")
+
+        def run_shard(index, shard):
+            started[index] = time.monotonic()
+            return self.recognize_shard(prompt, shard)
+
+        pending = {executor.submit(run_shard, index, shard): index for index, shard in enumerate(shards)}
+        memory_ids = set()
+        timed_out = 0
+        try:
+            while pending:
+                # Shards waiting for a worker haven't started their clock yet
+                running = [started[index] for index in pending.values() if index in started]
+                timeout = min(running) + self.shard_timeout - time.monotonic() if running else self.shard_timeout
+                done, _ = wait(pending, timeout=max(timeout, 0), return_when=FIRST_COMPLETED)
+
+                for future in done:
+                    del pending[future]
+                    recognized = future.result()
+                    if recognized is None:
+                        self.errors += 1
+                    else:
+                        memory_ids.update(recognized)
+
+                now = time.monotonic()
+                for future, index in list(pending.items()):
+                    if index in started and now - started[index] >= self.shard_timeout:
+                        del pending[future]
+                        timed_out += 1
+                        self.errors += 1
+                        logger.warning(f"RecallRecognizer shard {index + 1}/{len(shards)} timed out after {self.shard_timeout}s")
+        finally:
+            # Overrunning calls can't be interrupted, let them finish in the background
+            executor.shutdown(wait=False, cancel_futures=True)
+
+        logger.info(
+            f"RecallRecognizer recognized {len(shards)} shards of up to {self.shard_size} memories "
+            f"({timed_out} timed out), {len(memory_ids)} memories relevant"
+        )
+        return memory_ids
+
+    def recognize_shard(self, prompt, memories):
+        """Return the set of memory ids the recall model picks from `memories`, or None if the call failed."""
         system_prompt = self.construct_system_prompt()
 
         # build prompt for llm-based recall
-        constructed_prompt = self.construct_prompt(prompt, self.memories)
+        constructed_prompt = self.construct_prompt(prompt, memories)
 
         # call llm
         try:
@@ -28,7 +122,8 @@ class RecallRecognizer:
                 model="gemini/gemini-2.0-flash-lite-preview-02-05",
                 messages=messages,
                 tools=None,  # No tools needed for recall
-                tool_choice="none" # No tools, explicitly set to "none"
+                tool_choice="none", # No tools, explicitly set to "none"
+                timeout=self.shard_timeout
             )
 
             chat_cycle = ChatCycle()
@@ -38,15 +133,10 @@ class RecallRecognizer:
             reply = chat_response.content.strip()
 
             # parse out memory ids
-            memory_ids = self.parse_response(reply)
-
-            # filter original memory set
-            filtered_memories = [m for m in self.memories if m['memory_id'] in memory_ids]
-
-            return filtered_memories
+            return set(self.parse_response(reply))
         except Exception as e:
             logger.error(f"RecallRecognizer error: {e}\n{traceback.format_exc()}")
-            return []
+            return None
 
     def construct_system_prompt(self):
         prompt = f"""
@@ -1,6 +1,7 @@
 from libre_agent.logger import logger
 from libre_agent.tool_registry import ToolRegistry
 from libre_agent.memory_graph import memory_graph
+from libre_agent.vector_index import index_memories
 from libre_agent.tools.base_tool import BaseTool
 from traceback import format_exc
 
@@ -47,11 +48,12 @@ class ChatTool(BaseTool):
                     metadata=metadata
                 )
 
-                memory_graph.add_memory(
+                stored = memory_graph.add_memory(
                     memory_type=memory['memory_type'],
                     content=memory['content'],
                     metadata=memory['metadata'],
                 )
+                index_memories([stored], memory_graph)
 
                 return True
             except Exception as e:
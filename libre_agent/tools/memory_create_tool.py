@@ -1,6 +1,8 @@
 from libre_agent.tool_registry import ToolRegistry
 from libre_agent.logger import logger
 from libre_agent.memory_graph import memory_graph
+from libre_agent.vector_index import index_memories
+from libre_agent.memory_dedup import DuplicateIndex, find_duplicate, index_duplicates, merge_duplicate
 from libre_agent.tools.base_tool import BaseTool
 
 class MemoryCreateTool(BaseTool):
@@ -72,6 +74,11 @@ class MemoryCreateTool(BaseTool):
             'reasoning_mode': self.mode,
         }
 
+        # Only a memory of the same role may absorb this one, or the requested role would be lost
+        duplicate = find_duplicate(content, memory_graph, memory_type='internal', metadata={'role': role})
+        if duplicate:
+            return self.handle_duplicate(content, metadata, *duplicate)
+
         memory = memory_graph.add_memory(
             memory_type='internal',
             content=content,
@@ -79,6 +86,8 @@ class MemoryCreateTool(BaseTool):
         )
 
         memory_id = memory["memory_id"]
+        index_memories([memory], memory_graph)
+        index_duplicates([memory], memory_graph)
 
         if role != 'reflection':
             memory["metadata"]['recalled'] = True
@@ -97,4 +106,49 @@ class MemoryCreateTool(BaseTool):
 
         return True
 
+    def handle_duplicate(self, content, metadata, existing, similarity):
+        """Merge the new memory into its stored near-duplicate, or drop it, and say so in working memory."""
+        if DuplicateIndex.action == 'merge':
+            existing = merge_duplicate(existing, content, metadata, memory_graph)
+            index_memories([existing], memory_graph)
+            index_duplicates([existing], memory_graph)
+            outcome = f"merged into {existing['memory_id']}"
+        else:
+            outcome = f"not stored, {existing['memory_id']} is kept"
+
+        current = self.working_memory.get_memory(existing['memory_id'])
+        if current is None:
+            existing['metadata']['recalled'] = True
+            self.working_memory.append_memory(existing)
+        else:
+            # Show the merged memory, keeping working memory flags like `recalled`
+            self.working_memory.update_memory(
+                existing['memory_id'],
+                content=existing['content'],
+                metadata={**current['metadata'], **existing['metadata']}
+            )
+
+        self.working_memory.add_memory(
+            'internal',
+            f"New memory is a near-duplicate of {existing['memory_id']} (similarity {similarity:.2f}): {outcome}",
+            metadata={
+                'unit_name': self.name,
+                'reasoning_mode': self.mode,
+                'role': 'system_operation',
+                'priority_level': 'BACKGROUND',
+                'temporal_scope': 'working_memory',
+                'duplicate_of': existing['memory_id'],
+            }
+        )
+
+        logger.debug(
+                f"Memory not added"
+                f": near-duplicate of '{existing['memory_id']}'"
+                f", similarity={similarity:.2f}"
+                f", unit='{metadata['unit_name']}'"
+                f", {outcome}"
+        )
+
+        return True
+
 ToolRegistry.register_tool(MemoryCreateTool)
@@ -16,11 +16,7 @@ class MemoryDeleteTool(BaseTool):
     }
 
     def run(self, memory_id: str, **kwargs):
-        memories = self.working_memory.get_memories()
-
-        working_memory_ids = [m['memory_id'] for m in memories]
-
-        if memory_id in working_memory_ids:
+        if memory_id in self.working_memory:
             logger.info(f"Deleting memory '{memory_id}'")
 
             removed_from_wm = self.working_memory.remove_memory(memory_id)
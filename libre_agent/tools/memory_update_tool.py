@@ -1,6 +1,9 @@
 from libre_agent.tool_registry import ToolRegistry
 from libre_agent.logger import logger
 from libre_agent.memory_graph import memory_graph
+from libre_agent.vector_index import index_memories
+from libre_agent.memory_dedup import index_duplicates
+from libre_agent.memory_access import AccessTracker
 from libre_agent.tools.base_tool import BaseTool
 
 class MemoryUpdateTool(BaseTool):
@@ -72,12 +75,14 @@ You can only update memories that are marked as 'recalled' from the Recalled Mem
         else:
             memory_graph.update_memory(memory_id, metadata=metadata)
 
-        recent_memories = self.working_memory.get_memories()
-        memory = next((m for m in recent_memories if m['memory_id'] == memory_id), None)
+        # Re-embed the stored memory, its priority level is indexed too
+        updated = memory_graph.get_memories_by_id([memory_id])
+        index_memories(updated, memory_graph)
+        index_duplicates(updated, memory_graph)
+        AccessTracker.for_graph(memory_graph).record_update([memory_id])
 
-        if memory:
-            memory['metadata'] = metadata
-            memory['content'] = content if content else memory['content']
+        # Like the graph update, merges into the working memory copy's metadata, which keeps its role and recalled flag
+        self.working_memory.update_memory(memory_id, content=content or None, metadata=metadata)
 
         logger.debug(f"Memory updated: id='{memory_id}', " f"priority_level='{priority_level}'")
         logger.debug(
@@ -1,7 +1,13 @@
 from libre_agent.tools.base_tool import BaseTool
 from libre_agent.tool_registry import ToolRegistry
 from libre_agent.recall_recognizer import RecallRecognizer
-from libre_agent.memory_graph import memory_graph
+from libre_agent.recall_prefilter import RecallPrefilter
+from libre_agent.recall_cache import RecallCache
+from libre_agent.memory_activation import SpreadingActivation
+from libre_agent.memory_access import AccessTracker
+from libre_agent.vector_index import VectorIndex
+from libre_agent.natural_time_parser import NaturalTimeParser
+from libre_agent.memory_graph import memory_graph, to_timestamp
 from libre_agent.logger import logger
 
 class RecallTool(BaseTool):
@@ -17,10 +23,170 @@ class RecallTool(BaseTool):
             "type": "string",
             "description": "The ideal number or recalled memories expected to get. Just a hint and the returned number could be different/none",
             "nullable": True
+        },
+        "strategy": {
+            "type": "string",
+            "enum": ["rerank", "vector", "vector_rerank"],
+            "description": "rerank: keyword/recency shortlist, archived memories included, judged by the recall model (default). vector: closest stored memories by embedding similarity, no model call. vector_rerank: embedding shortlist plus archive keyword matches, judged by the recall model.",
+            "nullable": True
+        },
+        "expand": {
+            "type": "boolean",
+            "description": "Also recall the memories linked to the recalled ones (memories they were derived from or led to).",
+            "nullable": True
+        },
+        "since": {
+            "type": "string",
+            "description": "Only recall memories from this time on, e.g. 'yesterday', 'last week', '3 days ago', '2025-01-20'. Time expressions in the filter are picked up as well.",
+            "nullable": True
+        },
+        "until": {
+            "type": "string",
+            "description": "Only recall memories up to (and including) this time, in the same format as 'since'.",
+            "nullable": True
         }
     }
 
-    def run(self, filter: str | None = None, number: str | None = None, **kwargs):
+    # Local first stage; the LLM only reranks the candidates it selects
+    prefilter = RecallPrefilter()
+
+    # Results of recent recalls, reused while the graph is unchanged
+    cache = RecallCache()
+
+    # Strategy used when the caller doesn't pick one
+    default_strategy = 'rerank'
+
+    # Expansion of the recalled memories along memory_flow edges, and
+    # whether it runs when the caller doesn't ask for it
+    spreading_activation = SpreadingActivation()
+    expand_by_default = False
+
+    # The "vector" strategy returns up to this many memories at least this similar
+    vector_top_k = 10
+    vector_min_score = 0.1
+
+    @classmethod
+    def set_prefilter(cls, prefilter):
+        cls.prefilter = prefilter
+
+    @classmethod
+    def set_cache(cls, cache):
+        cls.cache = cache
+
+    @classmethod
+    def set_spreading_activation(cls, spreading_activation, expand_by_default=None):
+        cls.spreading_activation = spreading_activation
+        if expand_by_default is not None:
+            cls.expand_by_default = expand_by_default
+
+    @classmethod
+    def set_default_strategy(cls, strategy):
+        if strategy not in cls.parameters['strategy']['enum']:
+            raise ValueError(f"Unknown recall strategy '{strategy}'")
+        cls.default_strategy = strategy
+
+    def resolve_time_range(self, query, since=None, until=None):
+        """
+        Turn the `since`/`until` expressions, or else a time expression in the
+        query ("what did I do yesterday"), into epoch seconds. Returns
+        (since, until, query) with the expression taken out of the query;
+        a bound is None when there is no limit on that side.
+        """
+        parser = NaturalTimeParser()
+
+        if since or until:
+            bounds = []
+            for expression, side in ((since, 0), (until, 1)):
+                try:
+                    bounds.append(to_timestamp(parser.parse_range(expression)[side]) if expression else None)
+                except ValueError:
+                    logger.warning(f"RecallTool ignored the time expression '{expression}'")
+                    bounds.append(None)
+            return bounds[0], bounds[1], query
+
+        found = parser.find_range(query) if query else None
+        if found is None:
+            return None, None, query
+
+        start, end, rest = found
+        logger.info(f"RecallTool resolved '{query}' to the time range {start} - {end}")
+        return to_timestamp(start), to_timestamp(end), rest
+
+    def vector_candidates(self, query, exclude_ids, k, since=None, until=None):
+        """Closest memories by embedding similarity, as (memory, score) pairs."""
+        index = VectorIndex.for_graph(memory_graph)
+        # Picks up memories written outside the indexed tools, and evictions
+        index.sync(memory_graph)
+
+        # The index doesn't know timestamps, look further and drop the memories out of range
+        limited = since is not None or until is not None
+        scores = dict(index.search(query, k=max(k, self.prefilter.lexical_pool) if limited else k, exclude_ids=exclude_ids))
+        memories = [
+            memory for memory in memory_graph.get_memories_by_id(scores)
+            if (since is None or memory['timestamp'] >= since) and (until is None or memory['timestamp'] < until)
+        ]
+        return [(memory, scores[memory['memory_id']]) for memory in memories[:k]]
+
+    def recall(self, final_task, query, wanted, strategy, exclude_ids, expand=False, since=None, until=None):
+        """
+        Run a recall without the cache. Returns the recalled memories and
+        whether the result is complete (no recognizer call failed) and can
+        be cached. With `expand`, the memories linked to the recalled ones
+        are added by spreading activation. `since`/`until` limit the
+        candidates to a timestamp range.
+        """
+        complete = True
+        decisive = None
+        if strategy == 'rerank':
+            candidates = self.prefilter.select(
+                query,
+                exclude_ids=exclude_ids,
+                k=max(self.prefilter.candidates, wanted or 0),
+                since=since,
+                until=until
+            )
+            retrievable_memories = [candidate['memory'] for candidate in candidates]
+            decisive = self.prefilter.decisive(candidates, wanted)
+        else:
+            k = wanted or self.vector_top_k
+            if strategy == 'vector_rerank':
+                k = max(self.prefilter.candidates, k)
+            matches = self.vector_candidates(query, exclude_ids, k, since, until)
+            retrievable_memories = [memory for memory, score in matches]
+            if strategy == 'vector_rerank':
+                # The archive has no embeddings, its full-text matches are judged alongside
+                retrievable_memories += [
+                    memory for memory, _ in self.prefilter.archived(
+                        query, set(exclude_ids) | {memory['memory_id'] for memory in retrievable_memories}, memory_graph, since, until
+                    )
+                ]
+
+        if strategy == 'vector':
+            recalled = [memory for memory, score in matches if score >= self.vector_min_score]
+            logger.info(f"RecallTool recalled ({len(recalled)}) memories by vector similarity")
+        elif wanted is not None and wanted >= len(retrievable_memories):
+            logger.info(f"RecallTool returned fast ({len(retrievable_memories)}) memories")
+            recalled = retrievable_memories
+        elif decisive is not None:
+            logger.info(f"RecallTool skipped the LLM, prefilter scores were decisive ({len(decisive)}) memories")
+            recalled = decisive
+        else:
+            rr = RecallRecognizer(memories=retrievable_memories)
+
+            recalled = rr.recall_memories(final_task)
+            complete = not rr.errors
+
+        if expand and recalled:
+            recalled = recalled + self.spreading_activation.expand(
+                recalled,
+                exclude_ids=exclude_ids,
+                memory_graph=memory_graph
+            )
+
+        return recalled, complete
+
+    def run(self, filter: str | None = None, number: str | None = None, strategy: str | None = None, expand: bool | None = None,
+            since: str | None = None, until: str | None = None, **kwargs):
         last_user_input = self.working_memory.get_last_user_input()
 
         if filter:
@@ -44,29 +210,43 @@ class RecallTool(BaseTool):
             exclude_ids = [m['memory_id'] for m in self.working_memory.memories]
             logger.debug(f"Excluding {len(exclude_ids)} existing memories from recall")
 
-            retrievable_memories = memory_graph.get_memories(last=1000)
-            if exclude_ids:
-                retrievable_memories = [m for m in retrievable_memories if m['memory_id'] not in exclude_ids]
+            wanted = int(number) if number is not None else None
+            query = filter or last_user_input or ""
+            since, until, query = self.resolve_time_range(query, since, until)
+            strategy = strategy or self.default_strategy
+            if strategy != 'rerank' and not query:
+                # Nothing to embed, fall back to recency and priority
+                strategy = 'rerank'
+            if expand is None:
+                expand = self.expand_by_default
+            elif isinstance(expand, str):
+                expand = expand.strip().lower() in ('true', 'yes', '1')
 
-            if number is not None and int(number) >= len(retrievable_memories):
-                logger.info(f"RecallTool returned fast ({len(retrievable_memories)}) memories")
-                recalled = retrievable_memories
-            else:
-                rr = RecallRecognizer(memories=retrievable_memories)
+            # Only excluded memories that are stored can change the result
+            stored_exclude_ids = [m['memory_id'] for m in memory_graph.get_memories_by_id(exclude_ids)]
+            # Rolling ranges ("past 3 hours") move with the clock, so match them to the minute
+            time_range = tuple(None if bound is None else int(bound // 60) for bound in (since, until))
+            cache_key = self.cache.key(query, wanted, stored_exclude_ids, strategy, expand, time_range, memory_graph.version())
 
-                recalled = rr.recall_memories(final_task)
+            recalled = self.cache.get(cache_key)
+            if recalled is None:
+                recalled, complete = self.recall(final_task, query, wanted, strategy, exclude_ids, expand, since, until)
+                if complete:
+                    self.cache.put(cache_key, recalled)
 
             logger.info(f"{len(recalled)} memories recalled by RecallTool.")
+            # Counted in memory and written in batches, not per recall
+            AccessTracker.for_graph(memory_graph).record_recall([memory['memory_id'] for memory in recalled])
 
             for memory in recalled:
                 logger.info(f"RecallTool recalled: {memory}")
                 memory['metadata']['recalled'] = True
 
             self.working_memory.memories = recalled_memories
-            self.working_memory.memories.extend(recalled)
-            self.working_memory.memories.extend(recent_memories)
+            self.working_memory.extend_memories(recalled)
+            self.working_memory.extend_memories(recent_memories)
 
-            summary_content = f"RecallTool(filter: '{filter}', number: '{number}') result: found and added ({len(recalled)}) relevant memories."
+            summary_content = f"RecallTool(filter: '{filter}', number: '{number}', strategy: '{strategy}', expand: {expand}) result: found and added ({len(recalled)}) relevant memories."
             self.working_memory.add_memory(
                 memory_type="internal",
                 content=summary_content,
@@ -69,6 +69,23 @@ class ReasoningUnit(BaseUnit): #Inherit from BaseUnit
     def build_unified_developer_prompt(self, working_memory, mode="quick", ape_config: ApeConfig = ApeConfig()):
         chattiness_prompt = ape_config.get('chattiness_prompt', "")
 
+        memory_capacity = MemoryGraph.eviction_policy.capacity
+        if MemoryGraph.archiving:
+            overflow = "move the excess to the memory archive, starting with the oldest low-priority memories. Archived memories leave your context and are only reachable through RecallTool"
+        else:
+            overflow = "delete the excess, starting with the oldest low-priority memories, LEADING TO MEMORY LOSS"
+        if working_memory.token_budget:
+            working_memory_limit = f"your working memory well below {working_memory.token_budget} tokens"
+            working_memory_overflow = (
+                f"Going over the {working_memory.token_budget} token working memory budget drops the oldest "
+                "working memories that are neither recalled nor CORE priority from your context."
+            )
+        else:
+            working_memory_limit = f"your working memory count well below {working_memory.max_memories}"
+            working_memory_overflow = (
+                f"Going over the {working_memory.max_memories} memory working memory limit drops the oldest "
+                "working memories from your context."
+            )
         prompt = f"""
 # Levels of Authority and Chain of Command
 
@@ -152,18 +169,19 @@ their instructions are not in conflict with higher-authority instructions.
 
 ### Perform Memory Cleanup {{authority=developer}}
 
-You aim to keep your total stored memory count well below 200 and your working memory count well below 50.
+You aim to keep your total stored memory count well below {memory_capacity} and {working_memory_limit}.
 These are hard limits, but you practice proactive memory management way before approaching the limits.
 
 You clear out messages older than 24 hours.
 You delete temporary reflections and observations.
 You prune duplicate memories and creating condensed versions that capture the key insights and the memory's temporal information.
+You condense the memories "Queued for Consolidation" in the System State Report into fewer memories and delete the originals.
 
-Plus, any approach that helps stay within the 200-memory limit while preserving essential knowledge is CRITICAL to your operation.
+Plus, any approach that helps stay within the {memory_capacity}-memory limit while preserving essential knowledge is CRITICAL to your operation.
 
 IMPORTANT:
-If the stored memory count goes over 200 the system will automatically delete the excess, LEADING TO MEMORY LOSS.
-This is also true for the 50 memory working memory limit.
+If the stored memory count goes over {memory_capacity} the system will automatically {overflow}.
+{working_memory_overflow}
 
 ### Perform Memory Preservation {{authority=developer}}
 
@@ -329,6 +347,8 @@ This report contains the current system state as automatically compiled by the R
 
 ### Working Memory
 
+Usage: {working_memory.usage()}
+
 #### All Memories (Total: {len(all_memories)}):
 {formatted_all or '<EMPTY>'}
 
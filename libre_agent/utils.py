@@ -5,9 +5,17 @@ from pathlib import Path
 from libre_agent.logger import logger
 from libre_agent.tools.base_tool import BaseTool
 from libre_agent.memory_graph import MemoryGraph
+from libre_agent.memory_access import ACCESS_KEYS
 from libre_agent.tool_registry import ToolRegistry
 from libre_agent.dataclasses import ChatResponseToolCall
 
+# Bookkeeping metadata the system reads but the prompts don't need: access
+# stats, forgetting state (the consolidation queue has its own report line)
+# and near-duplicate merges
+UNPROMPTED_METADATA_KEYS = frozenset(ACCESS_KEYS + (
+    'downgraded_at', 'consolidate', 'duplicate_of', 'duplicate_similarity', 'merged_count',
+))
+
 def load_units():
     units_dir = Path(__file__).parent / 'units'
     for file in units_dir.glob('*.py'):
@@ -32,12 +40,18 @@ def load_tools():
 
 def get_world_state_section():
     stats = MemoryGraph().get_stats()
+    capacity = MemoryGraph.eviction_policy.capacity
+    # Flagged by ForgetRecognizer, to be merged into condensed memories
+    consolidate = MemoryGraph().get_memories(metadata={'consolidate': True}, last=20)
     world_state = f"""
-  - Total Memories: {stats['total_memories']}{f" ({stats['total_memories'] - 200} over the limit of 200)" if stats['total_memories'] > 200 else ""}
+  - Total Memories: {stats['total_memories']}{f" ({stats['total_memories'] - capacity} over the limit of {capacity})" if stats['total_memories'] > capacity else ""}
   - Total Connections: {stats['total_connections']}
   - Memory Types: {', '.join(f'{k}: {v}' for k, v in stats['memory_type_distribution'].items())}
   - Roles: {', '.join(f'{k}: {v}' for k, v in stats['role_distribution'].items())}
+  - Priorities: {', '.join(f'{k}: {v}' for k, v in stats.get('priority_distribution', {}).items())}
 """
+    if consolidate:
+        world_state += f"  - Queued for Consolidation: {', '.join(memory['memory_id'] for memory in consolidate)}\n"
     return world_state
 
 def format_memories(memories, format: str = 'default'):
@@ -50,7 +64,7 @@ def format_memories(memories, format: str = 'default'):
             memory_id = entry['memory_id']
             memory_type = entry['memory_type']
             metadata = entry['metadata']
-            metadata_str = ', '.join(f"{k}={str(v)}" for k, v in metadata.items())
+            metadata_str = ', '.join(f"{k}={str(v)}" for k, v in metadata.items() if k not in UNPROMPTED_METADATA_KEYS)
             formatted += f"[{timestamp}] [ID: {memory_id}] - {memory_type} - ({metadata_str}): {content}\n"
     elif format == 'conversation':
         for entry in memories:
@@ -0,0 +1,332 @@
+import os
+import zlib
+import pickle
+import threading
+from abc import ABC, abstractmethod
+from pathlib import Path
+
+import numpy as np
+
+from libre_agent.logger import logger
+from libre_agent.memory_search import tokenize, searchable_text
+
+class Embedder(ABC):
+    """Turns texts into L2-normalized float32 vectors of `dim` dimensions."""
+    name = "embedder"
+    dim = 0
+
+    @abstractmethod
+    def embed(self, texts) -> np.ndarray:
+        raise NotImplementedError("Subclasses must implement embed.")
+
+    def signature(self):
+        """Identifies the vector space; stored vectors from another one are discarded."""
+        return f"{self.name}:{self.dim}"
+
+class HashingEmbedder(Embedder):
+    """
+    Feature-hashing bag of words. Each token is hashed (crc32, so vectors are
+    stable across processes) into one of `dim` buckets with a +/-1 sign, and
+    weighted by 1 + log(term frequency). There is no vocabulary to fit, so a
+    memory can be embedded on its own the moment it is written; the IDF part
+    is applied to queries by VectorIndex.
+    """
+    name = "hashing"
+
+    def __init__(self, dim=256):
+        self.dim = dim
+
+    def embed(self, texts):
+        matrix = np.zeros((len(texts), self.dim), dtype=np.float32)
+        for row, text in enumerate(texts):
+            counts = {}
+            for token in tokenize(text):
+                counts[token] = counts.get(token, 0) + 1
+
+            for token, count in counts.items():
+                hashed = zlib.crc32(token.encode("utf-8"))
+                sign = 1.0 if hashed & 0x80000000 else -1.0
+                matrix[row, hashed % self.dim] += sign * (1.0 + np.log(count))
+
+        norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+        np.divide(matrix, norms, out=matrix, where=norms > 0)
+        return matrix
+
+class VectorIndex:
+    """
+    Embeddings of the memories in one graph file, kept as the columns of a
+    single float32 matrix so a cosine top-k is one matrix product plus a
+    partial sort. Storing it dimension-major lets the product skip the
+    dimensions a query doesn't use: a hashed query only touches a handful of
+    buckets, so only those rows of the matrix are read.
+
+    The index lives next to the graph as a `.vectors.npz` snapshot and an
+    append-only `.vectors.journal`, written the same way PickleStorage writes
+    the graph: adds and removes are journaled, and the journal is folded into
+    a fresh snapshot once it passes `compaction_threshold` bytes. Removing a
+    memory moves the last column into its slot, so the matrix stays dense.
+
+    Queries are weighted by the inverse document frequency of their hash
+    buckets, which the index tracks as memories come and go.
+
+    Writers call `add` as memories are created or updated; `sync` catches up
+    with memories written elsewhere (other processes, eviction) whenever the
+    graph version moved.
+    """
+
+    # Journal size (in bytes) after which it gets folded into a new snapshot
+    compaction_threshold = 4 * 1024 * 1024
+
+    # Embedder shared by every index, see `set_embedder`
+    embedder = HashingEmbedder()
+
+    _indexes = {}
+    _indexes_lock = threading.RLock()
+
+    def __init__(self, graph_file, embedder=None):
+        graph_file = Path(str(graph_file))
+        self.embedder = embedder or VectorIndex.embedder
+        self.vector_file = graph_file.with_name(graph_file.name + ".vectors.npz")
+        self.journal_file = graph_file.with_name(graph_file.name + ".vectors.journal")
+        self.lock = threading.RLock()
+        self._synced_version = None
+        self._reset()
+        self._load()
+
+    @classmethod
+    def for_graph(cls, memory_graph):
+        """Return the process-wide index of the file `memory_graph` is bound to."""
+        graph_file = memory_graph._storage().graph_file
+        with cls._indexes_lock:
+            index = cls._indexes.get(graph_file)
+            if index is None:
+                index = cls._indexes[graph_file] = cls(graph_file)
+            return index
+
+    @classmethod
+    def set_embedder(cls, embedder):
+        with cls._indexes_lock:
+            cls.embedder = embedder
+            # Vectors from the previous embedder are useless, reload lazily
+            cls._indexes = {}
+        logger.info(f"Vector index embedder set to '{embedder.signature()}'.")
+
+    def __len__(self):
+        return len(self._ids)
+
+    def __contains__(self, memory_id):
+        return memory_id in self._slots
+
+    def _reset(self):
+        self._ids = []
+        self._slots = {}
+        self._vectors = np.zeros((self.embedder.dim, 0), dtype=np.float32)
+        self._document_frequency = np.zeros(self.embedder.dim, dtype=np.int64)
+
+    def _load(self):
+        if self.vector_file.exists():
+            try:
+                with np.load(self.vector_file) as snapshot:
+                    signature = str(snapshot['signature'])
+                    if signature == self.embedder.signature():
+                        self._apply(('add', [str(memory_id) for memory_id in snapshot['ids']], snapshot['vectors']))
+            except (OSError, ValueError, KeyError) as e:
+                signature = None
+                logger.warning(f"Discarding unreadable vector index {self.vector_file}: {e}")
+
+            if signature != self.embedder.signature():
+                # The journal builds on the discarded snapshot, start over and let `sync` refill it
+                logger.warning(f"Vector index {self.vector_file} doesn't match '{self.embedder.signature()}', rebuilding it.")
+                self._reset()
+                self.vector_file.unlink()
+                if self.journal_file.exists():
+                    self.journal_file.unlink()
+                return
+
+        if not self.journal_file.exists():
+            return
+
+        with open(self.journal_file, "r+b") as f:
+            while True:
+                offset = f.tell()
+                try:
+                    record = pickle.load(f)
+                except EOFError:
+                    break
+                except (pickle.UnpicklingError, ValueError, TypeError) as e:
+                    logger.warning(f"Discarding corrupt journal tail in {self.journal_file}: {e}")
+                    f.truncate(offset)
+                    break
+                if record[-1] == self.embedder.signature():
+                    self._apply(record[:-1])
+
+        logger.info(f"Vector index loaded with {len(self)} memories.")
+
+    def _apply(self, record):
+        op = record[0]
+        if op == 'add':
+            _, memory_ids, vectors = record
+            appended = []
+            for memory_id, vector in zip(memory_ids, vectors):
+                slot = self._slots.get(memory_id)
+                if slot is None:
+                    appended.append((memory_id, vector))
+                else:
+                    self._document_frequency -= self._vectors[:, slot] != 0
+                    self._vectors[:, slot] = vector
+                    self._document_frequency += vector != 0
+
+            if appended:
+                size = len(self._ids)
+                needed = size + len(appended)
+                capacity = self._vectors.shape[1]
+                if needed > capacity:
+                    # Grow geometrically so appending one memory at a time stays cheap
+                    grown = np.zeros((self.embedder.dim, max(needed, 2 * capacity, 64)), dtype=np.float32)
+                    grown[:, :size] = self._vectors[:, :size]
+                    self._vectors = grown
+
+                for offset, (memory_id, _) in enumerate(appended):
+                    self._slots[memory_id] = size + offset
+                    self._ids.append(memory_id)
+                block = np.array([vector for _, vector in appended], dtype=np.float32)
+                self._vectors[:, size:needed] = block.T
+                self._document_frequency += np.count_nonzero(block, axis=0)
+
+        elif op == 'remove':
+            _, memory_ids = record
+            for memory_id in memory_ids:
+                slot = self._slots.pop(memory_id, None)
+                if slot is None:
+                    continue
+                self._document_frequency -= self._vectors[:, slot] != 0
+
+                last = len(self._ids) - 1
+                if slot != last:
+                    moved = self._ids[last]
+                    self._vectors[:, slot] = self._vectors[:, last]
+                    self._ids[slot] = moved
+                    self._slots[moved] = slot
+                self._ids.pop()
+                self._vectors[:, last] = 0
+
+    def _journal(self, record):
+        self.journal_file.parent.mkdir(parents=True, exist_ok=True)
+        with open(self.journal_file, "ab") as f:
+            pickle.dump(record + (self.embedder.signature(),), f)
+
+        if self.journal_file.stat().st_size > self.compaction_threshold:
+            self.compact()
+
+    def compact(self):
+        """Fold the journal into a fresh snapshot."""
+        with self.lock:
+            tmp_file = self.vector_file.with_name(self.vector_file.name + ".tmp")
+            with open(tmp_file, "wb") as f:
+                np.savez(
+                    f,
+                    ids=np.array(self._ids, dtype=str),
+                    vectors=self._vectors[:, :len(self._ids)].T,
+                    signature=np.array(self.embedder.signature()),
+                )
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(tmp_file, self.vector_file)
+
+            if self.journal_file.exists():
+                self.journal_file.unlink()
+            logger.info(f"Compacted vector index journal into snapshot {self.vector_file}.")
+
+    def add(self, memories):
+        """Embed and index memory dicts, replacing the vectors of known ids."""
+        memories = [memory for memory in memories if memory.get('memory_id')]
+        if not memories:
+            return
+
+        vectors = self.embedder.embed([searchable_text(memory) for memory in memories])
+        record = ('add', [memory['memory_id'] for memory in memories], vectors)
+        with self.lock:
+            self._apply(record)
+            self._journal(record)
+
+    def remove(self, memory_ids):
+        with self.lock:
+            memory_ids = [memory_id for memory_id in memory_ids if memory_id in self._slots]
+            if not memory_ids:
+                return
+
+            record = ('remove', memory_ids)
+            self._apply(record)
+            self._journal(record)
+
+    def sync(self, memory_graph, batch_size=1000):
+        """
+        Index memories missing from the index and drop the ones gone from the
+        graph, if the graph changed since the last sync. The delta is
+        journaled like any other change.
+        """
+        version = memory_graph.version()
+        with self.lock:
+            if version == self._synced_version:
+                return 0, 0
+
+            graph_ids = set(memory_graph.get_memory_ids())
+            stale = [memory_id for memory_id in self._slots if memory_id not in graph_ids]
+            missing = [memory_id for memory_id in graph_ids if memory_id not in self._slots]
+
+            self.remove(stale)
+            for start in range(0, len(missing), batch_size):
+                self.add(memory_graph.get_memories_by_id(missing[start:start + batch_size]))
+            self._synced_version = version
+
+        if stale or missing:
+            logger.info(f"Vector index synced: {len(missing)} memories added, {len(stale)} removed.")
+        return len(missing), len(stale)
+
+    def _query_vectors(self, queries):
+        vectors = self.embedder.embed(queries)
+        if isinstance(self.embedder, HashingEmbedder) and self._ids:
+            idf = np.log((len(self._ids) + 1) / (self._document_frequency + 1)).astype(np.float32) + 1.0
+            vectors *= idf
+            norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+            np.divide(vectors, norms, out=vectors, where=norms > 0)
+        return vectors
+
+    def search(self, query, k=10, exclude_ids=None):
+        """Return up to `k` (memory_id, cosine similarity) pairs, best first."""
+        return self.search_batch([query], k, exclude_ids)[0]
+
+    def search_batch(self, queries, k=10, exclude_ids=None):
+        """Run several queries with one matrix product; returns one result list per query."""
+        with self.lock:
+            size = len(self._ids)
+            if not size or not queries:
+                return [[] for _ in queries]
+
+            queries = self._query_vectors(list(queries))
+            # Dimensions no query uses contribute nothing, leave them out of the product
+            used = np.flatnonzero(np.any(queries != 0, axis=0))
+            scores = queries[:, used] @ self._vectors[used, :size]
+
+            if exclude_ids:
+                excluded = [self._slots[memory_id] for memory_id in exclude_ids if memory_id in self._slots]
+                scores[:, excluded] = -np.inf
+
+            k = min(k, size)
+            top = np.argpartition(-scores, k - 1, axis=1)[:, :k]
+
+            results = []
+            for row, slots in zip(scores, top):
+                slots = slots[np.argsort(-row[slots], kind='stable')]
+                results.append([
+                    (self._ids[slot], float(row[slot]))
+                    for slot in slots if row[slot] > -np.inf
+                ])
+            return results
+
+def index_memories(memories, memory_graph):
+    """Add freshly written memories to the vector index of their graph; failures are only logged."""
+    try:
+        VectorIndex.for_graph(memory_graph).add(memories)
+    except Exception as e:
+        logger.error(f"Vector index update failed: {e}")
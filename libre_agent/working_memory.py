@@ -2,6 +2,7 @@ import uuid
 import time
 import asyncio
 from libre_agent.logger import logger
+from libre_agent.observer_dispatch import ObserverChannel
 from collections import deque
 import secrets
 
@@ -9,30 +10,148 @@ def generate_memory_id():
     random_part = secrets.token_hex(4)[:8]
     return f"mem-{random_part}"
 
+def estimate_tokens(memory):
+    """Rough token count of a memory's prompt line (see utils.format_memories), at ~4 characters per token."""
+    metadata = memory.get('metadata') or {}
+    characters = len(str(memory.get('content', ''))) + sum(len(str(k)) + len(str(v)) + 3 for k, v in metadata.items())
+    # Timestamp, id, type and separators
+    return 16 + characters // 4
+
 class WorkingMemory:
+    """
+    The memories in the agent's context, oldest first, capped at
+    `max_memories` (appending beyond it drops the oldest one).
+
+    Entries are kept by sequence number in insertion order, and indexed by
+    memory id, by (role, unit_name) and by whether they were recalled, so
+    looking up or removing an id, the last message of a unit or the
+    recalled memories costs O(1) or O(matches) instead of a scan. The
+    indexes follow `append_memory`, `extend_memories`, `remove_memory`,
+    `update_memory`, the `memories` setter and evictions. Edit stored
+    entries through `update_memory` rather than in place when their role,
+    unit or recalled flag changes; `memories` is a read-only snapshot.
+
+    With a `token_budget`, the count cap is replaced by a token cap: each
+    entry's `token_counter` estimate is taken when it is indexed, and once
+    the total exceeds the budget the oldest entries that are neither
+    recalled nor CORE priority are evicted. Recalled and CORE entries and
+    the newest entry are never evicted for the budget; if they alone
+    exceed it, working memory stays over budget and a warning is logged.
+    """
+
+    max_memories = 50
+    token_budget = None
+    token_counter = staticmethod(estimate_tokens)
+
     def __init__(self):
         self.id = str(uuid.uuid4())
         self.created_at = time.time()
 
         self.observers = []
 
-        self._memories = deque(maxlen=50)
+        self._reset()
 
         logger.info(f"WorkingMemory initialized with ID: {self.id}")
 
+    @classmethod
+    def configure(cls, max_memories=None, token_budget=None, token_counter=None):
+        """Set the limits of working memories created afterwards; a `token_budget` of 0 turns token mode off."""
+        if max_memories is not None:
+            cls.max_memories = max_memories
+        if token_budget is not None:
+            cls.token_budget = token_budget or None
+        if token_counter is not None:
+            cls.token_counter = staticmethod(token_counter)
+
+    def _reset(self, memories=(), capacity=None):
+        # Count cap of this instance; in token mode the budget bounds it instead
+        self._capacity = capacity or (None if self.token_budget else self.max_memories)
+        self._entries = {}
+        self._next_seq = 0
+        self._by_id = {}
+        self._by_role = {}
+        self._by_recalled = {True: {}, False: {}}
+        # Entries the token budget may evict, oldest first
+        self._evictable = {}
+        self._tokens = {}
+        self.token_count = 0
+        for memory in memories:
+            self._append(memory)
+
+    @staticmethod
+    def _role_key(memory):
+        metadata = memory.get('metadata') or {}
+        return (metadata.get('role'), metadata.get('unit_name'))
+
+    @staticmethod
+    def _recalled_key(memory):
+        return bool((memory.get('metadata') or {}).get('recalled'))
+
+    @staticmethod
+    def _protected(memory):
+        metadata = memory.get('metadata') or {}
+        return bool(metadata.get('recalled')) or metadata.get('priority_level') == 'CORE'
+
+    @staticmethod
+    def _file(index, seq, memory):
+        """Add an entry to an index bucket, keeping the bucket in sequence order."""
+        if index and seq < next(reversed(index)):
+            # Only entries re-filed by update_memory arrive out of order
+            index[seq] = memory
+            entries = sorted(index.items())
+            index.clear()
+            index.update(entries)
+        else:
+            index[seq] = memory
+
+    def _index(self, seq, memory):
+        self._file(self._by_id.setdefault(memory.get('memory_id'), {}), seq, memory)
+        self._file(self._by_role.setdefault(self._role_key(memory), {}), seq, memory)
+        self._file(self._by_recalled[self._recalled_key(memory)], seq, memory)
+        if not self._protected(memory):
+            self._file(self._evictable, seq, memory)
+        tokens = self.token_counter(memory)
+        self._tokens[seq] = tokens
+        self.token_count += tokens
+
+    def _unindex(self, seq, memory):
+        for index, key in (
+            (self._by_id, memory.get('memory_id')),
+            (self._by_role, self._role_key(memory)),
+        ):
+            entries = index[key]
+            del entries[seq]
+            if not entries:
+                del index[key]
+        del self._by_recalled[self._recalled_key(memory)][seq]
+        self._evictable.pop(seq, None)
+        self.token_count -= self._tokens.pop(seq)
+
     @property
     def memories(self):
-        return self._memories
+        return tuple(self._entries.values())
 
     @memories.setter
     def memories(self, value):
-        if not isinstance(value, deque):
-            self._memories = deque(value, maxlen=50)
-        else:
-            self._memories = value
+        # A deque keeps its own maxlen as the count cap, like it used to
+        self._reset(value, capacity=value.maxlen if isinstance(value, deque) else None)
 
-    def register_observer(self, observer):
-        self.observers.append(observer)
+    def __contains__(self, memory_id):
+        return memory_id in self._by_id
+
+    def get_memory(self, memory_id):
+        """Return the latest entry with `memory_id`, or None."""
+        entries = self._by_id.get(memory_id)
+        if not entries:
+            return None
+        return entries[next(reversed(entries))]
+
+    def register_observer(self, observer, batch=False, **options):
+        """Call `observer` with every appended memory, or with a list of them if `batch`; `options` only apply to WorkingMemoryAsync."""
+        self.observers.append((lambda memory: observer([memory])) if batch else observer)
+
+    def clear_observers(self):
+        self.observers = []
 
     def _notify_observers(self, memory):
         for observer in self.observers:
@@ -41,8 +160,41 @@ class WorkingMemory:
     def _process_memory(self, memory):
         self._notify_observers(memory)
 
+    def _append(self, memory):
+        if self._capacity is not None and len(self._entries) >= self._capacity:
+            self._remove_entry(next(iter(self._entries)))
+        seq = self._next_seq
+        self._next_seq += 1
+        self._entries[seq] = memory
+        self._index(seq, memory)
+        self._enforce_token_budget()
+
+    def _enforce_token_budget(self):
+        if not self.token_budget or self.token_count <= self.token_budget:
+            return
+
+        newest = self._next_seq - 1
+        evicted = 0
+        while self.token_count > self.token_budget and self._evictable:
+            victim = next(iter(self._evictable))
+            if victim == newest:
+                break
+            self._remove_entry(victim)
+            evicted += 1
+
+        if evicted:
+            logger.info(
+                f"Evicted {evicted} memories from WorkingMemory {self.id} to stay within "
+                f"{self.token_budget} tokens ({self.token_count} used)"
+            )
+        if self.token_count > self.token_budget:
+            logger.warning(
+                f"WorkingMemory {self.id} is over its {self.token_budget} token budget ({self.token_count} used): "
+                f"the rest is recalled, CORE priority or the newest memory"
+            )
+
     def append_memory(self, memory):
-        self.memories.append(memory)
+        self._append(memory)
 
         self._process_memory(memory)
 
@@ -50,15 +202,42 @@ class WorkingMemory:
 
         return memory
 
+    def extend_memories(self, memories):
+        """Append memories without notifying observers, e.g. recalled or preloaded ones."""
+        for memory in memories:
+            self._append(memory)
+
+    def _remove_entry(self, seq):
+        memory = self._entries.pop(seq)
+        self._unindex(seq, memory)
+        return memory
+
     def remove_memory(self, memory_id):
-        for i in range(len(self.memories)):
-            if self.memories[i]['memory_id'] == memory_id:
-                del self.memories[i]
-                logger.info(f"Removed memory {memory_id} from WorkingMemory {self.id}")
-                return True
+        entries = self._by_id.get(memory_id)
+        if entries:
+            for seq in list(entries):
+                self._remove_entry(seq)
+            logger.info(f"Removed memory {memory_id} from WorkingMemory {self.id}")
+            return True
         logger.warning(f"Attempted to remove non-existent memory: {memory_id}")
         return False
 
+    def update_memory(self, memory_id, content=None, metadata=None):
+        """Replace the content and merge `metadata` into the metadata of the entries with `memory_id`, keeping their indexes current."""
+        entries = self._by_id.get(memory_id)
+        if not entries:
+            return None
+        for seq, memory in list(entries.items()):
+            self._unindex(seq, memory)
+            if content is not None:
+                memory['content'] = content
+            if metadata is not None:
+                memory['metadata'] = {**(memory.get('metadata') or {}), **metadata}
+            # Re-filed under its sequence number, so it keeps its age
+            self._index(seq, memory)
+        self._enforce_token_budget()
+        return memory
+
     def add_memory(self, memory_type, content, parent_memory_ids=None, metadata=None):
         memory_id = generate_memory_id()
 
@@ -118,9 +297,24 @@ class WorkingMemory:
 
         return memory
 
+    def _candidates(self, metadata):
+        """The entries (in insertion order) that may match `metadata`, from the smallest index that applies."""
+        if metadata:
+            role, unit_name = metadata.get('role'), metadata.get('unit_name')
+            if isinstance(role, str) and isinstance(unit_name, str):
+                return self._by_role.get((role, unit_name), {}).values()
+            if 'recalled' in metadata:
+                recalled = metadata['recalled']
+                values = recalled if isinstance(recalled, (list, tuple)) else (recalled,)
+                if values and all(values):
+                    return self._by_recalled[True].values()
+                if not any(values):
+                    return self._by_recalled[False].values()
+        return self._entries.values()
+
     def get_memories(self, first=None, last=None, memory_type=None, metadata=None, sort='timestamp', reverse=False):
         mems = [
-            d for d in self.memories
+            d for d in self._candidates(metadata)
             if (memory_type is None or d.get('memory_type') == memory_type)
             and (metadata is None or all(
                 d.get('metadata', {}).get(k) in v if isinstance(v, (list, tuple)) else d.get('metadata', {}).get(k) == v for k, v in metadata.items()
@@ -147,44 +341,61 @@ class WorkingMemory:
         )
         return result
 
+    def _last_message(self, unit_name):
+        latest = None
+        # Entries are in insertion order, so ties go to the later one like get_memories(last=1)
+        for memory in self._by_role.get(('message', unit_name), {}).values():
+            if latest is None or memory.get('timestamp', 0) >= latest.get('timestamp', 0):
+                latest = memory
+        return latest['content'] if latest is not None else None
+
     def get_last_user_input(self):
-        memories = self.get_memories(
-            metadata={ 'role': 'message', 'unit_name': 'User' },
-            last=1,
-        )
-        if memories:
-            return memories[0]['content']
-        return None
+        return self._last_message('User')
 
     def get_last_assistant_output(self):
-        memories = self.get_memories(
-            metadata={'role': 'message', 'unit_name': 'ReasoningUnit'},
-            last=1,
-        )
-        if memories:
-            return memories[0]['content']
-        return None
+        return self._last_message('ReasoningUnit')
+
+    def usage(self):
+        """Short description of how full working memory is, for the System State Report."""
+        if self.token_budget:
+            return f"{self.token_count}/{self.token_budget} tokens"
+        return f"{len(self._entries)}/{self._capacity or self.max_memories} memories, ~{self.token_count} tokens"
 
     def clear(self):
-        self._memories = deque(maxlen=50)
+        self._reset()
         logger.info(f"Cleared all memories from WorkingMemory {self.id}")
 
 class WorkingMemoryAsync(WorkingMemory):
+    """
+    WorkingMemory whose observers are coroutines run on the event loop it
+    was created on. Each observer gets an ObserverChannel: its own bounded
+    queue and worker task, so appends (from any thread) never wait on an
+    observer and a slow or failing one doesn't hold up the others.
+    """
+
     def __init__(self) -> None:
         super().__init__()
 
-        self.async_queue = asyncio.Queue()
-        self.processing_task = asyncio.create_task(self._process_async_queue())
+        self.loop = asyncio.get_running_loop()
+        self.channels = []
+
+    def register_observer(self, observer, batch=False, capacity=None, overflow=None, timeout=None):
+        """Register from the event loop; `capacity`, `overflow` and `timeout` override the ObserverChannel defaults."""
+        self.observers.append(observer)
+        self.channels.append(ObserverChannel(
+            observer, self.loop, batch=batch, capacity=capacity, overflow=overflow, timeout=timeout
+        ))
 
-    async def _process_async_queue(self):
-        while True:
-            memory = await self.async_queue.get()
-            self._notify_observers(memory)
-            self.async_queue.task_done()
+    def clear_observers(self):
+        for channel in self.channels:
+            logger.info(f"Observer stats: {channel.stats()}")
+            channel.close()
+        self.channels = []
+        super().clear_observers()
 
-    def _process_memory(self, memory):
-        self.async_queue.put_nowait(memory)
+    def observer_stats(self):
+        return [channel.stats() for channel in self.channels]
 
     def _notify_observers(self, memory):
-        for observer in self.observers:
-            asyncio.create_task(observer(memory))
+        for channel in self.channels:
+            channel.put(memory)
@@ -4,7 +4,17 @@ import time
 import sys
 import argparse
 from libre_agent.memory_graph import MemoryGraph
+from libre_agent.memory_eviction import EvictionPolicy, JsonlEvictionLog
 from libre_agent.reasoning_engine import LibreAgentEngine
+from libre_agent.recall_prefilter import RecallPrefilter
+from libre_agent.recall_recognizer import RecallRecognizer
+from libre_agent.recall_cache import RecallCache
+from libre_agent.memory_activation import SpreadingActivation
+from libre_agent.memory_dedup import DuplicateIndex
+from libre_agent.memory_access import AccessTracker
+from libre_agent.working_memory import WorkingMemory
+from libre_agent.observer_dispatch import ObserverChannel
+from libre_agent.tools.recall_tool import RecallTool
 
 # import litellm
 # disable litellm logging
@@ -45,6 +55,8 @@ class PromptToolkitChatInterface:
     def __init__(self, working_memory):
         self.working_memory = working_memory
 
+        # The engine's WorkingMemoryAsync gives this callback its own
+        # ObserverChannel, so printing never holds up the reasoning threads
         self.working_memory.register_observer(self.memory_callback)
 
         self.session = PromptSession()
@@ -96,18 +108,60 @@ class PromptToolkitChatInterface:
         else:
             print_func()
 
-async def main(deep_schedule, print_internals, memory_graph_file, reasoning_model):
+def configure(args):
+    """Apply the command-line settings to the memory graph, recall and working memory defaults."""
+    MemoryGraph.set_storage_backend(args.storage_backend)
+
+    if args.graph_file_lock:
+        MemoryGraph.set_file_locking(True)
+
+    if args.archive_evicted:
+        MemoryGraph.set_archiving(True)
+
+    eviction_policy = EvictionPolicy(capacity=args.memory_capacity)
+    if args.eviction_log:
+        eviction_policy.register_hook(JsonlEvictionLog(args.eviction_log))
+    MemoryGraph.set_eviction_policy(eviction_policy)
+
+    RecallTool.set_prefilter(RecallPrefilter(candidates=args.recall_candidates, fast_path=not args.no_recall_fast_path))
+    RecallTool.set_default_strategy(args.recall_strategy)
+    RecallTool.set_cache(RecallCache(capacity=args.recall_cache_size, ttl=args.recall_cache_ttl))
+    RecallTool.set_spreading_activation(
+        SpreadingActivation(decay=args.activation_decay, max_hops=args.activation_hops),
+        expand_by_default=args.recall_neighbors
+    )
+    RecallRecognizer.configure(
+        shard_size=args.recall_shard_size,
+        parallelism=args.recall_parallelism,
+        shard_timeout=args.recall_shard_timeout
+    )
+    DuplicateIndex.configure(threshold=args.duplicate_threshold, action=args.duplicate_action)
+    AccessTracker.configure(flush_threshold=args.access_flush_threshold, flush_interval=args.access_flush_interval)
+    WorkingMemory.configure(max_memories=args.working_memory_size, token_budget=args.working_memory_tokens)
+    ObserverChannel.configure(capacity=args.observer_queue_size, overflow=args.observer_overflow, timeout=args.observer_timeout)
+
+    if args.resident_memory_graph:
+        MemoryGraph.enable_resident_mode(
+            flush_interval=args.graph_flush_interval,
+            flush_threshold=args.graph_flush_threshold
+        )
+
+async def main(args):
+    configure(args)
+
     engine = LibreAgentEngine(
-        deep_schedule=deep_schedule,
-        reasoning_model=reasoning_model
+        deep_schedule=args.deep_schedule,
+        reasoning_model=args.reasoning_model,
+        forget_schedule=args.forget_schedule
     )
+    engine.forget_recognizer.dry_run = args.forget_dry_run
 
     working_memory = engine.working_memory
 
-    MemoryGraph.set_graph_file(memory_graph_file)
+    MemoryGraph.set_graph_file(args.memory_graph_file)
 
     chat_interface = PromptToolkitChatInterface(working_memory)
-    chat_interface.print_internals = print_internals
+    chat_interface.print_internals = args.print_internals
     try:
         engine.start()
         await chat_interface.start()
@@ -123,6 +177,36 @@ if __name__ == "__main__":
     parser.add_argument('--print-internals', action='store_true', help='print internal memories')
     parser.add_argument('--memory-graph-file', type=str, default=None, help='path to custom memory graph file')
     parser.add_argument('--reasoning-model', type=str, default="gemini/gemini-2.0-flash-exp", help='Model to use for reasoning (default: gemini/gemini-2.0-flash-exp)')
+    parser.add_argument('--storage-backend', type=str, default='pickle', choices=['pickle', 'sqlite'], help='memory graph storage engine (default: pickle)')
+    parser.add_argument('--resident-memory-graph', action='store_true', help='keep the memory graph in process memory and persist it in the background')
+    parser.add_argument('--graph-flush-interval', type=float, default=5.0, help='seconds between background memory graph flushes (resident mode)')
+    parser.add_argument('--graph-flush-threshold', type=int, default=20, help='pending mutations that trigger an early memory graph flush (resident mode)')
+    parser.add_argument('--memory-capacity', type=int, default=200, help='stored memories kept before the lowest scoring ones are evicted (default: 200)')
+    parser.add_argument('--graph-file-lock', action='store_true', help='lock the memory graph file so several processes can share it')
+    parser.add_argument('--recall-candidates', type=int, default=30, help='memories shortlisted locally for the LLM to rerank on recall (default: 30)')
+    parser.add_argument('--no-recall-fast-path', action='store_true', help='always ask the LLM to rerank recall candidates, even when local scores are decisive')
+    parser.add_argument('--recall-strategy', type=str, default='rerank', choices=['rerank', 'vector', 'vector_rerank'], help='default RecallTool strategy (default: rerank)')
+    parser.add_argument('--recall-shard-size', type=int, default=200, help='memories per LLM recall call; larger sets are split into shards (default: 200)')
+    parser.add_argument('--recall-parallelism', type=int, default=4, help='recall shards recognized concurrently (default: 4)')
+    parser.add_argument('--recall-shard-timeout', type=float, default=30.0, help='seconds before a recall shard is given up on (default: 30)')
+    parser.add_argument('--recall-cache-size', type=int, default=128, help='recall results cached while the memory graph is unchanged, 0 disables the cache (default: 128)')
+    parser.add_argument('--recall-cache-ttl', type=float, default=300.0, help='seconds a cached recall result stays valid (default: 300)')
+    parser.add_argument('--recall-neighbors', action='store_true', help='expand every recall with the memories linked to the recalled ones')
+    parser.add_argument('--activation-hops', type=int, default=2, help='memory_flow hops followed when expanding a recall (default: 2)')
+    parser.add_argument('--activation-decay', type=float, default=0.5, help='share of activation passed on per hop when expanding a recall (default: 0.5)')
+    parser.add_argument('--forget-schedule', type=int, default=0, help='forgetting schedule in minutes, 0 disables it (default: 0)')
+    parser.add_argument('--forget-dry-run', action='store_true', help='only log what scheduled forgetting would change')
+    parser.add_argument('--duplicate-threshold', type=float, default=0.8, help='similarity at which a new memory counts as a near-duplicate of a stored one, 0 disables detection (default: 0.8)')
+    parser.add_argument('--duplicate-action', type=str, default='merge', choices=['merge', 'reject'], help='what to do with near-duplicate memories (default: merge)')
+    parser.add_argument('--access-flush-threshold', type=int, default=50, help='recalls and updates buffered before their access stats are written (default: 50)')
+    parser.add_argument('--access-flush-interval', type=float, default=60.0, help='seconds buffered access stats may wait before being written (default: 60)')
+    parser.add_argument('--archive-evicted', action='store_true', help='move evicted and forgotten memories to a compressed archive that RecallTool still searches')
+    parser.add_argument('--working-memory-size', type=int, default=50, help='memories kept in working memory before the oldest are dropped (default: 50)')
+    parser.add_argument('--working-memory-tokens', type=int, default=0, help='token budget of working memory, replaces --working-memory-size when set (default: 0, off)')
+    parser.add_argument('--observer-queue-size', type=int, default=100, help='notifications queued per working memory observer before the overflow policy applies (default: 100)')
+    parser.add_argument('--observer-overflow', type=str, default='drop_oldest', choices=['drop_oldest', 'coalesce', 'block'], help='what a full observer queue does with new notifications (default: drop_oldest)')
+    parser.add_argument('--observer-timeout', type=float, default=10.0, help='seconds an observer may take per notification before it is cancelled, 0 waits indefinitely (default: 10)')
+    parser.add_argument('--eviction-log', type=str, default=None, help='append evicted memories to this JSON lines file')
     args = parser.parse_args()
 
-    asyncio.run(main(args.deep_schedule, args.print_internals, args.memory_graph_file, args.reasoning_model))  # Updated call
+    asyncio.run(main(args))
@@ -24,11 +24,18 @@ templates = Jinja2Templates(directory=os.path.join(os.path.dirname(__file__), 't
 async def lifespan(app: FastAPI):
     if graph_file:
         MemoryGraph.set_graph_file(graph_file)
+        # Show the cold tier when the agent keeps one for this file
+        if os.path.exists(f"{graph_file}.archive.db"):
+            MemoryGraph.set_archiving(True)
 
         logger.info(f"Loaded memory graph from {graph_file}")
     yield
 
 app = FastAPI(lifespan=lifespan)
+
+def get_memory_graph():
+    # Request handlers don't inherit the lifespan's context, bind to the file directly
+    return MemoryGraph.for_file(graph_file) if graph_file else MemoryGraph()
 app.mount("/static", StaticFiles(directory=os.path.join(os.path.dirname(__file__), 'static')), name="static")
 
 @app.get("/", response_class=HTMLResponse)
@@ -38,7 +45,7 @@ async def memory_inspector(request: Request):
 @app.get("/api/memories", response_class=JSONResponse)
 async def get_memories(request: Request):
     try:
-        memory_graph = MemoryGraph()
+        memory_graph = get_memory_graph()
         memories = memory_graph.get_memories(sort='timestamp', reverse=False)
         formatted = {
             "memories": [{
@@ -54,6 +61,32 @@ async def get_memories(request: Request):
     except Exception as e:
         return {"error": str(e)}, 500
 
+@app.get("/api/search", response_class=JSONResponse)
+async def search_memories(request: Request, q: str, k: int = 20):
+    try:
+        memory_graph = get_memory_graph()
+        scores = dict(memory_graph.search(q, k=k, with_scores=True))
+        memories = memory_graph.get_memories()
+        results = sorted(
+            ({**mem, "score": scores[mem['memory_id']]} for mem in memories if mem['memory_id'] in scores),
+            key=lambda mem: mem["score"],
+            reverse=True,
+        )
+
+        return { 'memories': results, "graph_file": graph_file }
+    except Exception as e:
+        return {"error": str(e)}, 500
+
+@app.get("/api/stats", response_class=JSONResponse)
+async def get_stats(request: Request):
+    try:
+        memory_graph = get_memory_graph()
+        stats = memory_graph.get_stats()
+
+        return { 'stats': stats, 'cache': memory_graph.get_cache_stats(), 'archive': memory_graph.get_archive_stats(), "graph_file": graph_file }
+    except Exception as e:
+        return {"error": str(e)}, 500
+
 if __name__ == "__main__":
     parser = argparse.ArgumentParser(description="Memory Inspector Server")
     parser.add_argument("--host", default="0.0.0.0")
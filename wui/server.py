@@ -35,7 +35,8 @@ async def lifespan(app: FastAPI):
     
     app.state.engine = engine
     app.state.wm = engine.working_memory
-    app.state.wm.register_observer(memory_callback)
+    # Assistant messages arriving together go out in one websocket frame
+    app.state.wm.register_observer(memory_callback, batch=True)
     
     engine.start()
     yield
@@ -77,11 +78,14 @@ async def handle_message(message: str = Form(...)):
 
     return HTMLResponse("")
 
-async def memory_callback(memory):
-    if memory['memory_type'] == 'external' and memory['metadata'].get('unit_name') == "ReasoningUnit":
-        timestamp = time.strftime('%H:%M:%S', time.localtime(memory["timestamp"]))
-        snippet = render_message_snippet("assistant", memory["content"], timestamp)
-        await broadcast_snippet(snippet)
+async def memory_callback(memories):
+    snippets = [
+        render_message_snippet("assistant", memory["content"], time.strftime('%H:%M:%S', time.localtime(memory["timestamp"])))
+        for memory in memories
+        if memory['memory_type'] == 'external' and memory['metadata'].get('unit_name') == "ReasoningUnit"
+    ]
+    if snippets:
+        await broadcast_snippet("".join(snippets))
 
 @app.websocket("/ws")
 async def websocket_handler(websocket: WebSocket):
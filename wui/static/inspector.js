@@ -1,7 +1,69 @@
+// Access stats stored as epoch seconds, shown as dates
+const ACCESS_TIME_KEYS = ["last_recalled", "last_updated"];
+
 document.addEventListener("DOMContentLoaded", function() {
+    fetchStats();
     fetchMemories();
+    document.getElementById("search-form").addEventListener("submit", function(event) {
+        event.preventDefault();
+        searchMemories(document.getElementById("search-input").value.trim());
+    });
 });
 
+function fetchStats() {
+    fetch("/api/stats")
+        .then(response => response.json())
+        .then(data => displayStats(data.stats, data.cache, data.archive))
+        .catch(error => console.error("Error fetching stats:", error));
+}
+
+function displayStats(stats, cache, archive) {
+    const container = document.getElementById("stats-container");
+    container.innerHTML = "";
+
+    if (!stats) {
+        return;
+    }
+
+    const summary = document.createElement("p");
+    summary.textContent = `Memories: ${stats.total_memories} | Connections: ${stats.total_connections}`;
+    container.appendChild(summary);
+
+    const distributions = [
+        ["Types", stats.memory_type_distribution],
+        ["Roles", stats.role_distribution],
+        ["Priorities", stats.priority_distribution],
+    ];
+
+    distributions.forEach(([label, distribution]) => {
+        if (!distribution) {
+            return;
+        }
+        const line = document.createElement("p");
+        line.textContent = `${label}: ` + Object.entries(distribution).map(([k, v]) => `${k}: ${v}`).join(", ");
+        container.appendChild(line);
+    });
+
+    const access = stats.access_stats;
+    if (access) {
+        const line = document.createElement("p");
+        line.textContent = `Access: ${access.recalls} recalls of ${access.recalled_memories} memories, ${access.updates} updates of ${access.updated_memories} memories`;
+        container.appendChild(line);
+    }
+
+    if (archive) {
+        const line = document.createElement("p");
+        line.textContent = `Archive: ${archive.archived_memories} memories (${(archive.archive_bytes / 1024).toFixed(1)} KiB compressed)`;
+        container.appendChild(line);
+    }
+
+    if (cache) {
+        const line = document.createElement("p");
+        line.textContent = `Graph cache: ${cache.hits} hits, ${cache.misses} misses (${(cache.hit_rate * 100).toFixed(1)}%)`;
+        container.appendChild(line);
+    }
+}
+
 function fetchMemories() {
     const url = "/api/memories";
 
@@ -20,6 +82,22 @@ function fetchMemories() {
         });
 }
 
+function searchMemories(query) {
+    if (!query) {
+        fetchMemories();
+        return;
+    }
+
+    fetch(`/api/search?q=${encodeURIComponent(query)}`)
+        .then(response => response.json())
+        .then(data => displayMemories(data.memories))
+        .catch(error => {
+            console.error("Error searching memories:", error);
+            const container = document.getElementById("memories-container");
+            container.innerHTML = "<p>Error searching memories.</p>";
+        });
+}
+
 function displayMemories(memories) {
     const container = document.getElementById("memories-container");
     container.innerHTML = "";
@@ -38,6 +116,9 @@ function displayMemories(memories) {
         const date = new Date(mem.timestamp * 1000).toLocaleString();
         const idTypeSpan = document.createElement("span");
         idTypeSpan.textContent = `ID: ${mem.memory_id} | Type: ${mem.memory_type}`;
+        if (mem.score !== undefined) {
+            idTypeSpan.textContent += ` | Score: ${mem.score.toFixed(2)}`;
+        }
         const timestampSpan = document.createElement("span");
         timestampSpan.textContent = date;
         header.appendChild(idTypeSpan);
@@ -57,7 +138,11 @@ function displayMemories(memories) {
         for (const [key, value] of Object.entries(mem.metadata)) {
             const metadataItem = document.createElement("span");
             metadataItem.classList.add("metadata-item");
-            metadataItem.textContent = `${key}: ${typeof value === 'object' ? JSON.stringify(value) : value}`;
+            if (ACCESS_TIME_KEYS.includes(key) && typeof value === 'number') {
+                metadataItem.textContent = `${key}: ${new Date(value * 1000).toLocaleString()}`;
+            } else {
+                metadataItem.textContent = `${key}: ${typeof value === 'object' ? JSON.stringify(value) : value}`;
+            }
             footer.appendChild(metadataItem);
         }
 